@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""Keeping a 1000 order book fresh: rebuilding it per poll vs. applying updates.
+
+The rebuild row is the client-side work of every polling round (decode and
+build the book, network time excluded); the apply row is one streamed
+update of a single order applied by OrderBookSync.
+
+Run with ``python -m benchmarks.bench_booksync``.
+"""
+import timeit
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi.booksync import OrderBookSync
+from blockex.tradeapi.decoding import decode_records
+from blockex.tradeapi.orderbook import OrderBook
+from blockex.tradeapi.streaming import MarketOrdersEvent
+
+ORDERS = 1000
+REPEAT = 5
+
+
+def main():
+    payload = market_orders_payload(ORDERS)
+    orders = decode_records(payload)
+    sync = OrderBookSync(None, None, 1)
+    sync.book = OrderBook(1, orders)
+    sync._snapshot_requested = 0  # pylint: disable=protected-access
+    event = MarketOrdersEvent(1, [dict(orders[10], quantity=orders[10]['quantity'] / 2)], 1)
+
+    rows = [('poll: decode + build', lambda: OrderBook(1, decode_records(payload)), 20),
+            ('stream: apply update', lambda: sync.apply(event), 10000)]
+    for name, func, number in rows:
+        seconds = min(timeit.repeat(func, number=number, repeat=REPEAT))
+        print('{0:<24} {1:10.2f} us'.format(name, seconds * 1e6 / number))
+
+
+if __name__ == '__main__':
+    main()
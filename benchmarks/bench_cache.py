@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Reading 100k trades: REST download, cold cache and warm cache.
+
+REST goes through fetch_trades_history_parallel over an in-memory
+transport, so it measures decoding only, with no network latency. Cold is
+the first range query of a freshly opened store, warm the average of the
+following ones. Both sum the price column of a one-hour range.
+
+Run with ``python -m benchmarks.bench_cache``.
+"""
+import json
+import shutil
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+from blockex.tradeapi import interface
+from blockex.tradeapi.cache import ColumnarTradeStore
+from blockex.tradeapi.tradeapi import BlockExTradeApi
+from blockex.tradeapi.transport import FakeTransport
+
+TRADES = 100000
+PAGE_SIZE = 1000
+INSTRUMENT_ID = 1
+START = datetime(2017, 5, 14)
+RANGE = ('2017-05-14T10:00:00', '2017-05-14T11:00:00')
+
+
+def make_trade(trade_id):
+    return {'tradeID': trade_id, 'price': '{0}.25'.format(100 + trade_id % 7), 'totalPrice': '1.00',
+            'quantity': '0.50', 'currencyID': 1, 'quoteCurrencyID': 2, 'instrumentID': INSTRUMENT_ID,
+            'offerType': 1 + trade_id % 2,
+            'tradeDate': (START + timedelta(seconds=trade_id)).isoformat() + '+00:00'}
+
+
+def main():
+    pages = [json.dumps({'trades': [make_trade(trade_id) for trade_id in range(start, start + PAGE_SIZE)],
+                         'totalCount': TRADES}).encode()
+             for start in range(0, TRADES, PAGE_SIZE)]
+
+    def handler(method, url, kwargs):
+        page_index = 0
+        for pair in kwargs.get('data', '').split('&'):
+            if pair.startswith('pageIndex='):
+                page_index = int(pair.split('=')[1])
+        return interface.SUCCESS, pages[page_index]
+
+    directory = tempfile.mkdtemp()
+    try:
+        with BlockExTradeApi('user', 'password', api_url='http://stand.in/', api_id='id',
+                             transport=FakeTransport(handler)) as api:
+            trades = api.fetch_trades_history_parallel(page_size=PAGE_SIZE)
+            store = ColumnarTradeStore(directory)
+            store.append(INSTRUMENT_ID, trades)
+
+            rest = timeit.timeit(lambda: api.fetch_trades_history_parallel(page_size=PAGE_SIZE), number=1)
+
+        def query():
+            return ColumnarTradeStore(directory).query(INSTRUMENT_ID, *RANGE)['price'].sum()
+
+        cold = timeit.timeit(query, number=1)
+        warm = timeit.timeit(query, number=100) / 100
+
+        print('{0:<12} {1:10.3f} ms'.format('REST', rest * 1e3))
+        print('{0:<12} {1:10.3f} ms'.format('cold cache', cold * 1e3))
+        print('{0:<12} {1:10.3f} ms'.format('warm cache', warm * 1e3))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""Column arrays from 10k orders: decoded directly, and via a list of dicts.
+
+The second row is what analytics code did before as_arrays: decode_records()
+to dicts, then build one array per field from them.
+
+Run with ``python -m benchmarks.bench_columns``.
+"""
+import timeit
+
+import numpy as np
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi.columns import ORDER_COLUMNS, decode_columns
+from blockex.tradeapi.decoding import decode_records
+
+ORDERS = 10000
+NUMBER = 10
+REPEAT = 5
+
+
+def via_dicts(content):
+    orders = decode_records(content)
+    return {'orderID': np.array([order['orderID'] for order in orders], dtype=np.int64),
+            'price': np.array([float(order['price']) for order in orders]),
+            'quantity': np.array([float(order['quantity']) for order in orders]),
+            'status': np.array([order['status'] for order in orders], dtype=np.int8)}
+
+
+def main():
+    content = market_orders_payload(ORDERS)
+    rows = [('decode_columns', lambda body: decode_columns(body, ORDER_COLUMNS)),
+            ('decode_records + arrays', via_dicts)]
+    for name, func in rows:
+        seconds = min(timeit.repeat(lambda: func(content), number=NUMBER, repeat=REPEAT))
+        print('{0:<24} {1:8.2f} ms/response'.format(name, seconds * 1e3 / NUMBER))
+
+    orders = decode_columns(content, ORDER_COLUMNS)
+    seconds = min(timeit.repeat(lambda: orders['price'][orders['offerType'] == 1].max(), number=1000, repeat=REPEAT))
+    print('{0:<24} {1:8.3f} ms'.format('best bid (vectorized)', seconds))
+
+
+if __name__ == '__main__':
+    main()
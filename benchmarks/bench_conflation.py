@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Bursty stream, slow consumer: queued vs. conflated delivery.
+
+A producer pushes MESSAGES single-order updates spread over INSTRUMENTS
+instruments as fast as it can, while the consumer spends WORK seconds per
+event. Reports how long the consumer needs to see the last update and how
+many events it had to handle.
+
+Run with ``python -m benchmarks.bench_conflation``.
+"""
+import asyncio
+import time
+
+from blockex.tradeapi.streaming import MarketDataStream
+
+INSTRUMENTS = 10
+MESSAGES = 2000
+WORK = 0.001
+
+
+def message(index):
+    instrument_id = 1 + index % INSTRUMENTS
+    return [[{'orderID': index % 50, 'price': str(index), 'quantity': '1', 'offerType': 1,
+              'instrumentID': instrument_id}]]
+
+
+async def scenario(**options):
+    stream = MarketDataStream(queue_size=MESSAGES)
+    subscription = stream.subscribe(None, **options)
+    last = {'price': None}
+    start = time.perf_counter()
+
+    async def consume():
+        handled = 0
+        while last['price'] != str(MESSAGES - 1):
+            event = await subscription.get()
+            handled += 1
+            time.sleep(WORK)
+            for order in event.orders:
+                last['price'] = str(order['price'])
+            await asyncio.sleep(0)
+        return handled
+
+    consumer = asyncio.ensure_future(consume())
+    for index in range(MESSAGES):
+        await stream.dispatch(message(index))
+        if index % 100 == 0:
+            await asyncio.sleep(0)
+    handled = await consumer
+    return time.perf_counter() - start, handled, subscription.stats()
+
+
+def main():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    rows = [('queue', {}),
+            ('conflate', {'conflate': True}),
+            ('conflate, 200/s', {'conflate': True, 'max_rate': 200})]
+    for name, options in rows:
+        seconds, handled, stats = loop.run_until_complete(scenario(**options))
+        print('{0:<18} {1:8.1f} ms to last update {2:6d} events handled {3:6d} coalesced'.format(
+            name, seconds * 1e3, handled, stats.get('coalesced', 0)))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""Burst of get_market_orders calls: throwaway connections vs the pooled session.
+
+Run with ``python -m benchmarks.bench_connection_pool``.
+"""
+import timeit
+
+import requests
+
+from benchmarks.server import StandInServer, market_orders_payload
+from blockex.tradeapi.tradeapi import BlockExTradeApi
+
+BURST = 200
+INSTRUMENT_ID = 1
+
+
+def main():
+    with StandInServer(market_orders_payload(20)) as server:
+        pooled = BlockExTradeApi('user', 'password', api_url=server.url, api_id='id')
+        unpooled = BlockExTradeApi('user', 'password', api_url=server.url, api_id='id')
+        # Emulate the previous behaviour: a fresh Session (and connection) per call.
+        unpooled.get_path = lambda url_path, *args, **kwargs: requests.get(
+            unpooled.api_url + url_path, *args, **kwargs)
+
+        for name, client in (('per-call requests.get', unpooled), ('pooled session', pooled)):
+            client.get_market_orders(INSTRUMENT_ID)
+            seconds = timeit.timeit(lambda: client.get_market_orders(INSTRUMENT_ID), number=BURST)
+            print('{0:<24} {1:8.3f} ms/call'.format(name, seconds * 1000 / BURST))
+
+        pooled.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""Decoding cost of a large orders response.
+
+Compares the previous path (stdlib json.loads, then convert_order_numbers on
+every order) with the single pass of decoding.decode_records. Runs on a
+payload with numbers sent as strings, like the API does, and on one with
+float literals.
+
+Run with ``python -m benchmarks.bench_decoding``.
+"""
+import json
+import timeit
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi import decoding
+from blockex.tradeapi.tradeapi import convert_order_numbers
+
+ORDERS = 10000
+NUMBER = 5
+REPEAT = 10
+
+
+def float_payload(count):
+    """market_orders_payload() with prices and quantities as JSON floats."""
+    orders = json.loads(market_orders_payload(count).decode('utf-8'))
+    for order in orders:
+        for key in ('price', 'initialQuantity', 'quantity'):
+            order[key] = float(order[key])
+    return json.dumps(orders).encode()
+
+
+def previous(content):
+    orders = json.loads(content.decode('utf-8'))
+    for order in orders:
+        convert_order_numbers(order)
+    return orders
+
+
+def main():
+    payloads = [('string numbers', market_orders_payload(ORDERS)),
+                ('float numbers', float_payload(ORDERS))]
+    rows = [('json + convert_*', previous),
+            ('decode_records', decoding.decode_records)]
+    for payload_name, content in payloads:
+        print(payload_name)
+        # Rows take turns, so a noisy moment does not favour one of them
+        best = [float('inf')] * len(rows)
+        for _ in range(REPEAT):
+            for index, (_, func) in enumerate(rows):
+                best[index] = min(best[index], timeit.timeit(lambda: func(content), number=NUMBER))
+        for (name, _), seconds in zip(rows, best):
+            print('  {0:<28} {1:8.2f} ms/response'.format(name, seconds * 1e3 / NUMBER))
+
+
+if __name__ == '__main__':
+    main()
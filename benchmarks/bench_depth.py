@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""L2 depth of 1000 market orders: per-order Python loop vs. DepthBook.
+
+The loop row sums quantities per price into a dict from decoded orders, the
+build row aggregates NumPy columns. The update rows apply a new snapshot in
+which 10 orders changed, and the fill row prices a 50 unit market buy.
+
+Run with ``python -m benchmarks.bench_depth``.
+"""
+import timeit
+from collections import defaultdict
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi import interface
+from blockex.tradeapi.columns import ORDER_COLUMNS, decode_columns
+from blockex.tradeapi.decoding import decode_records
+from blockex.tradeapi.depth import DepthBook
+
+ORDERS = 1000
+REPEAT = 5
+NUMBER = 200
+
+
+def aggregate(orders):
+    levels = defaultdict(int)
+    for order in orders:
+        levels[(order['offerType'], order['price'])] += order['quantity']
+    return levels
+
+
+def main():
+    payload = market_orders_payload(ORDERS)
+    orders = decode_records(payload)
+    columns = decode_columns(payload, ORDER_COLUMNS)
+    changed = dict((key, value.copy()) for key, value in columns.items())
+    changed['quantity'][:10] += 1
+    depth = DepthBook(columns)
+
+    def update():
+        depth.update(changed)
+        depth.update(columns)
+
+    rows = [('dict per price (loop)', lambda: aggregate(orders)),
+            ('DepthBook build', lambda: DepthBook(columns)),
+            ('DepthBook.update() x2', update),
+            ('DepthBook.fill_cost()', lambda: depth.fill_cost(interface.OfferType.ASK, 50))]
+    for name, func in rows:
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=REPEAT))
+        print('{0:<24} {1:10.2f} us'.format(name, seconds * 1e6 / NUMBER))
+
+
+if __name__ == '__main__':
+    main()
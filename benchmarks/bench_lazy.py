@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+"""Best bid out of 1000 market orders, decoded eagerly and lazily.
+
+This is the access pattern of get_highest_bid_order(): only the price of every order and
+the remaining fields of the winning one are read.
+
+Run with ``python -m benchmarks.bench_lazy``.
+"""
+import timeit
+from operator import itemgetter
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi.decoding import decode_lazy, decode_records
+
+ORDERS = 1000
+NUMBER = 100
+REPEAT = 5
+
+
+def eager(content):
+    return max(decode_records(content), key=itemgetter('price'))
+
+
+def lazy(content):
+    return max(decode_lazy(content), key=itemgetter('price')).as_dict()
+
+
+def main():
+    content = market_orders_payload(ORDERS)
+    assert eager(content) == lazy(content)
+    for name, func in [('decode_records', eager), ('decode_lazy', lazy)]:
+        seconds = min(timeit.repeat(lambda: func(content), number=NUMBER, repeat=REPEAT))
+        print('{0:<16} {1:8.3f} ms/scan'.format(name, seconds * 1e3 / NUMBER))
+
+
+if __name__ == '__main__':
+    main()
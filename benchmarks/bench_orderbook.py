@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""Best bid of 1000 market orders: linear scan vs. a maintained OrderBook.
+
+The scan is what a one-off best bid lookup costs per response; the book
+is built once and then answers from its sorted levels. The update row is
+one order being replaced, as a stream update would do.
+
+Run with ``python -m benchmarks.bench_orderbook``.
+"""
+import timeit
+from decimal import Decimal
+from operator import itemgetter
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi.decoding import decode_records
+from blockex.tradeapi.orderbook import OrderBook
+
+ORDERS = 1000
+NUMBER = 10000
+
+
+def main():
+    orders = decode_records(market_orders_payload(ORDERS))
+    bids = [order for order in orders if order['offerType'] == 1]
+    book = OrderBook(1, orders)
+    update = dict(orders[0], price=Decimal('120.50'))
+
+    rows = [('max() over the orders', lambda: max(bids, key=itemgetter('price'))),
+            ('OrderBook.best_bid()', book.best_bid),
+            ('OrderBook.depth(10)', lambda: book.depth(10)),
+            ('OrderBook.add() update', lambda: book.add(update)),
+            ('OrderBook build', lambda: OrderBook(1, orders))]
+    for name, func in rows:
+        number = NUMBER if 'build' not in name else 100
+        seconds = timeit.timeit(func, number=number)
+        print('{0:<24} {1:10.2f} us'.format(name, seconds * 1e6 / number))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""Memory and decoding time of 10k orders as dicts and as Order records.
+
+Memory is measured with tracemalloc (Python 3.4+), time is the best of a few
+runs of decoding the same response body, then reading the price and quantity
+of every order by key.
+
+Run with ``python -m benchmarks.bench_records``.
+"""
+import gc
+import timeit
+import tracemalloc
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi.decoding import decode_records
+from blockex.tradeapi.records import Order, decode_as
+
+ORDERS = 10000
+NUMBER = 5
+REPEAT = 10
+
+
+def allocated(func, content):
+    gc.collect()
+    tracemalloc.start()
+    result = func(content)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def read_items(orders):
+    for order in orders:
+        order['price']
+        order['quantity']
+
+
+def main():
+    content = market_orders_payload(ORDERS)
+    rows = [('dicts (decode_records)', decode_records),
+            ('Order records (decode_as)', lambda body: decode_as(body, Order))]
+    # Rows take turns, so a noisy moment does not favour one of them
+    decoded = [func(content) for _, func in rows]
+    best = [[float('inf')] * 2 for _ in rows]
+    for _ in range(REPEAT):
+        for index, (_, func) in enumerate(rows):
+            best[index][0] = min(best[index][0], timeit.timeit(lambda: func(content), number=NUMBER))
+            best[index][1] = min(best[index][1], timeit.timeit(lambda: read_items(decoded[index]), number=NUMBER))
+    for (name, func), (decode, read) in zip(rows, best):
+        size = allocated(func, content)
+        print('{0:<28} {1:8.2f} ms/response {2:8.2f} ms/read {3:8.0f} bytes/order'.format(
+            name, decode * 1e3 / NUMBER, read * 1e3 / NUMBER, float(size) / ORDERS))
+
+
+if __name__ == '__main__':
+    main()
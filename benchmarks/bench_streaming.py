@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""Market data stream dispatch throughput.
+
+Decodes and queues MarketOrdersRefreshed messages of ORDERS orders each,
+as JSON text and as already parsed arguments (the way signalr-client-aio
+hands them over), into one subscription that is drained after every message.
+
+Run with ``python -m benchmarks.bench_streaming``.
+"""
+import asyncio
+import json
+import time
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi.streaming import MarketDataStream
+
+ORDERS = 100
+MESSAGES = 2000
+REPEAT = 3
+
+
+def main():
+    payload = market_orders_payload(ORDERS).decode('utf-8')
+    parsed = json.loads(payload)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    async def pump(message_of):
+        stream = MarketDataStream()
+        subscription = stream.subscribe(None)
+        start = time.perf_counter()
+        for _ in range(MESSAGES):
+            await stream.dispatch(message_of())
+            await subscription.get()
+        return time.perf_counter() - start
+
+    rows = [('JSON text argument', lambda: [payload]),
+            ('parsed argument', lambda: [[dict(order) for order in parsed]])]
+    for name, message_of in rows:
+        seconds = min(loop.run_until_complete(pump(message_of)) for _ in range(REPEAT))
+        print('{0:<24} {1:10.0f} messages/s {2:8.1f} us/message'.format(
+            name, MESSAGES / seconds, seconds * 1e6 / MESSAGES))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""Two-sided quotes of 30 instruments over a transport with simulated latency.
+
+Compares get_highest_bid_order() then get_lowest_ask_order() per instrument,
+one after the other, with one get_top_of_book() call. Every request takes
+LATENCY seconds and answers with ORDERS market orders.
+
+Run with ``python -m benchmarks.bench_top_of_book``.
+"""
+import time
+import timeit
+
+from benchmarks.server import market_orders_payload
+from blockex.tradeapi import interface
+from blockex.tradeapi.tradeapi import BlockExTradeApi
+from blockex.tradeapi.transport import FakeTransport
+
+INSTRUMENTS = list(range(1, 31))
+ORDERS = 200
+LATENCY = 0.02
+
+
+def handler(method, url, kwargs):
+    time.sleep(LATENCY)
+    return interface.SUCCESS, market_orders_payload(ORDERS)
+
+
+def main():
+    transport = FakeTransport(handler)
+    with BlockExTradeApi('user', 'password', api_url='http://stand.in/', api_id='id',
+                         transport=transport) as api:
+        def serial():
+            return [(api.get_highest_bid_order(instrument_id), api.get_lowest_ask_order(instrument_id))
+                    for instrument_id in INSTRUMENTS]
+
+        rows = [('serial bid + ask', serial),
+                ('get_top_of_book()', lambda: api.get_top_of_book(INSTRUMENTS))]
+        for name, func in rows:
+            func()
+            del transport.requests[:]
+            seconds = timeit.timeit(func, number=3) / 3
+            print('{0:<24} {1:8.1f} ms {2:4d} requests'.format(name, seconds * 1e3, len(transport.requests) // 3))
+
+
+if __name__ == '__main__':
+    main()
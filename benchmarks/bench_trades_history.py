@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""Full trades history download over a transport with simulated latency.
+
+Compares the serial page walk, the prefetching iterator and the concurrent
+download, with LATENCY seconds per request and PAGES pages of 100 trades.
+
+Run with ``python -m benchmarks.bench_trades_history``.
+"""
+import json
+import time
+import timeit
+
+from blockex.tradeapi import interface
+from blockex.tradeapi.tradeapi import BlockExTradeApi
+from blockex.tradeapi.transport import FakeTransport
+
+PAGES = 20
+PAGE_SIZE = 100
+LATENCY = 0.02
+
+
+def handler(method, url, kwargs):
+    time.sleep(LATENCY)
+    page_index = 0
+    for pair in kwargs.get('data', '').split('&'):
+        if pair.startswith('pageIndex='):
+            page_index = int(pair.split('=')[1])
+    trades = [{'tradeID': page_index * PAGE_SIZE + index, 'price': '1.00', 'totalPrice': '1.00',
+               'quantity': '1.00', 'tradeDate': '2017-05-14T09:16:20.335+00:00'}
+              for index in range(PAGE_SIZE)]
+    return interface.SUCCESS, json.dumps({'trades': trades, 'pageCount': PAGES}).encode()
+
+
+def main():
+    with BlockExTradeApi('user', 'password', api_url='http://stand.in/', api_id='id',
+                         transport=FakeTransport(handler)) as api:
+        rows = [('serial', lambda: list(api.iter_trades_history(page_size=PAGE_SIZE, prefetch=False))),
+                ('iter (prefetch)', lambda: list(api.iter_trades_history(page_size=PAGE_SIZE))),
+                ('parallel (10 workers)', lambda: api.fetch_trades_history_parallel(page_size=PAGE_SIZE,
+                                                                                    workers=10))]
+        for name, func in rows:
+            assert len(func()) == PAGES * PAGE_SIZE
+            seconds = timeit.timeit(func, number=3) / 3
+            print('{0:<24} {1:8.1f} ms/download'.format(name, seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
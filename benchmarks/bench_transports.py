@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""Per-request overhead of each transport against a local stand-in server.
+
+The in-memory FakeTransport row is the cost of the client itself, without
+any network I/O. Transports whose package is not installed are skipped.
+HTTP/2 needs TLS, so against the plain-http stand-in httpx falls back to
+HTTP/1.1; measure 'http2' against a real https endpoint.
+
+Run with ``python -m benchmarks.bench_transports``.
+"""
+import timeit
+
+from benchmarks.server import StandInServer, market_orders_payload
+from blockex.tradeapi import interface
+from blockex.tradeapi.tradeapi import BlockExTradeApi
+from blockex.tradeapi.transport import FakeTransport
+
+REQUESTS = 500
+INSTRUMENT_ID = 1
+ORDERS = 20
+
+
+def main():
+    body = market_orders_payload(ORDERS)
+    transports = [('fake (in-memory)', FakeTransport(lambda method, url, kwargs: (interface.SUCCESS, body))),
+                  ('requests', 'requests'), ('urllib3', 'urllib3'), ('httpx', 'httpx')]
+
+    with StandInServer(body) as server:
+        for name, transport in transports:
+            try:
+                client = BlockExTradeApi('user', 'password', api_url=server.url, api_id='id', transport=transport)
+            except ImportError as error:
+                print('{0:<20} skipped ({1})'.format(name, error))
+                continue
+
+            with client:
+                client.get_market_orders(INSTRUMENT_ID)
+                seconds = timeit.timeit(lambda: client.get_market_orders(INSTRUMENT_ID), number=REQUESTS)
+            print('{0:<20} {1:8.1f} us/request'.format(name, seconds * 1e6 / REQUESTS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Local stand-in for the BlockEx Trade API used by the benchmarks."""
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+def market_orders_payload(count):
+    """Builds a getMarketOrders-like JSON body with `count` orders."""
+    orders = [{'orderID': str(30000 + index),
+               'price': '{0}.{1:02d}'.format(100 + index % 50, index % 100),
+               'initialQuantity': '1.50',
+               'quantity': '0.75',
+               'dateCreated': '2017-10-09T09:32:24.735659+00:00',
+               'offerType': 1 + index % 2,
+               'type': 1,
+               'status': 20,
+               'instrumentID': 1,
+               'trades': None}
+              for index in range(count)]
+    return json.dumps(orders).encode()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = self.server.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class StandInServer(object):
+    """Serves a fixed JSON body on every path from a background thread."""
+
+    def __init__(self, body=b'[]'):
+        self.httpd = _ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.httpd.body = body
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}/'.format(self.httpd.server_address[1])
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
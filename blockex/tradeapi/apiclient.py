@@ -1,28 +1,119 @@
-import requests
+import time
+
 from blockex.tradeapi import interface
 
-try:
-    import ujson as json
-    requests.models.json = json
-except ImportError:
-    pass
+from .hedging import is_hedgeable
+from .ratelimit import backoff_delay, parse_retry_after, retry_attempts_for
+from .transport import make_transport
 
 
 class ApiClient(object):
-    """Api Client class"""
+    """Api Client class.
+
+    Sends requests through a pooled transport (a :class:`requests.Session` by
+    default), so consecutive calls reuse keep-alive connections instead of
+    paying a TCP/TLS handshake each time. Call :meth:`close` (or use the
+    client as a context manager) to release the pooled connections.
 
-    def __init__(self, api_url=None, api_id=None):
+    :param api_url: Base API URL. Optional.
+    :type api_url: str
+    :param api_id: Partner API ID. Optional.
+    :type api_id: str
+    :param pool_connections: Number of host pools to cache. Optional.
+    :type pool_connections: int
+    :param pool_maxsize: Maximum number of connections kept per host. Optional.
+    :type pool_maxsize: int
+    :param pool_block: Block when no free connection is available instead of
+        opening a throwaway one. Optional.
+    :type pool_block: bool
+    :param keep_alive: Set to False to close connections after every request. Optional.
+    :type keep_alive: bool
+    :param rate_limiter: Client-side rate limiter every request waits on. Optional.
+    :type rate_limiter: RateLimiter
+    :param retry_attempts: How many times a GET answered with 429/503 is retried,
+        after a jittered exponential backoff that honours Retry-After. Defaults
+        to ``DEFAULT_RETRY_ATTEMPTS`` with a rate limiter and to no retries
+        without one. Optional.
+    :type retry_attempts: int
+    :param transport: 'requests' (default), 'urllib3', 'httpx', 'http2' or a
+        :class:`Transport` instance, see :mod:`blockex.tradeapi.transport`. Optional.
+    :type transport: str or Transport
+    :param hedger: Hedges slow idempotent reads (get_market_orders,
+        get_trades_history, get_partner_instruments) with a duplicate request,
+        see :mod:`blockex.tradeapi.hedging`. Optional.
+    :type hedger: Hedger
+    """
+
+    def __init__(self, api_url=None, api_id=None,
+                 pool_connections=interface.DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=interface.DEFAULT_POOL_MAXSIZE,
+                 pool_block=False,
+                 keep_alive=True,
+                 rate_limiter=None,
+                 retry_attempts=None,
+                 transport=None,
+                 hedger=None):
         self.api_url = api_url if api_url else interface.DEFAULT_API_URL
         self.api_id = api_id if api_id else interface.DEFAULT_API_URL
+        self.rate_limiter = rate_limiter
+        self.retry_attempts = retry_attempts_for(retry_attempts, rate_limiter)
+        self.hedger = hedger
+        if hedger is not None:
+            hedger.set_pool_size(pool_maxsize)
+
+        self.pool_maxsize = pool_maxsize
+        self.transport = make_transport(transport, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                        pool_block=pool_block, keep_alive=keep_alive)
+        # The requests.Session of the default transport, None for other transports
+        self.session = getattr(self.transport, 'session', None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the pooled connections."""
+        if self.hedger is not None:
+            self.hedger.close()
+        self.transport.close()
+
+    def _request(self, method, url_path, *args, **kwargs):
+        if self.hedger is not None and is_hedgeable(url_path):
+            return self.hedger.call(lambda: self._send(method, url_path, *args, **kwargs))
+        return self._send(method, url_path, *args, **kwargs)
+
+    def _send(self, method, url_path, *args, **kwargs):
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(url_path)
+
+            response = self.transport.request(method, self.api_url + url_path, *args, **kwargs)
+
+            retry_after = None
+            if self.rate_limiter is not None:
+                retry_after = self.rate_limiter.on_response(url_path, response)
+            elif response.status_code in interface.THROTTLED_STATUS_CODES:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+            # Only idempotent GETs are retried
+            if (response.status_code not in interface.THROTTLED_STATUS_CODES or
+                    method != 'get' or attempt >= self.retry_attempts):
+                return response
+
+            time.sleep(max(backoff_delay(attempt), retry_after or 0))
+            attempt += 1
 
-    def get_path(self, url_path, *args, **kwargs): # pylint: disable=missing-docstring
-        return requests.get(self.api_url + url_path, *args, **kwargs)
+    def get_path(self, url_path, *args, **kwargs):  # pylint: disable=missing-docstring
+        return self._request('get', url_path, *args, **kwargs)
 
-    def put_path(self, url_path, *args, **kwargs): # pylint: disable=missing-docstring
-        return requests.put(self.api_url + url_path, *args, **kwargs)
+    def put_path(self, url_path, *args, **kwargs):  # pylint: disable=missing-docstring
+        return self._request('put', url_path, *args, **kwargs)
 
-    def post_path(self, url_path, *args, **kwargs): # pylint: disable=missing-docstring
-        return requests.post(self.api_url + url_path, *args, **kwargs)
+    def post_path(self, url_path, *args, **kwargs):  # pylint: disable=missing-docstring
+        return self._request('post', url_path, *args, **kwargs)
 
-    def delete_path(self, url_path, *args, **kwargs): # pylint: disable=missing-docstring
-        return requests.delete(self.api_url + url_path, *args, **kwargs)
+    def delete_path(self, url_path, *args, **kwargs):  # pylint: disable=missing-docstring
+        return self._request('delete', url_path, *args, **kwargs)
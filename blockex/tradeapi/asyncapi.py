@@ -0,0 +1,659 @@
+"""BlockEx Trade API asyncio client library
+
+Requires Python 3.5.3+ and aiohttp. Mirrors :class:`BlockExTradeApi`, but every
+API method is a coroutine and all requests share one non-blocking connection pool.
+"""
+import asyncio
+import datetime
+from collections import OrderedDict, deque
+from urllib.parse import urlencode
+
+import aiohttp
+
+from blockex.tradeapi import interface
+
+from .auth import Auth, TokenStateMixin, bearer_headers
+from .decoding import decode_lazy, decode_records
+from .helper import BatchResult, get_error_message, head, message_raiser, monotonic
+from .orderbook import BOOK_ORDER_STATUSES, OrderBook, best_order, warn_if_truncated
+from .ratelimit import backoff_delay, parse_retry_after, retry_attempts_for
+from .records import CurrencyTotal, Instrument, Order, Trade, decode_as
+from .transport import ApiResponse
+from .tradeapi import (FORM_HEADERS, OPEN_ORDER_STATUSES, create_order_data, market_orders_filter,
+                       merge_trade_pages, newest_unknown_order_id, next_page_index, order_id_from_response,
+                       orders_filter, top_of_book, track_created_orders, trades_history_filter,
+                       trades_history_page_count)
+
+
+async def gather_bounded(func, items, max_concurrency):
+    """Awaits func(item) for every item with at most max_concurrency in flight.
+
+    Asyncio counterpart of :func:`blockex.tradeapi.helper.run_concurrently`.
+
+    :returns: BatchResult for every item, in input order.
+    :rtype: list
+    """
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def call(item):
+        async with semaphore:
+            try:
+                return BatchResult(await func(item), None)
+            except Exception as error:  # pylint: disable=broad-except
+                return BatchResult(None, error)
+
+    return list(await asyncio.gather(*[call(item) for item in items]))
+
+
+class TradesHistoryIterator(object):
+    """Async iterator over the trades history, see :meth:`AsyncBlockExTradeApi.iter_trades_history`.
+
+    :param fetch: Coroutine function returning the decoded page for a page index.
+    :type fetch: callable
+    """
+
+    def __init__(self, fetch, page_size, prefetch=True):
+        self._fetch = fetch
+        self._page_size = page_size
+        self._prefetch = prefetch
+        self._page_index = 0
+        self._pending = None
+        self._trades = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._trades:
+            if self._page_index is None:
+                raise StopAsyncIteration
+            if self._pending is not None:
+                body = await self._pending
+            else:
+                body = await self._fetch(self._page_index)
+
+            self._page_index = next_page_index(body, self._page_index, self._page_size)
+            self._pending = None
+            if self._page_index is not None and self._prefetch:
+                self._pending = asyncio.ensure_future(self._fetch(self._page_index))
+            self._trades.extend(body.get('trades') or [])
+        return self._trades.popleft()
+
+    def close(self):
+        """Cancels the prefetch of the next page, for iterations stopped early."""
+        if self._pending is not None:
+            self._pending.cancel()
+        self._page_index = None
+        self._trades.clear()
+
+
+class AsyncApiClient(object):
+    """Asyncio Api Client class.
+
+    All requests go through a single :class:`aiohttp.ClientSession`, created
+    on first use inside the running event loop. Call :meth:`close` (or use the
+    client as an async context manager) to release the pooled connections.
+
+    :param api_url: Base API URL. Optional.
+    :type api_url: str
+    :param api_id: Partner API ID. Optional.
+    :type api_id: str
+    :param pool_maxsize: Maximum number of simultaneous connections. Optional.
+    :type pool_maxsize: int
+    :param keep_alive: Set to False to close connections after every request. Optional.
+    :type keep_alive: bool
+    :param rate_limiter: Client-side rate limiter every request waits on. Optional.
+    :type rate_limiter: RateLimiter
+    :param retry_attempts: How many times a GET answered with 429/503 is retried.
+        Defaults to no retries without a rate limiter. Optional.
+    :type retry_attempts: int
+    """
+
+    def __init__(self, api_url=None, api_id=None,
+                 pool_maxsize=interface.DEFAULT_ASYNC_POOL_MAXSIZE,
+                 keep_alive=True,
+                 rate_limiter=None,
+                 retry_attempts=None):
+        self.api_url = api_url if api_url else interface.DEFAULT_API_URL
+        self.api_id = api_id if api_id else interface.DEFAULT_API_URL
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.rate_limiter = rate_limiter
+        self.retry_attempts = retry_attempts_for(retry_attempts, rate_limiter)
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Closes the pooled connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, force_close=not self.keep_alive)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _send(self, method, url_path, **kwargs):
+        async with self._get_session().request(method, self.api_url + url_path, **kwargs) as response:
+            content = await response.read()
+            return ApiResponse(response.status, response.headers, content)
+
+    async def _request(self, method, url_path, **kwargs):
+        """Asyncio counterpart of :meth:`ApiClient._request`"""
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(url_path)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            response = await self._send(method, url_path, **kwargs)
+
+            retry_after = None
+            if self.rate_limiter is not None:
+                retry_after = self.rate_limiter.on_response(url_path, response)
+            elif response.status_code in interface.THROTTLED_STATUS_CODES:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+            if (response.status_code not in interface.THROTTLED_STATUS_CODES or
+                    method != 'GET' or attempt >= self.retry_attempts):
+                return response
+
+            await asyncio.sleep(max(backoff_delay(attempt), retry_after or 0))
+            attempt += 1
+
+    async def get_path(self, url_path, **kwargs):  # pylint: disable=missing-docstring
+        return await self._request('GET', url_path, **kwargs)
+
+    async def put_path(self, url_path, **kwargs):  # pylint: disable=missing-docstring
+        return await self._request('PUT', url_path, **kwargs)
+
+    async def post_path(self, url_path, **kwargs):  # pylint: disable=missing-docstring
+        return await self._request('POST', url_path, **kwargs)
+
+    async def delete_path(self, url_path, **kwargs):  # pylint: disable=missing-docstring
+        return await self._request('DELETE', url_path, **kwargs)
+
+
+class AsyncAuth(TokenStateMixin, AsyncApiClient):
+    """Asyncio counterpart of :class:`Auth`"""
+
+    is_unauthorized_response = staticmethod(Auth.is_unauthorized_response)
+
+    def __init__(self, username, password, api_url, api_id, **kwargs):
+        assert username
+        assert password
+
+        self.username = username
+        self.password = password
+        self._set_token_state(None, None)
+        self._token_lock = None
+
+        AsyncApiClient.__init__(self, api_url, api_id, **kwargs)
+
+    def _get_token_lock(self):
+        # Created lazily so that it belongs to the running event loop
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        return self._token_lock
+
+    async def _refresh_token(self, stale_token):
+        """Single-flight login, see :meth:`Auth._refresh_token`."""
+        async with self._get_token_lock():
+            if self._token_state[0] == stale_token:
+                await self._login()
+            return self._token_state[:2]
+
+    async def make_authorized_request(self, method, url):
+        """Helper coroutine for make authorized request"""
+        access_token, headers, deadline = self._token_state
+
+        # Not logged in or the access token has expired
+        if not access_token or deadline <= monotonic():
+            access_token, headers = await self._refresh_token(access_token)
+
+        response = await method(url, headers=headers)
+
+        if self.is_unauthorized_response(response):
+            access_token, headers = await self._refresh_token(access_token)
+            response = await method(url, headers=headers)
+
+        return response
+
+    async def get_access_token(self):
+        """Gets the access token.
+
+        :returns: The access token of the logged
+        :rtype: dict
+        :raises: requests.RequestException
+
+        """
+
+        data = {
+            'grant_type': 'password',
+            'username': self.username,
+            'password': self.password,
+            'client_id': self.api_id
+        }
+
+        response = await self.post_path(interface.ApiPath.LOGIN.value, data=data)
+        if response.status_code == interface.SUCCESS:
+            return response.json()
+
+        message_raiser('Login failed. {error_message}', error_message=get_error_message(response),
+                       response=response)
+
+    async def login(self):
+        """
+        Performs a login and stores the received access token.
+
+        :returns: The access token of the logged in trader
+        :rtype: dict
+        :raises: requests.RequestException
+
+        """
+        async with self._get_token_lock():
+            return await self._login()
+
+    async def _login(self):
+        access_token = await self.get_access_token()
+        expires_in = access_token['expires_in']
+        self._set_token_state(access_token['access_token'],
+                              datetime.datetime.now() + datetime.timedelta(seconds=expires_in), expires_in)
+        return self.access_token
+
+    async def logout(self):
+        """
+        Performs a logout when logged in and deletes the stored access token.
+
+        :raises: requests.RequestException
+
+        """
+
+        access_token = self.access_token
+        if access_token is not None:
+            response = await self.post_path(interface.ApiPath.LOGOUT.value, headers=bearer_headers(access_token))
+            if response.status_code != interface.SUCCESS:
+                message_raiser('Logout failed. {error_message}', error_message=get_error_message(response))
+
+            self.access_token = None
+
+
+class AsyncBlockExTradeApi(AsyncAuth):
+    """Asyncio BlockEx Trade API wrapper.
+
+    Every method is a coroutine taking the same arguments and returning the
+    same data as its :class:`BlockExTradeApi` counterpart.
+    """
+
+    def __init__(self, username, password, api_url=None, api_id=None, **kwargs):
+        self._open_orders = set()
+        self._open_orders_complete = False
+
+        AsyncAuth.__init__(self, username, password, api_url, api_id, **kwargs)
+
+    async def get_orders(self,
+                         instrument_id=None,
+                         order_type=None,
+                         offer_type=None,
+                         status=None,
+                         load_executions=None,
+                         max_count=None,
+                         as_records=False,
+                         lazy=False):
+        """Gets the orders of the trader. See :meth:`BlockExTradeApi.get_orders`."""
+
+        data = orders_filter(instrument_id, order_type, offer_type, status, load_executions, max_count)
+        query_string = urlencode(data)
+        response = await self.make_authorized_request(self.get_path,
+                                                      interface.ApiPath.GET_ORDERS.value + query_string)
+
+        if response.status_code != interface.SUCCESS:
+            message_raiser('Failed to get the orders. {error_message}',
+                           error_message=get_error_message(response))
+
+        if as_records:
+            return decode_as(response.content, Order)
+        if lazy:
+            return decode_lazy(response.content)
+        orders = decode_records(response.content)
+        return orders
+
+    async def get_market_orders(self, instrument_id,
+                                order_type=None,
+                                offer_type=None,
+                                status=None,
+                                max_count=None,
+                                as_records=False,
+                                lazy=False,
+                                as_arrays=False):
+        """Gets the market orders. See :meth:`BlockExTradeApi.get_market_orders`."""
+
+        data = market_orders_filter(self.api_id, instrument_id, order_type, offer_type, status, max_count)
+        query_string = urlencode(data)
+        response = await self.get_path(interface.ApiPath.GET_MARKET_ORDERS.value + query_string)
+        if response.status_code != interface.SUCCESS:
+            message_raiser('Failed to get the market orders. {error_message}',
+                           error_message=get_error_message(response))
+
+        if as_records:
+            return decode_as(response.content, Order)
+        if as_arrays:
+            from .columns import ORDER_COLUMNS, decode_columns
+            return decode_columns(response.content, ORDER_COLUMNS)
+        if lazy:
+            return decode_lazy(response.content)
+        orders = decode_records(response.content)
+        return orders
+
+    async def get_latest_price(self, instrument_id):
+        """Gets latest trade price. See :meth:`BlockExTradeApi.get_latest_price`."""
+
+        trades = await self.get_trades_history(instrument_id=instrument_id, sort_by=interface.SortBy.DATE,
+                                               sort_desc=True, page_size=1, lazy=True)
+        return head(trades.get('trades'), default={}).get('price')
+
+    async def get_trades_history(self,
+                                 instrument_id=None,
+                                 currency_id=None,
+                                 date_from=None,
+                                 date_to=None,
+                                 sort_by=None,
+                                 sort_desc=None,
+                                 page_size=None,
+                                 page_index=None,
+                                 as_records=False,
+                                 lazy=False,
+                                 as_arrays=False):
+        """Gets trades history. See :meth:`BlockExTradeApi.get_trades_history`."""
+
+        data = trades_history_filter(self.api_id, instrument_id, currency_id, date_from, date_to,
+                                     sort_by, sort_desc, page_size, page_index)
+        response = await self.post_path(interface.ApiPath.GET_TRADES_HISTORY.value, data=urlencode(data),
+                                        headers=FORM_HEADERS)
+
+        if response.status_code != interface.SUCCESS:
+            message_raiser('Failed to get trades history. {error_message}',
+                           error_message=get_error_message(response))
+
+        if as_records:
+            return decode_as(response.content, Trade, 'trades')
+        if as_arrays:
+            from .columns import TRADE_COLUMNS, decode_columns
+            return decode_columns(response.content, TRADE_COLUMNS, 'trades')
+        if lazy:
+            return decode_lazy(response.content)
+        trades = decode_records(response.content)
+        return trades
+
+    def iter_trades_history(self,
+                            instrument_id=None,
+                            currency_id=None,
+                            date_from=None,
+                            date_to=None,
+                            sort_by=None,
+                            sort_desc=None,
+                            page_size=interface.TRADES_HISTORY_PAGE_SIZE,
+                            prefetch=True):
+        """Iterates over the whole trades history with ``async for``.
+        See :meth:`BlockExTradeApi.iter_trades_history`.
+
+        :rtype: TradesHistoryIterator
+        """
+
+        def fetch(page_index):
+            return self.get_trades_history(instrument_id, currency_id, date_from, date_to,
+                                           sort_by, sort_desc, page_size, page_index)
+
+        return TradesHistoryIterator(fetch, page_size, prefetch)
+
+    async def fetch_trades_history_parallel(self,
+                                            instrument_id=None,
+                                            currency_id=None,
+                                            date_from=None,
+                                            date_to=None,
+                                            sort_by=None,
+                                            sort_desc=None,
+                                            page_size=interface.TRADES_HISTORY_PAGE_SIZE,
+                                            workers=None):
+        """Downloads the whole trades history concurrently.
+        See :meth:`BlockExTradeApi.fetch_trades_history_parallel`."""
+
+        def fetch(page_index):
+            return self.get_trades_history(instrument_id, currency_id, date_from, date_to,
+                                           sort_by, sort_desc, page_size, page_index)
+
+        first_page = await fetch(0)
+        page_count = trades_history_page_count(first_page, page_size)
+        pages = [first_page.get('trades') or []]
+
+        if page_count is None:
+            page_index = next_page_index(first_page, 0, page_size)
+            while page_index is not None:
+                body = await fetch(page_index)
+                pages.append(body.get('trades') or [])
+                page_index = next_page_index(body, page_index, page_size)
+        else:
+            for result in await gather_bounded(fetch, range(1, page_count), workers or self.pool_maxsize):
+                if result.error is not None:
+                    raise result.error
+                pages.append(result.value.get('trades') or [])
+
+        return merge_trade_pages(pages, sort_by, sort_desc)
+
+    async def get_highest_bid_order(self, instrument_id):
+        """Gets highest bid order. See :meth:`BlockExTradeApi.get_highest_bid_order`."""
+
+        orders = await self.get_market_orders(instrument_id, max_count=interface.MARKET_ORDERS_MAX_COUNT,
+                                              status=[interface.OrderStatus.PLACED],
+                                              offer_type=interface.OfferType.BID, lazy=True)
+        warn_if_truncated(orders, interface.MARKET_ORDERS_MAX_COUNT, instrument_id)
+
+        order = best_order(orders, interface.OfferType.BID)
+        return order.as_dict() if order is not None else {}
+
+    async def get_lowest_ask_order(self, instrument_id):
+        """Gets lowest ask order. See :meth:`BlockExTradeApi.get_lowest_ask_order`."""
+
+        orders = await self.get_market_orders(instrument_id, max_count=interface.MARKET_ORDERS_MAX_COUNT,
+                                              status=[interface.OrderStatus.PLACED],
+                                              offer_type=interface.OfferType.ASK, lazy=True)
+        warn_if_truncated(orders, interface.MARKET_ORDERS_MAX_COUNT, instrument_id)
+
+        order = best_order(orders, interface.OfferType.ASK)
+        return order.as_dict() if order is not None else {}
+
+    async def get_order_book(self, instrument_id, max_count=interface.MARKET_ORDERS_MAX_COUNT):
+        """Builds an OrderBook from a market orders snapshot. See :meth:`BlockExTradeApi.get_order_book`."""
+
+        def fetch(offer_type):
+            return self.get_market_orders(instrument_id, offer_type=offer_type, status=BOOK_ORDER_STATUSES,
+                                          max_count=max_count)
+
+        book = OrderBook(instrument_id)
+        for result in await gather_bounded(fetch, [interface.OfferType.BID, interface.OfferType.ASK], 2):
+            if result.error is not None:
+                raise result.error
+            for order in result.value:
+                book.add(order)
+            book.truncated = book.truncated or len(result.value) >= max_count
+        return book
+
+    async def get_top_of_book(self, instrument_ids, max_count=interface.MARKET_ORDERS_MAX_COUNT,
+                              max_concurrency=None):
+        """Gets the best bid and ask of several instruments. See :meth:`BlockExTradeApi.get_top_of_book`."""
+
+        instrument_ids = list(instrument_ids)
+        max_concurrency = max_concurrency or self.pool_maxsize
+
+        def fetch(item):
+            instrument_id, offer_type = item
+            return self.get_market_orders(instrument_id, offer_type=offer_type, status=BOOK_ORDER_STATUSES,
+                                          max_count=max_count, lazy=True)
+
+        tops = {}
+        truncated = []
+        items = [(instrument_id, None) for instrument_id in instrument_ids]
+        for instrument_id, result in zip(instrument_ids, await gather_bounded(fetch, items, max_concurrency)):
+            if result.error is not None:
+                raise result.error
+            if len(result.value) >= max_count:
+                truncated.append(instrument_id)
+            else:
+                tops[instrument_id] = top_of_book(result.value)
+
+        items = [(instrument_id, offer_type) for instrument_id in truncated
+                 for offer_type in (interface.OfferType.BID, interface.OfferType.ASK)]
+        for (instrument_id, offer_type), result in zip(items, await gather_bounded(fetch, items, max_concurrency)):
+            if result.error is not None:
+                raise result.error
+            warn_if_truncated(result.value, max_count, instrument_id)
+            side = 'bid' if offer_type == interface.OfferType.BID else 'ask'
+            tops.setdefault(instrument_id, {})[side] = top_of_book(result.value)[side]
+
+        return OrderedDict((instrument_id, tops[instrument_id]) for instrument_id in instrument_ids)
+
+    async def get_depth(self, instrument_id, depth=None, max_count=interface.MARKET_ORDERS_MAX_COUNT):
+        """Aggregates market orders into price levels. See :meth:`BlockExTradeApi.get_depth`."""
+
+        from .depth import DepthBook
+
+        orders = await self.get_market_orders(instrument_id, status=BOOK_ORDER_STATUSES, max_count=max_count,
+                                              as_arrays=True)
+        if depth is None:
+            return DepthBook(orders)
+        depth.update(orders)
+        return depth
+
+    async def create_order(self, offer_type, order_type, instrument_id, price, quantity, reconcile=True):
+        """Places an order. See :meth:`BlockExTradeApi.create_order`."""
+
+        data = create_order_data(offer_type, order_type, instrument_id, price, quantity)
+        order_id = await self._send_create_order(data)
+
+        if reconcile:
+            await self.reconcile_open_orders()
+            return order_id
+
+        if order_id is None and self._open_orders_complete:
+            orders = await self.get_orders(instrument_id=instrument_id, order_type=order_type,
+                                           offer_type=offer_type, status=OPEN_ORDER_STATUSES,
+                                           load_executions=False, max_count=interface.OPEN_ORDERS_MAX_COUNT)
+            order_id = newest_unknown_order_id(orders, self._open_orders)
+
+        if order_id is None:
+            self._open_orders_complete = False
+        else:
+            self._open_orders.add(order_id)
+        return order_id
+
+    async def create_orders(self, orders, max_concurrency=None, reconcile=True):
+        """Places a batch of orders concurrently. See :meth:`BlockExTradeApi.create_orders`."""
+
+        payloads = [create_order_data(**order) for order in orders]
+        results = await gather_bounded(self._send_create_order, payloads, max_concurrency or self.pool_maxsize)
+
+        if reconcile:
+            await self.reconcile_open_orders()
+        else:
+            track_created_orders(self, results)
+        return results
+
+    async def _send_create_order(self, data):
+        query_string = urlencode(data)
+        response = await self.make_authorized_request(self.post_path,
+                                                      interface.ApiPath.CREATE_ORDER.value + query_string)
+
+        if response.status_code != interface.SUCCESS:
+            message_raiser('Failed to create an order. {error_message}',
+                           error_message=get_error_message(response))
+
+        return order_id_from_response(response)
+
+    async def reconcile_open_orders(self):
+        """Refetches all open orders. See :meth:`BlockExTradeApi.reconcile_open_orders`."""
+
+        orders = await self.get_orders(status=OPEN_ORDER_STATUSES, load_executions=False,
+                                       max_count=interface.OPEN_ORDERS_MAX_COUNT)
+        self._open_orders = set(order['orderID'] for order in orders)
+        self._open_orders_complete = len(orders) < interface.OPEN_ORDERS_MAX_COUNT
+        return self._open_orders
+
+    async def cancel_order(self, order_id):
+        """Cancels a specific order. See :meth:`BlockExTradeApi.cancel_order`."""
+
+        query_string = urlencode({'orderID': order_id})
+        response = await self.make_authorized_request(self.post_path,
+                                                      interface.ApiPath.CANCEL_ORDER.value + query_string)
+
+        if response.status_code != interface.SUCCESS:
+            message_raiser('Failed to cancel the order. {error_message}',
+                           error_message=get_error_message(response))
+
+        self._open_orders.discard(order_id)
+
+    async def cancel_orders(self, order_ids, max_concurrency=None):
+        """Cancels a set of orders concurrently. See :meth:`BlockExTradeApi.cancel_orders`."""
+
+        order_ids = list(order_ids)
+        results = await gather_bounded(self.cancel_order, order_ids, max_concurrency or self.pool_maxsize)
+        return dict(zip(order_ids, results))
+
+    async def cancel_all_orders(self, instrument_id):
+        """Cancels all orders for an instrument. See :meth:`BlockExTradeApi.cancel_all_orders`."""
+
+        query_string = urlencode({'instrumentID': instrument_id})
+        response = await self.make_authorized_request(self.post_path,
+                                                      interface.ApiPath.CANCEL_ALL_ORDERS.value + query_string)
+
+        if response.status_code != interface.SUCCESS:
+            message_raiser('Failed to cancel all orders. {error_message}',
+                           error_message=get_error_message(response))
+
+    async def get_trader_instruments(self, as_records=False):
+        """Gets the trader instruments. See :meth:`BlockExTradeApi.get_trader_instruments`."""
+
+        response = await self.make_authorized_request(self.get_path, interface.ApiPath.GET_TRADER_INSTRUMENTS.value)
+        if response.status_code == interface.SUCCESS:
+            if as_records:
+                return decode_as(response.content, Instrument)
+            instruments = decode_records(response.content)
+            return instruments
+
+        message_raiser('Failed to get the trader instruments. {error_message}',
+                       error_message=get_error_message(response))
+
+    async def get_partner_instruments(self, as_records=False):
+        """Gets the partner instruments. See :meth:`BlockExTradeApi.get_partner_instruments`."""
+
+        query_string = urlencode({'apiID': self.api_id})
+        response = await self.get_path(interface.ApiPath.GET_PARTNER_INSTRUMENTS.value + query_string)
+        if response.status_code != interface.SUCCESS:
+            message_raiser('Failed to get the partner instruments. {error_message}',
+                           error_message=get_error_message(response))
+
+        if as_records:
+            return decode_as(response.content, Instrument)
+        instruments = decode_records(response.content)
+        return instruments
+
+    async def get_trader_info(self, as_records=False):
+        """Gets trader information. See :meth:`BlockExTradeApi.get_trader_info`."""
+
+        response = await self.make_authorized_request(self.get_path, interface.ApiPath.GET_TRADER_INFO.value)
+        if response.status_code == interface.SUCCESS:
+            if as_records:
+                return decode_as(response.content, CurrencyTotal, 'currenciesTotals')
+            info = decode_records(response.content)
+            return info
+
+        message_raiser('Failed to get the trader information. {error_message}',
+                       error_message=get_error_message(response))
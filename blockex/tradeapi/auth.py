@@ -1,25 +1,94 @@
 """BlockEx Trade API auth library"""
 import datetime
+import threading
 
 from blockex.tradeapi import interface
 
 from .apiclient import ApiClient
-from .helper import get_error_message, message_raiser
+from .helper import get_error_message, message_raiser, monotonic
 
 
-class Auth(ApiClient):
-    """Auth class. Takes all auxiliary functions for login processes"""
+def is_retryable_error(error):
+    """Checks if a failed request may succeed when retried: anything but a
+    4xx response other than 429 Too Many Requests."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return True
+    return not 400 <= response.status_code < 500 or response.status_code in interface.THROTTLED_STATUS_CODES
 
-    def __init__(self, username, password, api_url, api_id):
+
+def bearer_headers(access_token):
+    """Returns the request headers authorizing with access_token."""
+    return {'Authorization': 'Bearer ' + access_token}
+
+
+class TokenStateMixin(object):
+    """Keeps access_token and access_token_expires in one (token, headers,
+    monotonic deadline) tuple, replaced as a whole so requests can read it
+    without locking. Assigning either attribute rebuilds the tuple.
+    """
+
+    _token_state = (None, None, None)
+    _access_token_expires = None
+
+    @property
+    def access_token(self):
+        """The access token, None when logged out."""
+        return self._token_state[0]
+
+    @access_token.setter
+    def access_token(self, access_token):
+        self._set_token_state(access_token, self._access_token_expires)
+
+    @property
+    def access_token_expires(self):
+        """Local datetime the access token expires at, None when unknown."""
+        return self._access_token_expires
+
+    @access_token_expires.setter
+    def access_token_expires(self, expires):
+        self._set_token_state(self.access_token, expires)
+
+    def _set_token_state(self, access_token, expires, expires_in=None):
+        """Stores the token; expires_in, when known, gives a more precise deadline than expires."""
+        self._access_token_expires = expires
+        if not access_token:
+            self._token_state = (access_token, None, None)
+            return
+        if expires_in is None:
+            # A token without a known expiry is used until the API rejects it
+            expires_in = (expires - datetime.datetime.now()).total_seconds() if expires is not None \
+                else float('inf')
+        self._token_state = (access_token, bearer_headers(access_token), monotonic() + expires_in)
+
+
+class Auth(TokenStateMixin, ApiClient):
+    """Auth class. Takes all auxiliary functions for login processes
+
+    :param token_refresh_margin: When set, a background thread keeps the access
+        token renewed this many seconds before it expires, see
+        :meth:`start_token_refresher`. Optional.
+    :type token_refresh_margin: float
+    """
+
+    def __init__(self, username, password, api_url, api_id, token_refresh_margin=None, **kwargs):
         assert username
         assert password
 
         self.username = username
         self.password = password
-        self.access_token = None
-        self.access_token_expires = None
+        self.last_refresh_error = None
+        self._set_token_state(None, None)
+        # Held while a login is in flight so that concurrent callers wait
+        # for its result instead of logging in again.
+        self._token_lock = threading.RLock()
+        self._token_refresher = None
+        self._token_refresher_stop = threading.Event()
+
+        ApiClient.__init__(self, api_url, api_id, **kwargs)
 
-        ApiClient.__init__(self, api_url, api_id)
+        if token_refresh_margin is not None:
+            self.start_token_refresher(token_refresh_margin)
 
     @staticmethod
     def is_unauthorized_response(response):
@@ -32,23 +101,30 @@ class Auth(ApiClient):
                     return True
         return False
 
-    def _method_caller(self, method, url):
-        bearer = self.access_token if self.access_token else ''
-        headers = {'Authorization': "Bearer {bearer}".format(bearer=bearer)}
-        return method(url, headers=headers)
+    def _refresh_token(self, stale_token):
+        """Logs in unless another caller already replaced `stale_token`.
+
+        Only one login runs at a time; callers arriving while it is in flight
+        block on the lock and then reuse the token it obtained.
+        """
+        with self._token_lock:
+            if self._token_state[0] == stale_token:
+                self.login()
+            return self._token_state[:2]
 
     def make_authorized_request(self, method, url):
         """Helper function for make authorized request"""
+        access_token, headers, deadline = self._token_state
+
         # Not logged in or the access token has expired
-        current_time = datetime.datetime.now()
-        if not self.access_token or self.access_token_expires < current_time:
-            self.login()
+        if not access_token or deadline <= monotonic():
+            access_token, headers = self._refresh_token(access_token)
 
-        response = self._method_caller(method, url)
+        response = method(url, headers=headers)
 
         if self.is_unauthorized_response(response):
-            self.login()
-            response = self._method_caller(method, url)
+            access_token, headers = self._refresh_token(access_token)
+            response = method(url, headers=headers)
 
         return response
 
@@ -72,7 +148,8 @@ class Auth(ApiClient):
         if response.status_code == interface.SUCCESS:
             return response.json()
 
-        message_raiser('Login failed. {error_message}', error_message=get_error_message(response))
+        message_raiser('Login failed. {error_message}', error_message=get_error_message(response),
+                       response=response)
 
     def login(self):
         """
@@ -83,23 +160,92 @@ class Auth(ApiClient):
         :raises: requests.RequestException
 
         """
-        access_token = self.get_access_token()
-        self.access_token = access_token['access_token']
-        self.access_token_expires = datetime.datetime.now() + datetime.timedelta(seconds=access_token['expires_in'])
-        return self.access_token
+        with self._token_lock:
+            access_token = self.get_access_token()
+            expires_in = access_token['expires_in']
+            self._set_token_state(access_token['access_token'],
+                                  datetime.datetime.now() + datetime.timedelta(seconds=expires_in), expires_in)
+            return self.access_token
 
     def logout(self):
         """
         Performs a logout when logged in and deletes the stored access token.
+        Stops the background token refresher, if running.
 
         :raises: requests.RequestException
 
         """
 
-        if self.access_token is not None:
-            headers = {'Authorization': 'Bearer ' + self.access_token}
-            response = self.post_path(interface.ApiPath.LOGOUT.value, headers=headers)
+        self.stop_token_refresher()
+
+        access_token = self.access_token
+        if access_token is not None:
+            response = self.post_path(interface.ApiPath.LOGOUT.value, headers=bearer_headers(access_token))
             if response.status_code != interface.SUCCESS:
                 message_raiser('Logout failed. {error_message}', error_message=get_error_message(response))
 
-            self.access_token = None
+            with self._token_lock:
+                self.access_token = None
+
+    def start_token_refresher(self, margin=interface.DEFAULT_TOKEN_REFRESH_MARGIN):
+        """
+        Starts a daemon thread that logs in right away and then renews the
+        access token `margin` seconds before it expires, so that requests never
+        wait for a login. Failed renewals are retried every
+        ``TOKEN_REFRESH_RETRY_INTERVAL`` seconds and stored in
+        ``last_refresh_error``; a login rejected with a 4xx status other than
+        429 (e.g. bad credentials) stops the refresher.
+
+        :param margin: Seconds before expiry at which the token is renewed.
+        :type margin: float
+
+        """
+
+        with self._token_lock:
+            if self._token_refresher is not None:
+                return
+            self._token_refresher_stop.clear()
+            self._token_refresher = threading.Thread(target=self._run_token_refresher, args=(margin,),
+                                                     name='blockex-token-refresher')
+            self._token_refresher.daemon = True
+            self._token_refresher.start()
+
+    def stop_token_refresher(self):
+        """Stops the background token refresher started by :meth:`start_token_refresher`."""
+
+        with self._token_lock:
+            refresher, self._token_refresher = self._token_refresher, None
+        if refresher is not None:
+            self._token_refresher_stop.set()
+            if refresher is not threading.current_thread():
+                refresher.join()
+
+    def _run_token_refresher(self, margin):
+        while not self._token_refresher_stop.is_set():
+            access_token, _, deadline = self._token_state
+
+            delay = deadline - margin - monotonic() if access_token else 0
+            if delay > 0:
+                self._token_refresher_stop.wait(delay)
+                continue
+
+            try:
+                self._refresh_token(access_token)
+            except Exception as error:  # pylint: disable=broad-except
+                self.last_refresh_error = error
+                if not is_retryable_error(error):
+                    with self._token_lock:
+                        if self._token_refresher is threading.current_thread():
+                            self._token_refresher = None
+                    return
+            else:
+                self.last_refresh_error = None
+                if self._token_state[2] - margin > monotonic():
+                    continue
+            # Failed, or the token lives shorter than the margin: don't spin
+            self._token_refresher_stop.wait(interface.TOKEN_REFRESH_RETRY_INTERVAL)
+
+    def close(self):
+        """Stops the background token refresher and closes the pooled connections."""
+        self.stop_token_refresher()
+        ApiClient.close(self)
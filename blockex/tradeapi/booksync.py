@@ -0,0 +1,120 @@
+"""Order book kept in sync from a REST snapshot and streamed updates
+
+Requires Python 3.5.3+. :class:`OrderBookSync` subscribes to the market data
+stream before it asks :meth:`AsyncBlockExTradeApi.get_order_book` for a
+snapshot, so updates arriving while the snapshot is in flight wait in the
+subscription queue. They are applied in arrival order afterwards; the ones
+received before the snapshot was requested are already part of it and are
+skipped.
+
+Stream updates carry the full state of the orders they mention, so applying
+one twice does no harm. They carry no sequence numbers though, so a gap is
+recognised when the subscription had to drop an event or the book ends up
+crossed (best bid at or above best ask). Either one triggers a resync.
+"""
+from blockex.tradeapi import interface
+
+from .helper import monotonic
+from .orderbook import is_resting
+
+
+class OrderBookSync(object):
+    """Local order book of one instrument, updated by a MarketDataStream.
+
+    :param api: Client used for the snapshots.
+    :type api: AsyncBlockExTradeApi
+    :param stream: Stream delivering the updates.
+    :type stream: MarketDataStream
+    :param instrument_id: Instrument ID.
+    :type instrument_id: int
+    :param max_count: Maximum number of orders per side of a snapshot. Optional.
+    :type max_count: int
+    :param queue_size: Size of the update buffer, defaults to the stream's. Optional.
+    :type queue_size: int
+    :param backpressure: Policy of a full update buffer. Dropping keeps the
+        stream flowing for other consumers; the drop is then seen as a gap. Optional.
+    :type backpressure: Backpressure
+    :ivar book: The OrderBook, None before the first snapshot.
+    """
+
+    def __init__(self, api, stream, instrument_id, max_count=interface.MARKET_ORDERS_MAX_COUNT,
+                 queue_size=None, backpressure=interface.Backpressure.DROP_OLDEST):
+        self.api = api
+        self.stream = stream
+        self.instrument_id = instrument_id
+        self.max_count = max_count
+        self.queue_size = queue_size
+        self.backpressure = backpressure
+        self.book = None
+        self.applied = 0
+        self.skipped = 0
+        self.gaps = 0
+        self.resyncs = 0
+        self._subscription = None
+        self._dropped = 0
+        self._snapshot_requested = None
+
+    async def resync(self):
+        """Replaces the book with a new snapshot.
+
+        Updates keep being buffered while the snapshot is fetched.
+
+        :raises: requests.RequestException
+        """
+
+        if self._subscription is None:
+            self._subscription = self.stream.subscribe(self.instrument_id, self.queue_size, self.backpressure)
+        self._dropped = self._subscription.dropped
+        requested = monotonic()
+        self.book = await self.api.get_order_book(self.instrument_id, self.max_count)
+        self._snapshot_requested = requested
+        self.resyncs += 1
+
+    def apply(self, event):
+        """Applies a MarketOrdersEvent to the book.
+
+        :returns: False when the book is inconsistent afterwards and needs a resync.
+        :rtype: bool
+        """
+
+        if event.received < self._snapshot_requested:
+            self.skipped += 1
+            return True
+
+        book = self.book
+        for order in event.orders:
+            if is_resting(order):
+                book.add(order)
+            else:
+                book.remove(order['orderID'])
+        self.applied += 1
+
+        bid, ask = book.best_bid(), book.best_ask()
+        return bid is None or ask is None or bid.price < ask.price
+
+    async def run(self):
+        """Takes a snapshot and applies updates until the subscription is closed.
+
+        :raises: requests.RequestException when a snapshot fails
+        """
+
+        await self.resync()
+        async for event in self._subscription:
+            if self._subscription.dropped != self._dropped or not self.apply(event):
+                self.gaps += 1
+                await self.resync()
+
+    def close(self):
+        """Unsubscribes from the stream, ending run()."""
+        if self._subscription is not None:
+            self.stream.unsubscribe(self._subscription)
+
+    def stats(self):
+        """Returns applied, skipped, gaps and resyncs counts.
+
+        :rtype: dict
+        """
+        return {'applied': self.applied,
+                'skipped': self.skipped,
+                'gaps': self.gaps,
+                'resyncs': self.resyncs}
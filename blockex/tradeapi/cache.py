@@ -0,0 +1,186 @@
+"""On-disk columnar trades history cache
+
+:class:`ColumnarTradeStore` is a :class:`~blockex.tradeapi.sync.TradeStore`
+keeping every column of :data:`~blockex.tradeapi.columns.TRADE_COLUMNS` of an
+instrument in its own append-only binary file. Reads map the files into
+memory, so range queries hand out NumPy views of the price and quantity
+columns without copying them. Use it as the store of a
+:class:`~blockex.tradeapi.sync.TradeHistorySync` to keep it current.
+
+Requires numpy (``pip install blockex.trade-sdk[numpy]``).
+"""
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from .columns import TRADE_COLUMNS, _dates, column_dtype, to_columns
+from .decoding import to_decimal
+from .sync import TradeStore
+
+DATE_KEY = 'tradeDate'
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _to_datetime64(date):
+    """A datetime or ISO 8601 string, with or without a UTC offset, as naive UTC datetime64[us]."""
+    # NumPy warns on time zone aware values, so the offset is applied here
+    if isinstance(date, datetime):
+        if date.utcoffset() is not None:
+            date = (date - date.utcoffset()).replace(tzinfo=None)
+        return np.datetime64(date, 'us')
+    return _dates([date])[0]
+
+
+class ColumnarTradeStore(TradeStore):
+    """Trades stored as one binary file per column and instrument.
+
+    Trades are expected to be appended in date order, as TradeHistorySync
+    does; run :meth:`compact` after appending out of order.
+
+    :param directory: Directory holding an instrument-<id> directory per instrument.
+    :type directory: str
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path(self, instrument_id, key=None):
+        """Returns the directory of the instrument, or the file of one of its columns."""
+        path = os.path.join(self.directory, 'instrument-{0}'.format(instrument_id))
+        return path if key is None else os.path.join(path, key + '.bin')
+
+    def _rows(self, instrument_id):
+        # A partial append may leave some columns longer than others
+        rows = None
+        for key, kind in TRADE_COLUMNS:
+            path = self.path(instrument_id, key)
+            size = os.path.getsize(path) // column_dtype(kind).itemsize if os.path.exists(path) else 0
+            rows = size if rows is None else min(rows, size)
+        return rows
+
+    def columns(self, instrument_id):
+        """Maps the columns of the instrument into memory (read-only).
+
+        :returns: dict of arrays keyed like the API trades
+        """
+
+        rows = self._rows(instrument_id)
+        result = {}
+        for key, kind in TRADE_COLUMNS:
+            dtype = column_dtype(kind)
+            if rows:
+                result[key] = np.memmap(self.path(instrument_id, key), dtype=dtype, mode='r', shape=(rows,))
+            else:
+                result[key] = np.empty(0, dtype=dtype)
+        return result
+
+    def query(self, instrument_id, date_from=None, date_to=None):
+        """Trades of the instrument with date_from <= tradeDate < date_to.
+
+        The result slices the memory-mapped columns, no data is copied.
+
+        :param date_from: Start date, UTC unless it has a time zone. Optional.
+        :type date_from: datetime or str
+        :param date_to: End date, exclusive, UTC unless it has a time zone. Optional.
+        :type date_to: datetime or str
+        :returns: dict of arrays keyed like the API trades
+        """
+
+        columns = self.columns(instrument_id)
+        dates = columns[DATE_KEY]
+        start = 0 if date_from is None else np.searchsorted(dates, _to_datetime64(date_from))
+        end = len(dates) if date_to is None else np.searchsorted(dates, _to_datetime64(date_to))
+        return {key: column[start:end] for key, column in columns.items()}
+
+    def last_trade(self, instrument_id):
+        columns = self.columns(instrument_id)
+        if not len(columns[DATE_KEY]):
+            return None
+        return self._trade(columns, -1)
+
+    def append(self, instrument_id, trades):
+        if not trades:
+            return
+        if not os.path.isdir(self.path(instrument_id)):
+            os.makedirs(self.path(instrument_id))
+        self._truncate(instrument_id, self._rows(instrument_id))
+
+        columns = to_columns(trades, TRADE_COLUMNS)
+        for key, _ in TRADE_COLUMNS:
+            with open(self.path(instrument_id, key), 'ab') as stream:
+                stream.write(columns[key].tobytes())
+
+    def read(self, instrument_id):
+        columns = self.columns(instrument_id)
+        for index in range(len(columns[DATE_KEY])):
+            yield self._trade(columns, index)
+
+    @staticmethod
+    def _trade(columns, index):
+        trade = {}
+        for key, kind in TRADE_COLUMNS:
+            value = columns[key][index]
+            if kind == 'number':
+                value = None if np.isnan(value) else to_decimal(float(value))
+            elif kind == 'date':
+                value = None if np.isnat(value) else str(np.datetime_as_string(value, unit='us', timezone='UTC'))
+            else:
+                value = int(value)
+            trade[key] = value
+        return trade
+
+    def _truncate(self, instrument_id, rows):
+        for key, kind in TRADE_COLUMNS:
+            path = self.path(instrument_id, key)
+            size = rows * column_dtype(kind).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, 'r+b') as stream:
+                    stream.truncate(size)
+
+    def invalidate(self, instrument_id, date_from=None):
+        """Drops the cached trades of the instrument, all of them or those from date_from on.
+
+        The next TradeHistorySync.sync() fetches the dropped trades again.
+        """
+
+        if date_from is None:
+            if os.path.isdir(self.path(instrument_id)):
+                shutil.rmtree(self.path(instrument_id))
+            return
+        dates = self.columns(instrument_id)[DATE_KEY]
+        rows = int(np.searchsorted(dates, _to_datetime64(date_from)))
+        del dates
+        self._truncate(instrument_id, rows)
+
+    def compact(self, instrument_id):
+        """Rewrites the columns of the instrument sorted by date, keeping one row per tradeID.
+
+        :returns: The number of rows removed.
+        :rtype: int
+        """
+
+        columns = self.columns(instrument_id)
+        rows = len(columns[DATE_KEY])
+        if not rows:
+            return 0
+
+        # Last occurrence of each trade wins, then a stable sort by date
+        trade_ids = columns['tradeID'][::-1]
+        _, first = np.unique(trade_ids, return_index=True)
+        keep = np.sort(rows - 1 - first)
+        keep = keep[np.argsort(columns[DATE_KEY][keep], kind='stable')]
+
+        for key, _ in TRADE_COLUMNS:
+            path = self.path(instrument_id, key)
+            with open(path + '.tmp', 'wb') as stream:
+                stream.write(np.ascontiguousarray(columns[key][keep]).tobytes())
+        del columns, trade_ids
+        for key, _ in TRADE_COLUMNS:
+            path = self.path(instrument_id, key)
+            _replace(path + '.tmp', path)
+        return rows - len(keep)
@@ -0,0 +1,136 @@
+"""NumPy column output for BlockEx Trade API responses
+
+Orders and trades are decoded into one array per field instead of one dict
+per record: int64 IDs, float64 (or fixed-point int64) prices and quantities,
+int8 codes for status, offerType and type, and datetime64[us] UTC dates.
+Missing IDs and codes become 0, missing numbers NaN (0 in fixed point) and
+missing dates NaT.
+
+Requires numpy (``pip install blockex.trade-sdk[numpy]``).
+"""
+import numpy as np
+
+from blockex.tradeapi import interface
+
+from .decoding import loads
+
+# (JSON key, kind) pairs; kinds are 'id', 'number', 'date', 'code',
+# 'offer_type' and 'order_type'
+ORDER_COLUMNS = (('orderID', 'id'),
+                 ('price', 'number'),
+                 ('initialQuantity', 'number'),
+                 ('quantity', 'number'),
+                 ('dateCreated', 'date'),
+                 ('offerType', 'offer_type'),
+                 ('type', 'order_type'),
+                 ('status', 'code'),
+                 ('instrumentID', 'id'))
+
+TRADE_COLUMNS = (('tradeID', 'id'),
+                 ('price', 'number'),
+                 ('totalPrice', 'number'),
+                 ('quantity', 'number'),
+                 ('tradeDate', 'date'),
+                 ('currencyID', 'id'),
+                 ('quoteCurrencyID', 'id'),
+                 ('instrumentID', 'id'),
+                 ('offerType', 'offer_type'))
+
+# Enum values the API may send instead of the integer codes
+_CODES = {
+    'offer_type': {member.value: code for code, member in interface.OFFER_TYPE_CODES.items()},
+    'order_type': {member.value: code for code, member in interface.ORDER_TYPE_CODES.items()},
+    'code': {},
+}
+
+
+def column_dtype(kind, scale=None):
+    """Returns the NumPy dtype of a column kind."""
+    if kind == 'id':
+        return np.dtype(np.int64)
+    if kind == 'number':
+        return np.dtype(np.float64 if scale is None else np.int64)
+    if kind == 'date':
+        return np.dtype('datetime64[us]')
+    return np.dtype(np.int8)
+
+
+def _has_zone(stamp):
+    return stamp is not None and (stamp[-1:] == 'Z' or (stamp[-3:-2] == ':' and stamp[-6:-5] in ('+', '-')))
+
+
+def _dates(values):
+    """Parses ISO 8601 dates with an optional UTC offset into datetime64[us] UTC."""
+    # The API sends UTC dates ending with +00:00; other offsets take the slow path
+    stamps = [value[:-6] if value is not None and value.endswith('+00:00') else value for value in values]
+    if not any(_has_zone(stamp) for stamp in stamps):
+        return np.array(['NaT' if stamp is None else stamp for stamp in stamps], dtype='datetime64[us]')
+
+    stamps = []
+    offsets = []
+    for value in values:
+        if value is None:
+            stamps.append('NaT')
+            offsets.append(0)
+        elif value.endswith('Z'):
+            stamps.append(value[:-1])
+            offsets.append(0)
+        elif _has_zone(value):
+            sign = -1 if value[-6] == '-' else 1
+            stamps.append(value[:-6])
+            offsets.append(sign * (int(value[-5:-3]) * 60 + int(value[-2:])))
+        else:
+            stamps.append(value)
+            offsets.append(0)
+
+    return np.array(stamps, dtype='datetime64[us]') - np.array(offsets, dtype='timedelta64[m]')
+
+
+def _column(values, kind, scale):
+    if kind == 'id':
+        return np.array([0 if value is None else value for value in values], dtype=np.int64)
+    if kind == 'number':
+        numbers = np.array(values, dtype=np.float64)
+        if scale is None:
+            return numbers
+        return np.rint(np.nan_to_num(numbers) * 10 ** scale).astype(np.int64)
+    if kind == 'date':
+        return _dates(values)
+    codes = _CODES[kind]
+    return np.array([0 if value is None else codes.get(value, value) for value in values], dtype=np.int8)
+
+
+def to_columns(records, columns, scale=None):
+    """
+    Turn parsed records into NumPy columns
+
+    :param records: list of dicts as parsed from the response
+    :param columns: ORDER_COLUMNS, TRADE_COLUMNS or similar (key, kind) pairs
+    :param scale: store prices and quantities as int64 in units of
+        10 ** -scale instead of float64. Optional.
+    :return: dict of arrays keyed like the API response
+    """
+
+    result = {}
+    for key, kind in columns:
+        result[key] = _column([record.get(key) for record in records], kind, scale)
+    return result
+
+
+def decode_columns(content, columns, key=None, scale=None):
+    """
+    Parse a response body into NumPy columns
+
+    :param content: bytes or str
+    :param columns: ORDER_COLUMNS, TRADE_COLUMNS or similar (key, kind) pairs
+    :param key: for object bodies, the key of the list to turn into columns,
+        e.g. 'trades'; the other keys are returned unchanged
+    :param scale: see to_columns()
+    :return: dict of arrays, or the body dict holding them under key
+    """
+
+    body = loads(content)
+    if key is None:
+        return to_columns(body, columns, scale)
+    body[key] = to_columns(body.get(key) or [], columns, scale)
+    return body
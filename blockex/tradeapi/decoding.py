@@ -0,0 +1,268 @@
+"""JSON decoding of BlockEx Trade API responses
+
+Bodies are parsed in a single pass of the standard library parser: the JSON
+floats of price, quantity and balance fields are read straight into
+:class:`decimal.Decimal`, so they keep every digit, other floats stay floats,
+and known numeric fields are cast to ``int`` or Decimal as each object is
+built, so there is no second walk over the records. Numbers sent as
+strings, like the API does, are exact as well.
+"""
+import decimal
+import json
+from decimal import Decimal
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
+INT_FIELDS = frozenset(['orderID', 'tradeID'])
+DECIMAL_FIELDS = frozenset(['price', 'initialQuantity', 'quantity', 'totalPrice', 'minOrderAmount',
+                            'realBalance', 'availableBalance', 'avgBuyPrice', 'totalPortfolioValue'])
+_INT_KEYS = tuple(INT_FIELDS)
+_DECIMAL_KEYS = tuple(DECIMAL_FIELDS)
+# Cast of every numeric field, by key
+_CASTS = dict([(key, Decimal) for key in DECIMAL_FIELDS] + [(key, int) for key in INT_FIELDS])
+
+
+def to_decimal(value, context=None):
+    """
+    Cast a JSON number or numeric string to Decimal without float artifacts.
+    Decimals are returned unchanged.
+
+    :param value: str, int, float or Decimal
+    :return: Decimal
+    """
+
+    if isinstance(value, decimal.Decimal):
+        return value
+    context = context or decimal.getcontext()
+    if isinstance(value, float):
+        value = repr(value)
+    return context.create_decimal(value)
+
+
+def _restore_list(items):
+    """Turns the Decimal floats of a list, and of the lists nested in it, back
+    into floats and returns how many it held. Objects are left alone, their
+    hook already handled them."""
+    found = 0
+    for index, item in enumerate(items):
+        if type(item) is Decimal:
+            found += 1
+            items[index] = float(item)
+        elif type(item) is list:
+            found += _restore_list(item)
+    return found
+
+
+def _restore_floats(obj, pending):
+    """Turns the Decimal floats of an object back into floats, except in
+    DECIMAL_FIELDS, and returns how many of the pending floats are left."""
+    for key, value in obj.items():
+        if type(value) is Decimal:
+            pending -= 1
+            if key not in DECIMAL_FIELDS:
+                obj[key] = float(value)
+        elif type(value) is list:
+            pending -= _restore_list(value)
+    return pending
+
+
+def _exact_loads(content, convert):
+    # Floats are parsed into Decimal. With convert, each object casts its
+    # numeric fields and turns its other floats back into floats as it is
+    # built. Without, the floats are counted, so bodies with numbers sent as
+    # strings, like the API's, never walk the objects for them.
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    if convert:
+        # Prices and quantities repeat a lot within a body; Decimals are
+        # immutable, so equal strings share one instance
+        decimals = {}
+        get_cast = _CASTS.get
+        get_decimal = decimals.get
+
+        def convert_hook(obj):
+            for key, value in obj.items():
+                cast = get_cast(key)
+                if cast is Decimal:
+                    if type(value) is str:
+                        number = get_decimal(value)
+                        if number is None:
+                            number = decimals[value] = Decimal(value)
+                        obj[key] = number
+                    elif value is not None and type(value) is not Decimal:
+                        obj[key] = Decimal(value)
+                elif cast is not None:
+                    if value is not None:
+                        obj[key] = int(value)
+                elif type(value) is Decimal:
+                    obj[key] = float(value)
+                elif type(value) is list:
+                    _restore_list(value)
+            return obj
+
+        body = json.loads(content, parse_float=Decimal, object_hook=convert_hook)
+    else:
+        floats = [0]
+
+        def parse_float(text):
+            floats[0] += 1
+            return Decimal(text)
+
+        def restore_hook(obj):
+            if floats[0]:
+                floats[0] = _restore_floats(obj, floats[0])
+            return obj
+
+        body = json.loads(content, parse_float=parse_float, object_hook=restore_hook)
+    # Floats outside of any object
+    if type(body) is Decimal:
+        return float(body)
+    if type(body) is list:
+        _restore_list(body)
+    return body
+
+
+def loads(content, exact=False):
+    """
+    Parse a JSON body
+
+    :param content: bytes or str
+    :param exact: parse the floats of DECIMAL_FIELDS as exact Decimal, instead
+        of every float as float
+    :return: dict or list
+    """
+
+    if exact:
+        return _exact_loads(content, False)
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    return json.loads(content)
+
+
+def _convert_object(obj):
+    """Casts the known numeric fields of one parsed object in place."""
+    for key in _DECIMAL_KEYS:
+        if key in obj:
+            value = obj[key]
+            if value is not None and type(value) is not Decimal:
+                obj[key] = Decimal(repr(value) if type(value) is float else value)
+    for key in _INT_KEYS:
+        if key in obj:
+            value = obj[key]
+            if value is not None:
+                obj[key] = int(value)
+    return obj
+
+
+def decode_records(content):
+    """
+    Parse an orders, trades, instruments or trader info body, casting
+    orderID/tradeID to int and prices, quantities and balances to Decimal
+    as each object is parsed
+
+    :param content: bytes or str
+    :return: dict or list
+    """
+
+    return _exact_loads(content, True)
+
+
+def convert_records(records):
+    """
+    Cast the numbers of already parsed records in place, like decode_records()
+
+    :param records: dict or list
+    :return: records
+    """
+
+    if isinstance(records, dict):
+        for value in records.values():
+            if isinstance(value, (list, dict)):
+                convert_records(value)
+        _convert_object(records)
+    elif isinstance(records, list):
+        for item in records:
+            if isinstance(item, (list, dict)):
+                convert_records(item)
+    return records
+
+
+class LazyRecord(Mapping):
+    """Read-only view of a parsed JSON object converting fields on first access.
+
+    orderID/tradeID and the price, quantity and balance fields are cast like
+    :func:`decode_records` does, but only when read, and the result is
+    memoized. Nested objects and lists of objects come back as LazyRecords.
+
+    :param raw: The parsed JSON object.
+    :type raw: dict
+    """
+
+    __slots__ = ('_raw', '_converted')
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._converted = None
+
+    def __getitem__(self, key):
+        converted = self._converted
+        if converted is not None and key in converted:
+            return converted[key]
+
+        value = self._raw[key]
+        if value is None:
+            return value
+        if key in DECIMAL_FIELDS:
+            value = to_decimal(value)
+        elif key in INT_FIELDS:
+            value = int(value)
+        elif isinstance(value, dict):
+            value = LazyRecord(value)
+        elif isinstance(value, list):
+            value = [LazyRecord(item) if isinstance(item, dict) else item for item in value]
+        else:
+            return value
+
+        if converted is None:
+            converted = self._converted = {}
+        converted[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __repr__(self):
+        return 'LazyRecord({0!r})'.format(self._raw)
+
+    def as_dict(self):
+        """Returns a plain dict with every field converted, like decode_records()."""
+        result = {}
+        for key in self._raw:
+            value = self[key]
+            if isinstance(value, LazyRecord):
+                value = value.as_dict()
+            elif isinstance(value, list):
+                value = [item.as_dict() if isinstance(item, LazyRecord) else item for item in value]
+            result[key] = value
+        return result
+
+
+def decode_lazy(content):
+    """
+    Parse a response body into LazyRecords, deferring the numeric casts of
+    decode_records() to the first access of each field
+
+    :param content: bytes or str
+    :return: LazyRecord, or list of LazyRecords for list bodies
+    """
+
+    body = loads(content, exact=True)
+    if isinstance(body, list):
+        return [LazyRecord(item) if isinstance(item, dict) else item for item in body]
+    return LazyRecord(body)
@@ -0,0 +1,132 @@
+"""Aggregated price-level (L2) depth from market orders
+
+:class:`DepthBook` aggregates a market orders snapshot into total quantity
+per price on each side with NumPy, and answers cumulative depth and the
+cost of filling a quantity. When a new snapshot arrives only the orders
+that changed are applied to the levels.
+
+Quantities are float64. Requires numpy (``pip install blockex.trade-sdk[numpy]``).
+"""
+import numpy as np
+
+from blockex.tradeapi import interface
+
+from .columns import ORDER_COLUMNS, to_columns
+
+# Levels whose quantity drops below this are removed
+QUANTITY_EPSILON = 1e-9
+
+# offerType codes of the as_arrays columns
+_CODES = {member: code for code, member in interface.OFFER_TYPE_CODES.items()}
+_BID = _CODES[interface.OfferType.BID]
+_ASK = _CODES[interface.OfferType.ASK]
+
+
+def _snapshot(orders):
+    """Returns orderID, price, quantity and offerType columns of orders sorted by orderID."""
+    if not isinstance(orders, dict):
+        orders = to_columns(orders, ORDER_COLUMNS)
+    order = np.argsort(orders['orderID'], kind='stable')
+    return {key: np.asarray(orders[key])[order] for key in ('orderID', 'price', 'quantity', 'offerType')}
+
+
+class DepthBook(object):
+    """Price levels of both sides of an instrument.
+
+    :param orders: Market orders snapshot, as get_market_orders() dicts or
+        its as_arrays=True columns. Optional.
+    """
+
+    def __init__(self, orders=None):
+        # Ascending prices and their total quantities per side
+        self._prices = {_BID: np.empty(0), _ASK: np.empty(0)}
+        self._quantities = {_BID: np.empty(0), _ASK: np.empty(0)}
+        self._orders = _snapshot([])
+        if orders is not None:
+            self.update(orders)
+
+    def _apply(self, side, prices, quantities):
+        """Adds quantity deltas at prices to one side."""
+        if not len(prices):
+            return
+        merged, inverse = np.unique(np.concatenate([self._prices[side], prices]), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate([self._quantities[side], quantities]),
+                             minlength=len(merged))
+        keep = totals > QUANTITY_EPSILON
+        self._prices[side] = merged[keep]
+        self._quantities[side] = totals[keep]
+
+    def update(self, orders):
+        """Replaces the snapshot, applying only added, removed and changed orders.
+
+        :param orders: Market orders snapshot, as dicts or as_arrays=True columns.
+        :returns: The number of orders that changed.
+        :rtype: int
+        """
+
+        old, new = self._orders, _snapshot(orders)
+        positions = np.searchsorted(old['orderID'], new['orderID'])
+        positions = np.minimum(positions, max(len(old['orderID']) - 1, 0))
+        if len(old['orderID']):
+            matched = old['orderID'][positions] == new['orderID']
+            same = matched & (old['price'][positions] == new['price']) \
+                & (old['quantity'][positions] == new['quantity']) & (old['offerType'][positions] == new['offerType'])
+        else:
+            matched = same = np.zeros(len(new['orderID']), dtype=bool)
+
+        # Old state of changed or removed orders is taken out, new state of changed or added orders put in
+        unchanged_old = np.zeros(len(old['orderID']), dtype=bool)
+        unchanged_old[positions[same]] = True
+        removed = ~unchanged_old
+        added = ~same
+
+        for side in (_BID, _ASK):
+            out = removed & (old['offerType'] == side)
+            put = added & (new['offerType'] == side)
+            self._apply(side, np.concatenate([old['price'][out], new['price'][put]]),
+                        np.concatenate([-old['quantity'][out], new['quantity'][put]]))
+
+        self._orders = new
+        return int(removed.sum() + added.sum() - (matched & ~same).sum())
+
+    def levels(self, offer_type):
+        """Returns (prices, quantities) of a side, best level first.
+
+        :param offer_type: Side of the book.
+        :type offer_type: OfferType
+        """
+
+        if offer_type == interface.OfferType.BID:
+            return self._prices[_BID][::-1], self._quantities[_BID][::-1]
+        if offer_type == interface.OfferType.ASK:
+            return self._prices[_ASK], self._quantities[_ASK]
+        raise ValueError('offer_type must be of type OfferType')
+
+    def cumulative(self, offer_type):
+        """Returns (prices, cumulative quantities) of a side, best level first."""
+        prices, quantities = self.levels(offer_type)
+        return prices, np.cumsum(quantities)
+
+    def fill_cost(self, offer_type, quantity):
+        """Cost of taking quantity from one side, walking the levels best first.
+
+        Buying takes from the ASK side, selling from the BID side. quantity may
+        be a Decimal, the result is in floats like the levels.
+
+        :returns: (vwap, filled quantity, total cost); filled is less than quantity
+            when the side is not deep enough, vwap is None when nothing fills.
+        :rtype: tuple
+        """
+
+        quantity = float(quantity)
+        prices, quantities = self.levels(offer_type)
+        cumulative = np.cumsum(quantities)
+        full = int(np.searchsorted(cumulative, quantity))
+        if full >= len(prices):
+            filled = float(cumulative[-1]) if len(cumulative) else 0.0
+            cost = float(np.dot(prices, quantities))
+        else:
+            remainder = quantity - (cumulative[full - 1] if full else 0.0)
+            filled = float(quantity)
+            cost = float(np.dot(prices[:full], quantities[:full]) + remainder * prices[full])
+        return (cost / filled if filled else None), filled, cost
@@ -0,0 +1,161 @@
+"""Request hedging for idempotent BlockEx Trade API reads"""
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from blockex.tradeapi import interface
+
+from .helper import monotonic
+
+
+def is_hedgeable(url_path):
+    """Checks if url_path is an idempotent read that may be sent twice."""
+    return any(url_path.startswith(path.value) for path in interface.HEDGEABLE_PATHS)
+
+
+class LatencyTracker(object):
+    """Sliding window of recent request latencies.
+
+    :param window: Number of latencies kept.
+    :type window: int
+    """
+
+    def __init__(self, window=interface.DEFAULT_HEDGE_WINDOW):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """Adds a latency sample."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, percent):
+        """Returns the given percentile of the window, or None without samples."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percent / 100.0))
+        return latencies[index]
+
+
+class Hedger(object):
+    """Sends a duplicate of a slow request and takes whichever answers first.
+
+    The duplicate is sent once the request has been outstanding longer than the
+    given percentile of recent latencies, clamped to [min_delay, max_delay].
+    The delay counts from when a worker picks the request up, so time spent
+    waiting for a free worker does not trigger a hedge. The losing request is
+    cancelled if it has not started yet; otherwise its response is discarded
+    and its connection goes back to the pool.
+
+    :param percentile: Latency percentile after which a hedge is sent.
+    :type percentile: float
+    :param min_delay: Lower bound of the hedge delay in seconds.
+    :type min_delay: float
+    :param max_delay: Upper bound of the hedge delay in seconds, also used until
+        latencies have been recorded.
+    :type max_delay: float
+    :param max_workers: Threads available for requests and their hedges.
+        Defaults to the connection pool size of the client using the hedger. Optional.
+    :type max_workers: int
+    """
+
+    def __init__(self, percentile=interface.DEFAULT_HEDGE_PERCENTILE,
+                 min_delay=interface.DEFAULT_HEDGE_MIN_DELAY,
+                 max_delay=interface.DEFAULT_HEDGE_MAX_DELAY,
+                 max_workers=None,
+                 window=interface.DEFAULT_HEDGE_WINDOW):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.latencies = LatencyTracker(window)
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def set_pool_size(self, pool_maxsize):
+        """Sizes the worker threads to the connection pool, unless max_workers was given.
+
+        ApiClient calls this with its pool_maxsize.
+        """
+        with self._lock:
+            if self.max_workers is None:
+                self.max_workers = pool_maxsize
+
+    def _submit(self, func, started):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers or interface.DEFAULT_POOL_MAXSIZE)
+            return self._executor.submit(self._timed, func, started)
+
+    def delay(self):
+        """Returns the current hedge delay in seconds."""
+        latency = self.latencies.percentile(self.percentile)
+        if latency is None:
+            return self.max_delay
+        return min(self.max_delay, max(self.min_delay, latency))
+
+    def _timed(self, func, started):
+        started.set()
+        start = monotonic()
+        result = func()
+        self.latencies.record(monotonic() - start)
+        return result
+
+    def call(self, func):
+        """Calls func(), hedging it with a second call when it is slow.
+
+        :returns: The result of whichever call succeeded first.
+        """
+
+        with self._lock:
+            self.requests += 1
+
+        started = threading.Event()
+        primary = self._submit(func, started)
+        # The hedge timer starts once the request is dispatched, not while it waits for a worker
+        started.wait()
+        done, _ = wait([primary], timeout=self.delay())
+        if done:
+            return primary.result()
+
+        hedge = self._submit(func, threading.Event())
+        with self._lock:
+            self.hedges_fired += 1
+
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None or not pending:
+                break
+
+        for future in pending:
+            future.cancel()
+        if winner is None:
+            return primary.result()
+        if winner is hedge:
+            with self._lock:
+                self.hedges_won += 1
+        return winner.result()
+
+    def stats(self):
+        """Returns requests, hedges_fired, hedges_won and the current delay.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {'requests': self.requests,
+                    'hedges_fired': self.hedges_fired,
+                    'hedges_won': self.hedges_won,
+                    'delay': self.delay()}
+
+    def close(self):
+        """Stops the worker threads."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
@@ -1,5 +1,16 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
+# Clock for deadlines, unaffected by wall clock changes (time.time on Python 2)
+monotonic = getattr(time, 'monotonic', time.time)
+
+
+# Outcome of one item of a batch call: either value or error is set
+BatchResult = namedtuple('BatchResult', ['value', 'error'])
+
 
 class DictConditional(dict):
     """Make conditional dict by default 'DictNotNone'
@@ -23,9 +34,13 @@ def head(your_list, default=None):
 
 
 def message_raiser(base_str, *args, **kwargs):
-    """Simple raiser function. For formating and raise requests.RequestException"""
+    """Simple raiser function. For formating and raise requests.RequestException
+
+    A response keyword argument is attached to the exception.
+    """
+    response = kwargs.pop('response', None)
     exception_message = base_str.format(*args, **kwargs)
-    raise requests.RequestException(exception_message)
+    raise requests.RequestException(exception_message, response=response)
 
 
 def get_error_message(response):
@@ -34,3 +49,27 @@ def get_error_message(response):
     message = response_json.get('error') or response_json.get('message')
     message = message if message else ''
     return ' Message: {message}'.format(message=message)
+
+
+def run_concurrently(func, items, max_concurrency):
+    """Calls func(item) for every item using up to max_concurrency threads.
+
+    Exceptions are captured per item instead of aborting the batch.
+
+    :returns: BatchResult for every item, in input order.
+    :rtype: list
+    """
+
+    def call(item):
+        try:
+            return BatchResult(func(item), None)
+        except Exception as error:  # pylint: disable=broad-except
+            return BatchResult(None, error)
+
+    items = list(items)
+    workers = min(max_concurrency, len(items))
+    if workers <= 1:
+        return [call(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(call, items))
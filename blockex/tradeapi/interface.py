@@ -6,10 +6,54 @@ DEFAULT_API_URL = 'https://api.blockex.com/'
 # default BlockEx Markets production API ID
 DEFAULT_API_ID = '7c11fb8e-f744-47ee-aec2-9da5eb83ad84'
 
+# HTTP connection pool
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_ASYNC_POOL_MAXSIZE = 100
+
+# Access token renewal, seconds
+DEFAULT_TOKEN_REFRESH_MARGIN = 60
+TOKEN_REFRESH_RETRY_INTERVAL = 5
+
+# Rate limiting and retries
+DEFAULT_RATE_LIMIT = 10  # requests per second
+RATE_LIMIT_RECOVERY = 0.05  # fraction of the rate regained per successful request
+RATE_LIMIT_MIN_FRACTION = 0.1  # throttling never slows down below this fraction of the rate
+DEFAULT_RETRY_ATTEMPTS = 2  # only when a rate limiter is set
+DEFAULT_RETRY_BACKOFF = 0.1  # seconds
+MAX_RETRY_BACKOFF = 5
+
+# Request hedging
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_HEDGE_MIN_DELAY = 0.01  # seconds
+DEFAULT_HEDGE_MAX_DELAY = 1
+DEFAULT_HEDGE_WINDOW = 200  # latency samples
+
+# Latest price cache, seconds a price is served without asking the API again
+DEFAULT_LATEST_PRICE_MAX_AGE = 1
+
+# Order book snapshots
+MARKET_ORDERS_MAX_COUNT = 1000  # maxCount of each side of an order book snapshot
+
+# Open orders tracking
+OPEN_ORDERS_MAX_COUNT = 1000  # maxCount when refetching the open orders of the trader
+
+# Trades history paging
+TRADES_HISTORY_PAGE_SIZE = 100  # page size used by iter_trades_history
+
+# SignalR market data stream
+TRADING_HUB = 'TradingHub'
+MARKET_ORDERS_REFRESHED = 'MarketOrdersRefreshed'
+DEFAULT_STREAM_QUEUE_SIZE = 100  # events buffered per subscription
+STREAM_CLOSE_TIMEOUT = 5  # seconds to wait for the hub connection thread
+
 # HTTP
 SUCCESS = 200
 BAD_REQUEST = 400
 UNAUTHORIZED = 401
+TOO_MANY_REQUESTS = 429
+SERVICE_UNAVAILABLE = 503
+THROTTLED_STATUS_CODES = (TOO_MANY_REQUESTS, SERVICE_UNAVAILABLE)
 
 
 class OrderType(Enum):
@@ -36,6 +80,18 @@ class OfferType(Enum):
     ASK = 'Ask'
 
 
+# Integer codes the API uses for offerType and type in orders and trades
+OFFER_TYPE_CODES = {1: OfferType.BID, 2: OfferType.ASK}
+ORDER_TYPE_CODES = {1: OrderType.LIMIT, 2: OrderType.MARKET, 3: OrderType.STOP}
+
+
+class Backpressure(Enum):
+    """What a full stream subscription queue does with a new event"""
+    BLOCK = 'block'  # wait for the consumer, holding up the stream
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+
+
 class SortBy(Enum):
     """SortBy types"""
     CURRENCY = "currency"
@@ -59,3 +115,9 @@ class ApiPath(Enum):
     CANCEL_ALL_ORDERS = 'api/orders/cancelall?'
     GET_TRADER_INSTRUMENTS = 'api/orders/traderinstruments'
     GET_PARTNER_INSTRUMENTS = 'api/orders/partnerinstruments?'
+
+
+# Idempotent reads that may be hedged. Never add order placement or cancellation here.
+HEDGEABLE_PATHS = (ApiPath.GET_MARKET_ORDERS,
+                   ApiPath.GET_TRADES_HISTORY,
+                   ApiPath.GET_PARTNER_INSTRUMENTS)
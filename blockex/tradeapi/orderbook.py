@@ -0,0 +1,234 @@
+"""Local order book of an instrument
+
+An :class:`OrderBook` keeps the resting orders of both sides indexed by
+order ID and grouped in price levels. Level prices are kept sorted, so the
+best bid and ask are read in O(1), orders are added or removed in
+O(log levels) plus the list insertion, and depth queries cost O(levels
+asked).
+"""
+import warnings
+from bisect import bisect_left
+
+from blockex.tradeapi import interface
+
+# Order statuses resting in the book
+BOOK_ORDER_STATUSES = [interface.OrderStatus.PLACED, interface.OrderStatus.PARTEXECUTED]
+# The same statuses as they come in responses and records, for a quick check
+_RESTING_STATUSES = frozenset(BOOK_ORDER_STATUSES + [int(status.value) for status in BOOK_ORDER_STATUSES] +
+                              [status.value for status in BOOK_ORDER_STATUSES])
+
+
+class TruncatedOrdersWarning(UserWarning):
+    """A market orders response held max_count orders, so orders beyond it,
+    possibly the best ones, were left out."""
+
+
+def warn_if_truncated(orders, max_count, instrument_id):
+    """Warns with a TruncatedOrdersWarning when a response hit max_count."""
+    if len(orders) >= max_count:
+        warnings.warn('Instrument {0} has at least {1} market orders, the ones beyond were not '
+                      'considered'.format(instrument_id, max_count), TruncatedOrdersWarning, stacklevel=3)
+
+
+def offer_type_of(order):
+    """Returns the OfferType of an order dict or record."""
+    offer_type = order['offerType']
+    if isinstance(offer_type, interface.OfferType):
+        return offer_type
+    if offer_type in interface.OFFER_TYPE_CODES:
+        return interface.OFFER_TYPE_CODES[offer_type]
+    return interface.OfferType(offer_type)
+
+
+def is_resting(order):
+    """Checks if an order dict or record rests in the book: a PLACED or
+    PARTEXECUTED status (or none given) and quantity left."""
+    try:
+        status = order['status']
+    except KeyError:
+        status = None
+    if status is not None and status not in _RESTING_STATUSES:
+        if not isinstance(status, interface.OrderStatus):
+            try:
+                status = interface.OrderStatus(str(status))
+            except ValueError:
+                return False
+        if status not in BOOK_ORDER_STATUSES:
+            return False
+    return bool(order['quantity'])
+
+
+def best_order(orders, offer_type):
+    """Returns the resting order at the best price of one side, the earliest
+    one on a tie, or None when that side has none. A single scan: unlike an
+    OrderBook it reads only the price, status and quantity of each order.
+
+    :param orders: dicts, LazyRecords or Order records, e.g. from get_market_orders()
+    :param offer_type: Side of the book.
+    :type offer_type: OfferType
+    """
+
+    best = best_price = None
+    bid = offer_type == interface.OfferType.BID
+    for order in orders:
+        price = order['price']
+        if best is not None and (price <= best_price if bid else price >= best_price):
+            continue
+        if offer_type_of(order) == offer_type and is_resting(order):
+            best, best_price = order, price
+    return best
+
+
+class PriceLevel(object):
+    """Orders resting at one price.
+
+    :ivar quantity: Total remaining quantity of the level.
+    :ivar orders: Remaining quantity by order ID, in arrival order.
+    """
+
+    __slots__ = ('price', 'quantity', 'orders')
+
+    def __init__(self, price):
+        self.price = price
+        self.quantity = 0
+        self.orders = {}
+
+
+class OrderBook(object):
+    """Bid and ask price levels of one instrument.
+
+    :param instrument_id: Instrument ID.
+    :type instrument_id: int
+    :param orders: Initial orders, e.g. from get_market_orders(). Optional.
+    :type orders: list of dicts
+    :ivar truncated: Set by get_order_book() when a side hit max_count, i.e.
+        the far end of that side may be missing.
+    """
+
+    def __init__(self, instrument_id, orders=()):
+        self.instrument_id = instrument_id
+        self.truncated = False
+        # Ascending level prices, the best bid is the last one, the best ask the first one
+        self._prices = {interface.OfferType.BID: [], interface.OfferType.ASK: []}
+        self._levels = {interface.OfferType.BID: {}, interface.OfferType.ASK: {}}
+        # order ID -> (OfferType, price)
+        self._index = {}
+        for order in orders:
+            self.add(order)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, order_id):
+        return order_id in self._index
+
+    def add(self, order):
+        """Adds an order, replacing any order with the same ID.
+
+        :param order: dict or Order record with orderID, offerType, price and quantity
+        """
+
+        order_id = order['orderID']
+        if order_id in self._index:
+            self.remove(order_id)
+
+        offer_type = offer_type_of(order)
+        price = order['price']
+        quantity = order['quantity']
+        levels = self._levels[offer_type]
+        level = levels.get(price)
+        if level is None:
+            level = levels[price] = PriceLevel(price)
+            prices = self._prices[offer_type]
+            prices.insert(bisect_left(prices, price), price)
+
+        level.orders[order_id] = quantity
+        level.quantity += quantity
+        self._index[order_id] = (offer_type, price)
+
+    def remove(self, order_id):
+        """Removes an order.
+
+        :returns: False when the order was not in the book.
+        :rtype: bool
+        """
+
+        entry = self._index.pop(order_id, None)
+        if entry is None:
+            return False
+
+        offer_type, price = entry
+        levels = self._levels[offer_type]
+        level = levels[price]
+        level.quantity -= level.orders.pop(order_id)
+        if not level.orders:
+            del levels[price]
+            prices = self._prices[offer_type]
+            del prices[bisect_left(prices, price)]
+        return True
+
+    def update_quantity(self, order_id, quantity):
+        """Sets the remaining quantity of an order, removing it at zero.
+
+        :returns: False when the order was not in the book.
+        :rtype: bool
+        """
+
+        entry = self._index.get(order_id)
+        if entry is None:
+            return False
+        if not quantity:
+            return self.remove(order_id)
+
+        level = self._levels[entry[0]][entry[1]]
+        level.quantity += quantity - level.orders[order_id]
+        level.orders[order_id] = quantity
+        return True
+
+    def clear(self):
+        """Removes every order."""
+        for offer_type in self._prices:
+            self._prices[offer_type] = []
+            self._levels[offer_type] = {}
+        self._index = {}
+
+    def best_bid(self):
+        """Returns the highest bid PriceLevel, or None."""
+        prices = self._prices[interface.OfferType.BID]
+        return self._levels[interface.OfferType.BID][prices[-1]] if prices else None
+
+    def best_ask(self):
+        """Returns the lowest ask PriceLevel, or None."""
+        prices = self._prices[interface.OfferType.ASK]
+        return self._levels[interface.OfferType.ASK][prices[0]] if prices else None
+
+    def spread(self):
+        """Returns best ask minus best bid price, or None when a side is empty."""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return ask.price - bid.price
+
+    def levels(self, offer_type, count=None):
+        """Returns the best count PriceLevels of a side, best first (all without count).
+
+        :param offer_type: Side of the book.
+        :type offer_type: OfferType
+        """
+
+        prices = self._prices[offer_type]
+        if offer_type == interface.OfferType.BID:
+            selected = prices[::-1] if count is None else prices[:-count - 1:-1]
+        else:
+            selected = prices if count is None else prices[:count]
+        levels = self._levels[offer_type]
+        return [levels[price] for price in selected]
+
+    def depth(self, count):
+        """Returns the best count levels of both sides as (price, quantity) pairs.
+
+        :returns: dict with 'bids' and 'asks' lists, best level first
+        """
+
+        return {'bids': [(level.price, level.quantity) for level in self.levels(interface.OfferType.BID, count)],
+                'asks': [(level.price, level.quantity) for level in self.levels(interface.OfferType.ASK, count)]}
@@ -0,0 +1,112 @@
+"""Cached latest trade prices"""
+import threading
+
+from blockex.tradeapi import interface
+
+from .helper import monotonic, run_concurrently
+
+
+class LatestPriceService(object):
+    """Latest trade price per instrument, cached for up to max_age seconds.
+
+    Prices pushed by the caller with :meth:`update` or :meth:`on_trade` keep
+    the cache fresh; :class:`~blockex.tradeapi.streaming.MarketDataStream`
+    carries order book updates only, so it does not feed the service. Only
+    instruments whose price is older than max_age fall back to
+    BlockExTradeApi.get_latest_price(), one trades history request each. A
+    fetched price never replaces one pushed while the request was in flight.
+
+    :param api: Client used for the fallback requests.
+    :type api: BlockExTradeApi
+    :param max_age: Seconds a price is served from the cache. Optional.
+    :type max_age: float
+    :param max_concurrency: Maximum number of fallback requests in flight for
+        get_many(). Defaults to the connection pool size. Optional.
+    :type max_concurrency: int
+    """
+
+    def __init__(self, api, max_age=interface.DEFAULT_LATEST_PRICE_MAX_AGE, max_concurrency=None):
+        self.api = api
+        self.max_age = max_age
+        self.max_concurrency = max_concurrency or api.pool_maxsize
+        self.hits = 0
+        self.misses = 0
+        self._prices = {}
+        self._lock = threading.Lock()
+
+    def update(self, instrument_id, price):
+        """Stores the latest price of the instrument."""
+        with self._lock:
+            self._prices[instrument_id] = (price, monotonic())
+
+    def on_trade(self, trade):
+        """Stores the price of a trade dict (instrumentID, price)."""
+        self.update(trade['instrumentID'], trade['price'])
+
+    def _cached(self, instrument_id):
+        with self._lock:
+            entry = self._prices.get(instrument_id)
+            if entry is not None and monotonic() - entry[1] <= self.max_age:
+                self.hits += 1
+                return True, entry[0]
+            self.misses += 1
+            return False, None
+
+    def _fetch(self, instrument_id):
+        requested = monotonic()
+        price = self.api.get_latest_price(instrument_id)
+        with self._lock:
+            entry = self._prices.get(instrument_id)
+            if entry is not None and entry[1] >= requested:
+                return entry[0]
+            self._prices[instrument_id] = (price, requested)
+        return price
+
+    def get(self, instrument_id):
+        """Returns the latest price of the instrument, or None when it never traded.
+
+        :raises: requests.RequestException
+        """
+        fresh, price = self._cached(instrument_id)
+        return price if fresh else self._fetch(instrument_id)
+
+    def get_many(self, instrument_ids):
+        """Returns the latest prices of several instruments.
+
+        Stale prices are refetched concurrently.
+
+        :returns: Price by instrument ID.
+        :rtype: dict
+        :raises: requests.RequestException
+        """
+
+        prices = {}
+        stale = []
+        for instrument_id in instrument_ids:
+            fresh, price = self._cached(instrument_id)
+            if fresh:
+                prices[instrument_id] = price
+            else:
+                stale.append(instrument_id)
+
+        for instrument_id, result in zip(stale, run_concurrently(self._fetch, stale, self.max_concurrency)):
+            if result.error is not None:
+                raise result.error
+            prices[instrument_id] = result.value
+        return prices
+
+    def invalidate(self, instrument_id=None):
+        """Forgets the price of an instrument, or of all instruments."""
+        with self._lock:
+            if instrument_id is None:
+                self._prices.clear()
+            else:
+                self._prices.pop(instrument_id, None)
+
+    def stats(self):
+        """Returns cache hits and misses.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
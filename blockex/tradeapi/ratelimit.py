@@ -0,0 +1,190 @@
+"""Client-side rate limiting for the BlockEx Trade API"""
+import email.utils
+import random
+import threading
+import time
+
+from blockex.tradeapi import interface
+
+from .helper import monotonic
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header, given either in seconds or as an HTTP date
+
+    :param value: header value or None
+    :return: seconds to wait, or None
+    """
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+
+def backoff_delay(attempt, base=interface.DEFAULT_RETRY_BACKOFF, cap=interface.MAX_RETRY_BACKOFF):
+    """
+    Jittered exponential backoff ("full jitter") for the given retry attempt
+
+    :param attempt: 0 for the first retry
+    :return: seconds to wait
+    """
+
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_attempts_for(retry_attempts, rate_limiter):
+    """
+    Number of retries for throttled GETs: only clients given a rate limiter
+    retry by default, so plain clients keep failing fast
+
+    :param retry_attempts: explicit number of retries or None
+    :param rate_limiter: the client's rate limiter or None
+    :return: number of retries
+    """
+
+    if retry_attempts is not None:
+        return retry_attempts
+    return interface.DEFAULT_RETRY_ATTEMPTS if rate_limiter is not None else 0
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket with additive-increase/multiplicative-decrease.
+
+    Every request reserves a token; when the bucket is empty the caller is told
+    how long to wait for it. Throttling responses halve the rate and pause the
+    bucket, successful ones restore the rate step by step.
+
+    :param rate: Requests per second.
+    :type rate: float
+    :param capacity: Burst size. Defaults to one second worth of requests. Optional.
+    :type capacity: float
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.max_rate = float(rate)
+        self.rate = self.max_rate
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.requests = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.throttled = 0
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token and returns the seconds to wait before using it."""
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = max(-self._tokens / self.rate, self._paused_until - now, 0.0)
+
+            self.requests += 1
+            if delay > 0:
+                self.waited += 1
+                self.wait_seconds += delay
+                self.max_wait_seconds = max(self.max_wait_seconds, delay)
+            return delay
+
+    def on_success(self):
+        """Recovers the rate after a request went through."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * interface.RATE_LIMIT_RECOVERY)
+
+    def on_throttled(self, retry_after=None):
+        """Slows down after a 429/503 response, pausing for retry_after seconds if given."""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.max_rate * interface.RATE_LIMIT_MIN_FRACTION, self.rate / 2)
+            if retry_after:
+                self._paused_until = max(self._paused_until, monotonic() + retry_after)
+
+    def stats(self):
+        """Counters of this bucket, see :meth:`RateLimiter.stats`."""
+        with self._lock:
+            return {'requests': self.requests,
+                    'waited': self.waited,
+                    'wait_seconds': self.wait_seconds,
+                    'max_wait_seconds': self.max_wait_seconds,
+                    'throttled': self.throttled,
+                    'rate': self.rate}
+
+
+class RateLimiter(object):
+    """Per-ApiPath request rate limiter for :class:`ApiClient`.
+
+    :param rate: Default requests per second, shared by paths without their own limit.
+    :type rate: float
+    :param capacity: Default burst size. Optional.
+    :type capacity: float
+    :param path_rates: Own limits for some paths, mapping ApiPath to a rate or a
+        (rate, capacity) tuple. Optional.
+    :type path_rates: dict
+    """
+
+    def __init__(self, rate=interface.DEFAULT_RATE_LIMIT, capacity=None, path_rates=None):
+        self.default_bucket = TokenBucket(rate, capacity)
+        self.buckets = {}
+        for path, limit in (path_rates or {}).items():
+            if not isinstance(path, interface.ApiPath):
+                raise ValueError('path_rates keys must be of type ApiPath')
+            rate_, capacity_ = limit if isinstance(limit, tuple) else (limit, None)
+            self.buckets[path] = TokenBucket(rate_, capacity_)
+        # Longest prefix first, e.g. 'api/orders/get?' must not match 'api/orders/getMarketOrders?'
+        self._prefixes = sorted(((path.value, bucket) for path, bucket in self.buckets.items()),
+                                key=lambda item: len(item[0]), reverse=True)
+
+    def bucket(self, url_path):
+        """Returns the bucket limiting url_path."""
+        for prefix, bucket in self._prefixes:
+            if url_path.startswith(prefix):
+                return bucket
+        return self.default_bucket
+
+    def reserve(self, url_path):
+        """Takes a token for url_path and returns the seconds to wait before sending."""
+        return self.bucket(url_path).reserve()
+
+    def acquire(self, url_path):
+        """Blocks until a request to url_path may be sent."""
+        delay = self.reserve(url_path)
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_response(self, url_path, response):
+        """Feeds a response back into the limiter.
+
+        :returns: Seconds from the Retry-After header of a throttling response, or None.
+        """
+        bucket = self.bucket(url_path)
+        if response.status_code not in interface.THROTTLED_STATUS_CODES:
+            bucket.on_success()
+            return None
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        bucket.on_throttled(retry_after)
+        return retry_after
+
+    def stats(self):
+        """Returns the counters of every bucket.
+
+        :returns: Keyed by ApiPath name, plus 'default' for the shared bucket.
+            Each value holds requests, waited (requests that had to wait),
+            wait_seconds (total time spent waiting), max_wait_seconds,
+            throttled (429/503 responses) and the current rate.
+        :rtype: dict
+        """
+        stats = {path.name: bucket.stats() for path, bucket in self.buckets.items()}
+        stats['default'] = self.default_bucket.stats()
+        return stats
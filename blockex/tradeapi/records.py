@@ -0,0 +1,196 @@
+"""Compact record types for BlockEx Trade API responses
+
+Records keep only the documented fields of an order, trade, instrument or
+currency total in ``__slots__``, with snake_case attributes, int/Decimal
+numbers and the :mod:`interface` enums for status, offer and order type.
+They are built straight from the parsed JSON, so no intermediate dict with
+converted values is created. Item access by the original camelCase key
+(``order['price']``) keeps code written against the dict results working.
+"""
+from blockex.tradeapi import interface
+
+from .decoding import loads, to_decimal
+
+
+def _enum(enum, codes=None):
+    """Returns a converter to enum members, keeping values it does not know."""
+    members = dict(codes or {})
+    for member in enum:
+        members[member.value] = member
+        if member.value.isdigit():
+            members[int(member.value)] = member
+
+    def convert(value):
+        return members.get(value, value)
+    return convert
+
+
+def _shared_decimals():
+    """Returns a to_decimal() that hands out one Decimal per distinct numeric string."""
+    decimals = {}
+
+    def convert(value):
+        # Only strings are memoized: equal Decimals may differ in exponent
+        if type(value) is not str:
+            return to_decimal(value)
+        number = decimals.get(value)
+        if number is None:
+            number = decimals[value] = to_decimal(value)
+        return number
+    return convert
+
+
+_builders = {}
+
+
+def _builder(cls):
+    """Returns a function(data, decimal) building a cls record with one attribute store per field.
+
+    Fields converted with to_decimal use the decimal argument instead, so
+    decode_as() can share equal Decimals across a body.
+    """
+    builder = _builders.get(cls)
+    if builder is not None:
+        return builder
+
+    namespace = {'new': cls.__new__, 'cls': cls}
+    lines = ['def build(data, decimal):', '    record = new(cls)', '    get = data.get']
+    for index, (key, attribute, convert) in enumerate(cls.FIELDS):
+        lines.append('    value = get({0!r})'.format(key))
+        if convert is None:
+            lines.append('    record.{0} = value'.format(attribute))
+            continue
+        name = 'decimal' if convert is to_decimal else 'convert{0}'.format(index)
+        namespace[name] = convert
+        lines.append('    record.{0} = value if value is None else {1}(value)'.format(attribute, name))
+    lines.append('    return record')
+    exec('\n'.join(lines), namespace)
+    builder = _builders[cls] = namespace['build']
+    return builder
+
+
+class Record(object):
+    """Base class of the records.
+
+    FIELDS lists (JSON key, attribute, converter) triples; converters are not
+    applied to missing or null values. ATTRIBUTES maps each JSON key to its
+    attribute for item access.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+    ATTRIBUTES = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a record from a parsed JSON object."""
+        return _builder(cls)(data, to_decimal)
+
+    def as_dict(self):
+        """Returns the record as a dict keyed like the API response."""
+        return {key: getattr(self, attribute) for key, attribute, _ in self.FIELDS}
+
+    def __getitem__(self, key):
+        attribute = self.ATTRIBUTES.get(key)
+        if attribute is None:
+            raise KeyError(key)
+        return getattr(self, attribute)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, attribute) == getattr(other, attribute) for _, attribute, _ in self.FIELDS)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{name}({fields})'.format(
+            name=type(self).__name__,
+            fields=', '.join('{0}={1!r}'.format(attribute, getattr(self, attribute))
+                             for _, attribute, _ in self.FIELDS))
+
+
+class Trade(Record):
+    """A trade, as listed by get_trades_history() and in the trades of an order."""
+
+    FIELDS = (('tradeID', 'trade_id', int),
+              ('price', 'price', to_decimal),
+              ('totalPrice', 'total_price', to_decimal),
+              ('quantity', 'quantity', to_decimal),
+              ('tradeDate', 'trade_date', None),
+              ('currencyID', 'currency_id', int),
+              ('quoteCurrencyID', 'quote_currency_id', int),
+              ('instrumentID', 'instrument_id', int),
+              ('offerType', 'offer_type', _enum(interface.OfferType, interface.OFFER_TYPE_CODES)))
+    __slots__ = tuple(field[1] for field in FIELDS)
+    ATTRIBUTES = dict(field[:2] for field in FIELDS)
+
+
+def _trades(trades):
+    return [Trade.from_dict(trade) for trade in trades]
+
+
+class Order(Record):
+    """An order, as listed by get_orders() and get_market_orders()."""
+
+    FIELDS = (('orderID', 'order_id', int),
+              ('price', 'price', to_decimal),
+              ('initialQuantity', 'initial_quantity', to_decimal),
+              ('quantity', 'quantity', to_decimal),
+              ('dateCreated', 'date_created', None),
+              ('offerType', 'offer_type', _enum(interface.OfferType, interface.OFFER_TYPE_CODES)),
+              ('type', 'order_type', _enum(interface.OrderType, interface.ORDER_TYPE_CODES)),
+              ('status', 'status', _enum(interface.OrderStatus)),
+              ('instrumentID', 'instrument_id', int),
+              ('trades', 'trades', _trades))
+    __slots__ = tuple(field[1] for field in FIELDS)
+    ATTRIBUTES = dict(field[:2] for field in FIELDS)
+
+
+class Instrument(Record):
+    """An instrument, as listed by get_trader_instruments() and get_partner_instruments()."""
+
+    FIELDS = (('id', 'id', int),
+              ('description', 'description', None),
+              ('name', 'name', None),
+              ('baseCurrencyID', 'base_currency_id', int),
+              ('quoteCurrencyID', 'quote_currency_id', int),
+              ('minOrderAmount', 'min_order_amount', to_decimal),
+              ('commissionFeePercent', 'commission_fee_percent', to_decimal))
+    __slots__ = tuple(field[1] for field in FIELDS)
+    ATTRIBUTES = dict(field[:2] for field in FIELDS)
+
+
+class CurrencyTotal(Record):
+    """A balance in the currenciesTotals of get_trader_info()."""
+
+    FIELDS = (('currencyID', 'currency_id', int),
+              ('currency', 'currency', None),
+              ('realBalance', 'real_balance', to_decimal),
+              ('availableBalance', 'available_balance', to_decimal),
+              ('avgBuyPrice', 'avg_buy_price', to_decimal),
+              ('totalPortfolioValue', 'total_portfolio_value', to_decimal))
+    __slots__ = tuple(field[1] for field in FIELDS)
+    ATTRIBUTES = dict(field[:2] for field in FIELDS)
+
+
+def decode_as(content, record_type, key=None):
+    """
+    Parse a response body into records
+
+    :param content: bytes or str
+    :param record_type: Record subclass
+    :param key: for object bodies, the key of the list to turn into records,
+        e.g. 'trades'; the other keys are returned unchanged
+    :return: list of records, or the body dict holding them under key
+    """
+
+    body = loads(content, exact=True)
+    build = _builder(record_type)
+    decimal = _shared_decimals()
+    if key is None:
+        return [build(item, decimal) for item in body]
+    body[key] = [build(item, decimal) for item in body.get(key) or []]
+    return body
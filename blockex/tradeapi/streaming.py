@@ -0,0 +1,493 @@
+"""Streaming market data from the BlockEx TradingHub
+
+Requires Python 3.5.3+ and signalr-client-aio. :class:`MarketDataStream`
+listens to the ``MarketOrdersRefreshed`` event of the SignalR ``TradingHub``,
+decodes the market orders it carries like :meth:`BlockExTradeApi.get_market_orders`
+does and hands them to per-instrument :class:`Subscription` queues.
+
+Queues are bounded. When one is full the subscription's :class:`Backpressure`
+policy decides: BLOCK holds up the stream until the consumer catches up,
+DROP_OLDEST and DROP_NEWEST discard an event and count it. A
+:class:`ConflatingSubscription` never holds more than one event per
+instrument instead: updates the consumer has not picked up yet are merged
+into it.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+
+from blockex.tradeapi import interface
+
+from .decoding import convert_records, loads
+from .helper import monotonic
+from .records import Order
+
+_CLOSED = object()
+
+
+class MarketOrdersEvent(object):
+    """Market orders of one instrument, as pushed by the hub.
+
+    :ivar orders: Order dicts with int/Decimal numbers, or :class:`Order`
+        records for streams created with as_records=True.
+    :ivar received: monotonic() time the message arrived.
+    """
+
+    __slots__ = ('instrument_id', 'orders', 'received')
+
+    def __init__(self, instrument_id, orders, received):
+        self.instrument_id = instrument_id
+        self.orders = orders
+        self.received = received
+
+    def __repr__(self):
+        return 'MarketOrdersEvent(instrument_id={0!r}, orders={1})'.format(self.instrument_id, len(self.orders))
+
+
+def merge_events(older, newer):
+    """
+    Merge two MarketOrdersEvents of an instrument into one holding the latest
+    state of every order mentioned in either
+
+    :return: MarketOrdersEvent with the received time of newer
+    """
+
+    orders = OrderedDict((order['orderID'], order) for order in older.orders)
+    for order in newer.orders:
+        orders.pop(order['orderID'], None)
+        orders[order['orderID']] = order
+    return MarketOrdersEvent(newer.instrument_id, list(orders.values()), newer.received)
+
+
+def decode_market_orders(message, as_records=False):
+    """
+    Decode the arguments of a MarketOrdersRefreshed message into per-instrument
+    market orders. The orders may come as JSON text or parsed, as a list or
+    as an object holding instrumentID and orders.
+
+    :param message: hub message arguments, or a single argument
+    :return: dict of instrument ID to list of orders
+    """
+
+    args = message if isinstance(message, (list, tuple)) and message and \
+        not isinstance(message[0], dict) else [message]
+    by_instrument = {}
+    for arg in args:
+        if isinstance(arg, (bytes, str)):
+            arg = loads(arg, exact=True)
+        if isinstance(arg, dict):
+            instrument_id = arg.get('instrumentID')
+            orders = arg.get('orders') or []
+        else:
+            instrument_id = None
+            orders = arg or []
+        for order in orders:
+            order_instrument = order.get('instrumentID', instrument_id)
+            order_instrument = int(order_instrument) if order_instrument is not None else None
+            by_instrument.setdefault(order_instrument, []).append(order)
+        if not orders and instrument_id is not None:
+            # An instrument without orders left
+            by_instrument.setdefault(int(instrument_id), [])
+
+    for instrument_id, orders in by_instrument.items():
+        by_instrument[instrument_id] = [Order.from_dict(order) for order in orders] if as_records \
+            else convert_records(orders)
+    return by_instrument
+
+
+class Subscription(object):
+    """Bounded queue of market data events of one instrument.
+
+    Iterate it with ``async for`` or call :meth:`get`; use one consumer per
+    subscription.
+
+    :ivar received: Events offered to the queue.
+    :ivar delivered: Events handed to the consumer.
+    :ivar dropped: Events discarded because the queue was full.
+    """
+
+    def __init__(self, instrument_id, queue_size=interface.DEFAULT_STREAM_QUEUE_SIZE,
+                 backpressure=interface.Backpressure.BLOCK):
+        if not isinstance(backpressure, interface.Backpressure):
+            raise ValueError('backpressure must be of type Backpressure')
+        self.instrument_id = instrument_id
+        self.backpressure = backpressure
+        self.closed = False
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._queue = asyncio.Queue(queue_size)
+        # Set whenever the queue may have room, or the subscription closed
+        self._not_full = asyncio.Event()
+
+    async def put(self, event):
+        """Offers an event, applying the backpressure policy when the queue is full.
+
+        :returns: False if the event was dropped or the subscription is closed.
+        :rtype: bool
+        """
+
+        if self.closed:
+            return False
+        self.received += 1
+        if self._queue.full():
+            if self.backpressure == interface.Backpressure.DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.backpressure == interface.Backpressure.DROP_OLDEST:
+                self._queue.get_nowait()
+                self.dropped += 1
+        # BLOCK: wait for the consumer, but never on a closed subscription
+        while self._queue.full():
+            self._not_full.clear()
+            await self._not_full.wait()
+            if self.closed:
+                return False
+        self._queue.put_nowait(event)
+        return True
+
+    async def get(self):
+        """Waits for the next event.
+
+        :returns: The event, or None once the subscription is closed.
+        :rtype: MarketOrdersEvent
+        """
+
+        if self.closed:
+            return None
+        event = await self._queue.get()
+        self._not_full.set()
+        if event is _CLOSED:
+            return None
+        self.delivered += 1
+        return event
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def close(self):
+        """Stops the subscription, discarding queued events and waking the
+        consumer and any producer blocked on a full queue."""
+        if self.closed:
+            return
+        self.closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_CLOSED)
+        self._not_full.set()
+
+    def stats(self):
+        """Returns received, delivered, dropped and queued counts.
+
+        :rtype: dict
+        """
+        return {'received': self.received,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'queued': self._queue.qsize()}
+
+
+class ConflatingSubscription(object):
+    """Latest market orders per instrument, for consumers slower than the stream.
+
+    An event arriving while an earlier one of the same instrument waits is
+    merged into it (see :func:`merge_events`), so the stream is never held up
+    and nothing is dropped, but the consumer sees fewer, larger events. Same
+    interface as :class:`Subscription`.
+
+    :param max_rate: Maximum events handed out per second; events arriving in
+        between are merged. Without it an event is handed out as soon as the
+        consumer asks. Optional.
+    :type max_rate: float
+    :ivar coalesced: Events merged into one already waiting.
+    """
+
+    def __init__(self, instrument_id, max_rate=None):
+        self.instrument_id = instrument_id
+        self.max_rate = max_rate
+        self.closed = False
+        self.received = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self._pending = OrderedDict()
+        self._ready = asyncio.Event()
+        self._next_delivery = 0.0
+
+    async def put(self, event):
+        """Stores an event, merging it into a waiting one of the same instrument.
+
+        :returns: False if the subscription is closed.
+        :rtype: bool
+        """
+
+        if self.closed:
+            return False
+        self.received += 1
+        waiting = self._pending.get(event.instrument_id)
+        if waiting is None:
+            self._pending[event.instrument_id] = event
+        else:
+            self._pending[event.instrument_id] = merge_events(waiting, event)
+            self.coalesced += 1
+        self._ready.set()
+        return True
+
+    async def get(self):
+        """Waits for the next event, no sooner than max_rate allows.
+
+        Instruments are served in the order their first waiting update arrived.
+
+        :returns: The event, or None once the subscription is closed.
+        :rtype: MarketOrdersEvent
+        """
+
+        while not self.closed:
+            if not self._pending:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            delay = self._next_delivery - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, event = self._pending.popitem(last=False)
+            if self.max_rate:
+                self._next_delivery = monotonic() + 1.0 / self.max_rate
+            self.delivered += 1
+            return event
+        return None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def close(self):
+        """Stops the subscription, discarding waiting events and waking the consumer."""
+        self.closed = True
+        self._pending.clear()
+        self._ready.set()
+
+    def stats(self):
+        """Returns received, delivered, coalesced and queued (waiting instruments) counts.
+
+        :rtype: dict
+        """
+        return {'received': self.received,
+                'delivered': self.delivered,
+                'coalesced': self.coalesced,
+                'queued': len(self._pending)}
+
+
+class MarketDataStream(object):
+    """Market orders pushed by the TradingHub, delivered per instrument.
+
+    The hub sends every refresh to every client; subscriptions pick the
+    instruments they receive. Create subscriptions from the event loop that
+    consumes them.
+
+    :param api_url: BlockEx API URL, the hub is at its /signalr path.
+    :type api_url: str
+    :param queue_size: Default queue size of subscriptions. Optional.
+    :type queue_size: int
+    :param backpressure: Default policy of full subscription queues. Optional.
+    :type backpressure: Backpressure
+    :param as_records: Deliver :class:`Order` records instead of dicts. Optional.
+    :type as_records: bool
+    :param session: requests.Session for the SignalR negotiation, e.g. carrying
+        authorization headers. Optional.
+    :ivar error: Exception that ended the hub connection, or None. The
+        subscriptions are closed when the connection ends, and :meth:`close`
+        raises it.
+    """
+
+    def __init__(self, api_url=interface.DEFAULT_API_URL, queue_size=interface.DEFAULT_STREAM_QUEUE_SIZE,
+                 backpressure=interface.Backpressure.BLOCK, as_records=False, session=None):
+        if not isinstance(backpressure, interface.Backpressure):
+            raise ValueError('backpressure must be of type Backpressure')
+        self.api_url = api_url
+        self.queue_size = queue_size
+        self.backpressure = backpressure
+        self.as_records = as_records
+        self.session = session
+        self.messages = 0
+        self.errors = 0
+        self.error = None
+        self._subscriptions = {}
+        self._loop = None
+        self._ws_loop = None
+        self._connection = None
+        self._thread = None
+        self._start_error = None
+
+    def subscribe(self, instrument_id, queue_size=None, backpressure=None, conflate=False, max_rate=None):
+        """Starts delivering the market orders events of an instrument.
+
+        :param instrument_id: Instrument ID, or None for every instrument.
+        :type instrument_id: int
+        :param queue_size: Overrides the stream's queue size. Optional.
+        :type queue_size: int
+        :param backpressure: Overrides the stream's backpressure policy. Optional.
+        :type backpressure: Backpressure
+        :param conflate: Return a ConflatingSubscription, keeping only the latest
+            state per instrument instead of a queue. Optional.
+        :type conflate: bool
+        :param max_rate: Events per second a conflating subscription hands out at most. Optional.
+        :type max_rate: float
+        :rtype: Subscription or ConflatingSubscription
+        """
+
+        if conflate:
+            subscription = ConflatingSubscription(instrument_id, max_rate)
+        else:
+            subscription = Subscription(instrument_id, queue_size or self.queue_size,
+                                        backpressure or self.backpressure)
+        self._subscriptions.setdefault(instrument_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Closes a subscription and stops delivering to it."""
+        subscription.close()
+        subscriptions = self._subscriptions.get(subscription.instrument_id, [])
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+
+    async def dispatch(self, message):
+        """Decodes a MarketOrdersRefreshed message and offers it to the subscriptions.
+
+        Messages that fail to decode are counted in errors and skipped.
+
+        :param message: The hub message arguments.
+        :returns: Number of events queued.
+        :rtype: int
+        """
+
+        received = monotonic()
+        self.messages += 1
+        try:
+            by_instrument = decode_market_orders(message, self.as_records)
+        except (ValueError, TypeError, KeyError, AttributeError, ArithmeticError):
+            self.errors += 1
+            return 0
+
+        queued = 0
+        for instrument_id, orders in by_instrument.items():
+            event = MarketOrdersEvent(instrument_id, orders, received)
+            subscriptions = self._subscriptions.get(None, [])
+            if instrument_id is not None:
+                subscriptions = self._subscriptions.get(instrument_id, []) + subscriptions
+            for subscription in subscriptions:
+                queued += await subscription.put(event)
+        return queued
+
+    async def _on_hub_message(self, message):
+        # Called on the connection's own loop; awaiting the delivery keeps the
+        # connection from reading further while a BLOCK subscription is full.
+        future = asyncio.run_coroutine_threadsafe(self.dispatch(message), self._loop)
+        await asyncio.wrap_future(future)
+
+    def start(self, loop=None):
+        """Connects to the hub in a background thread running its own event loop.
+
+        Events are delivered on loop, by default the current event loop.
+
+        :raises: the error of a previous connection not reported by close() yet,
+            or the error building the connection.
+        """
+
+        from signalr_aio import Connection
+
+        self._raise_error()
+        self._loop = loop or asyncio.get_event_loop()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run_connection, args=(Connection, started),
+                                        name='blockex-market-data')
+        self._thread.daemon = True
+        self._thread.start()
+        started.wait()
+        if self._connection is None:
+            error, self._start_error = self._start_error, None
+            raise error
+
+    def _run_connection(self, connection_class, started):
+        # signalr-client-aio runs on the thread's current event loop, so the
+        # connection is built here, after this thread got a loop of its own.
+        ws_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(ws_loop)
+        try:
+            connection = connection_class(self.api_url.rstrip('/') + '/signalr', session=self.session)
+            hub = connection.register_hub(interface.TRADING_HUB)
+            hub.client.on(interface.MARKET_ORDERS_REFRESHED, self._on_hub_message)
+            self._ws_loop = ws_loop
+            self._connection = connection
+        except Exception as error:  # pylint: disable=broad-except
+            self._start_error = error
+            ws_loop.close()
+            return
+        finally:
+            started.set()
+        try:
+            connection.start()
+        except Exception as error:  # pylint: disable=broad-except
+            self.error = error
+        finally:
+            ws_loop.close()
+            # The stream is dead: end the consumers' async for loops
+            try:
+                self._loop.call_soon_threadsafe(self._close_subscriptions)
+            except RuntimeError:
+                pass  # the consumer loop already ended
+
+    def _close_subscriptions(self):
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close()
+        self._subscriptions = {}
+
+    def _raise_error(self):
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def close(self, timeout=interface.STREAM_CLOSE_TIMEOUT):
+        """Closes every subscription and the hub connection.
+
+        :param timeout: Seconds to wait for the connection thread to end. Optional.
+        :type timeout: float
+        :raises: the error that ended the hub connection, if any.
+        """
+
+        self._close_subscriptions()
+        if self._connection is not None:
+            try:
+                self._ws_loop.call_soon_threadsafe(self._connection.close)
+            except RuntimeError:
+                pass  # the connection loop already ended
+            self._thread.join(timeout)
+        self._connection = None
+        self._ws_loop = None
+        self._thread = None
+        self._raise_error()
+
+    def stats(self):
+        """Returns the messages and errors counts and the stats of every subscription.
+
+        :returns: messages, errors and subscriptions, a list of
+            (instrument ID, :meth:`Subscription.stats`) tuples.
+        :rtype: dict
+        """
+        return {'messages': self.messages,
+                'errors': self.errors,
+                'subscriptions': [(subscription.instrument_id, subscription.stats())
+                                  for subscriptions in self._subscriptions.values()
+                                  for subscription in subscriptions]}
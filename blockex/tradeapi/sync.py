@@ -0,0 +1,159 @@
+"""Incremental trades history sync to a local store
+
+:class:`TradeHistorySync` remembers nothing itself: the high-water mark of
+an instrument is the last trade in its store. Every sync asks the API only
+for trades from that trade's date on, in ascending date order, and appends
+the ones with a higher trade ID (trade IDs are increasing). Repeated syncs
+therefore cost O(new trades), not O(history).
+"""
+import json
+import os
+
+from blockex.tradeapi import interface
+
+from .decoding import decode_records
+
+
+class TradeStore(object):
+    """Append-only per-instrument trade storage interface"""
+
+    def last_trade(self, instrument_id):
+        """Returns the most recently appended trade of the instrument, or None."""
+        raise NotImplementedError
+
+    def append(self, instrument_id, trades):
+        """Appends trades, oldest first."""
+        raise NotImplementedError
+
+    def read(self, instrument_id):
+        """Returns an iterator over the stored trades of the instrument, oldest first."""
+        raise NotImplementedError
+
+
+class MemoryTradeStore(TradeStore):
+    """Keeps the trades in lists. For tests and short-lived jobs."""
+
+    def __init__(self):
+        self.trades = {}
+
+    def last_trade(self, instrument_id):
+        trades = self.trades.get(instrument_id)
+        return trades[-1] if trades else None
+
+    def append(self, instrument_id, trades):
+        self.trades.setdefault(instrument_id, []).extend(trades)
+
+    def read(self, instrument_id):
+        return iter(self.trades.get(instrument_id, []))
+
+
+def _last_line(path, chunk_size=4096):
+    """Reads the last non-empty line of a file without reading the whole file."""
+    with open(path, 'rb') as stream:
+        stream.seek(0, os.SEEK_END)
+        position = stream.tell()
+        data = b''
+        while position > 0:
+            step = min(chunk_size, position)
+            position -= step
+            stream.seek(position)
+            data = stream.read(step) + data
+            lines = data.rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or position == 0:
+                return lines[-1] or None
+    return None
+
+
+class JsonLinesTradeStore(TradeStore):
+    """Stores the trades of every instrument in a JSON lines file.
+
+    Numbers are written as strings, so Decimals read back unchanged.
+
+    :param directory: Directory holding one trades-<instrument_id>.jsonl file per instrument.
+    :type directory: str
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path(self, instrument_id):
+        """Returns the file of the instrument."""
+        return os.path.join(self.directory, 'trades-{0}.jsonl'.format(instrument_id))
+
+    def last_trade(self, instrument_id):
+        path = self.path(instrument_id)
+        if not os.path.exists(path):
+            return None
+        line = _last_line(path)
+        return decode_records(line) if line else None
+
+    def append(self, instrument_id, trades):
+        lines = ''.join(json.dumps(trade, default=str, sort_keys=True) + '\n' for trade in trades)
+        with open(self.path(instrument_id), 'ab') as stream:
+            stream.write(lines.encode('utf-8'))
+
+    def read(self, instrument_id):
+        path = self.path(instrument_id)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as stream:
+            for line in stream:
+                if line.strip():
+                    yield decode_records(line)
+
+
+class TradeHistorySync(object):
+    """Keeps a TradeStore up to date with the trades history of the API.
+
+    :param api: Client whose iter_trades_history() is used.
+    :type api: BlockExTradeApi
+    :param store: Where the trades are appended.
+    :type store: TradeStore
+    :param page_size: Trades per request. Optional.
+    :type page_size: int
+    """
+
+    def __init__(self, api, store, page_size=interface.TRADES_HISTORY_PAGE_SIZE):
+        self.api = api
+        self.store = store
+        self.page_size = page_size
+
+    def sync(self, instrument_id):
+        """Fetches the trades newer than the last stored one and appends them.
+
+        :returns: The number of new trades.
+        :rtype: int
+        """
+
+        last_trade = self.store.last_trade(instrument_id)
+        last_trade_id = last_trade['tradeID'] if last_trade else None
+        date_from = last_trade.get('tradeDate') if last_trade else None
+
+        trades = self.api.iter_trades_history(instrument_id=instrument_id, date_from=date_from,
+                                              sort_by=interface.SortBy.DATE, sort_desc=False,
+                                              page_size=self.page_size)
+        count = 0
+        batch = []
+        for trade in trades:
+            # date_from is inclusive, trades of the last stored date come again
+            if last_trade_id is not None and trade['tradeID'] <= last_trade_id:
+                continue
+            batch.append(trade)
+            if len(batch) >= self.page_size:
+                self.store.append(instrument_id, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.store.append(instrument_id, batch)
+            count += len(batch)
+        return count
+
+    def sync_all(self, instrument_ids):
+        """Syncs every instrument in turn.
+
+        :returns: The number of new trades by instrument ID.
+        :rtype: dict
+        """
+        return {instrument_id: self.sync(instrument_id) for instrument_id in instrument_ids}
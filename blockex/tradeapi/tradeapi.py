@@ -1,13 +1,17 @@
 """BlockEx Trade API client library"""
 
-import decimal
 import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from operator import itemgetter
 
 from blockex.tradeapi import interface
 
 from .auth import Auth
-from .helper import DictConditional, get_error_message, head, message_raiser
+from .decoding import decode_lazy, decode_records, to_decimal
+from .helper import DictConditional, get_error_message, head, message_raiser, run_concurrently
+from .orderbook import BOOK_ORDER_STATUSES, OrderBook, best_order, offer_type_of, warn_if_truncated
+from .records import CurrencyTotal, Instrument, Order, Trade, decode_as
 
 if sys.version_info >= (3, 0):
     from urllib.parse import urlencode  # pragma: no cover
@@ -15,13 +19,33 @@ else:
     from urllib import urlencode  # pragma: no cover
 
 
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"}
+
+OPEN_ORDER_STATUSES = [interface.OrderStatus.PENDING,
+                       interface.OrderStatus.PLACED,
+                       interface.OrderStatus.PARTEXECUTED]
+
+# Trade field each SortBy value sorts the trades history on
+TRADE_SORT_FIELDS = {interface.SortBy.CURRENCY: 'currencyID',
+                     interface.SortBy.DATE: 'tradeDate',
+                     interface.SortBy.PRICE: 'price',
+                     interface.SortBy.QUANTITY: 'quantity',
+                     interface.SortBy.TOTAL: 'totalPrice'}
+
+
 class BlockExTradeApi(Auth):
-    """BlockEx Trade API wrapper"""
+    """BlockEx Trade API wrapper.
+
+    Extra keyword arguments (``pool_maxsize``, ``keep_alive``, ...) are passed
+    through to :class:`ApiClient`.
+    """
 
-    def __init__(self, username, password, api_url=None, api_id=None):
+    def __init__(self, username, password, api_url=None, api_id=None, **kwargs):
         self._open_orders = set()
+        # True while _open_orders holds every open order of the trader
+        self._open_orders_complete = False
 
-        Auth.__init__(self, username, password, api_url, api_id)
+        Auth.__init__(self, username, password, api_url, api_id, **kwargs)
 
     def get_orders(self,
                    instrument_id=None,
@@ -29,7 +53,9 @@ class BlockExTradeApi(Auth):
                    offer_type=None,
                    status=None,
                    load_executions=None,
-                   max_count=None):
+                   max_count=None,
+                   as_records=False,
+                   lazy=False):
         """Gets the orders of the trader with the ability to apply filters.
 
         :param instrument_id: Instrument ID. Use get_trader_instruments()
@@ -46,8 +72,12 @@ class BlockExTradeApi(Auth):
         :type load_executions: boolean
         :param max_count: Maximum number of items returned. Default value is 100. Optional.
         :type max_count: int
+        :param as_records: Return Order records instead of dicts. Optional.
+        :type as_records: bool
+        :param lazy: Return LazyRecords, casting each number on first access. Optional.
+        :type lazy: bool
         :returns: The list of orders.
-        :rtype: list of dicts. Each element has the following data:\n
+        :rtype: list of dicts or Order. Each element has the following data:\n
             orderID (string)\n
             price (float)\n
             initialQuantity (float)\n
@@ -64,26 +94,7 @@ class BlockExTradeApi(Auth):
 
         """
 
-        data = DictConditional()
-        data['instrumentID'] = instrument_id
-        data['loadExecutions'] = load_executions
-        data['maxCount'] = max_count
-
-        if order_type is not None:
-            if not isinstance(order_type, interface.OrderType):
-                raise ValueError('order_type must be of type OrderType')
-            data['orderType'] = order_type.value
-        if offer_type is not None:
-            if not isinstance(offer_type, interface.OfferType):
-                raise ValueError('offer_type must be of type OfferType')
-            data['offerType'] = offer_type.value
-        if status is not None:
-            status_values = []
-            for item in status:
-                assert isinstance(item, interface.OrderStatus)
-                status_values.append(item.value)
-            data['status'] = ','.join(status_values)
-
+        data = orders_filter(instrument_id, order_type, offer_type, status, load_executions, max_count)
         query_string = urlencode(data)
         response = self.make_authorized_request(self.get_path, interface.ApiPath.GET_ORDERS.value + query_string)
 
@@ -91,16 +102,21 @@ class BlockExTradeApi(Auth):
             message_raiser('Failed to get the orders. {error_message}',
                            error_message=get_error_message(response))
 
-        orders = response.json()
-        for order in orders:
-            convert_order_numbers(order)
+        if as_records:
+            return decode_as(response.content, Order)
+        if lazy:
+            return decode_lazy(response.content)
+        orders = decode_records(response.content)
         return orders
 
     def get_market_orders(self, instrument_id,
                           order_type=None,
                           offer_type=None,
                           status=None,
-                          max_count=None):
+                          max_count=None,
+                          as_records=False,
+                          lazy=False,
+                          as_arrays=False):
         """Gets the market orders with the ability to apply filters.
 
         :param instrument_id: Instrument identifier. Use get_trader_instruments()
@@ -114,8 +130,14 @@ class BlockExTradeApi(Auth):
         :type status: list
         :param max_count: Maximum number of items returned. Default value is 100. Optional.
         :type max_count: int
+        :param as_records: Return Order records instead of dicts. Optional.
+        :type as_records: bool
+        :param lazy: Return LazyRecords, casting each number on first access. Optional.
+        :type lazy: bool
+        :param as_arrays: Return a dict of NumPy arrays, one per field. Needs numpy. Optional.
+        :type as_arrays: bool
         :returns: The list of orders.
-        :rtype: list of dicts. Each element has the following data:\n
+        :rtype: list of dicts or Order. Each element has the following data:\n
             orderID (string)\n
             price (float)\n
             initialQuantity (float)\n
@@ -132,58 +154,51 @@ class BlockExTradeApi(Auth):
 
         """
 
-        data = DictConditional(apiID=self.api_id, instrumentID=instrument_id)
-        data['maxCount'] = max_count
-
-        if order_type is not None:
-            if not isinstance(order_type, interface.OrderType):
-                raise ValueError('order_type must be of type OrderType')
-            data['orderType'] = order_type.value
-        if offer_type is not None:
-            if not isinstance(offer_type, interface.OfferType):
-                raise ValueError('offer_type must be of type OfferType')
-            data['offerType'] = offer_type.value
-        if status is not None:
-            status_values = []
-            for item in status:
-                assert isinstance(item, interface.OrderStatus)
-                status_values.append(item.value)
-            data['status'] = ','.join(status_values)
-
+        data = market_orders_filter(self.api_id, instrument_id, order_type, offer_type, status, max_count)
         query_string = urlencode(data)
         response = self.get_path(interface.ApiPath.GET_MARKET_ORDERS.value + query_string)
         if response.status_code != interface.SUCCESS:
             message_raiser('Failed to get the market orders. {error_message}',
                            error_message=get_error_message(response))
 
-        orders = response.json()
-        for order in orders:
-            convert_order_numbers(order)
+        if as_records:
+            return decode_as(response.content, Order)
+        if as_arrays:
+            from .columns import ORDER_COLUMNS, decode_columns
+            return decode_columns(response.content, ORDER_COLUMNS)
+        if lazy:
+            return decode_lazy(response.content)
+        orders = decode_records(response.content)
         return orders
 
     def get_latest_price(self, instrument_id):
         """Gets latest trade price for given instrument.
 
+        Every call is a trades history request; use a
+        :class:`~blockex.tradeapi.prices.LatestPriceService` to poll prices.
+
         :param instrument_id: Instrument identifier. Use get_trader_instruments()
             to retrieve list of available instruments and their IDs. Optional.
         :type instrument_id: int
 
         """
 
-        #TODO: querying full history is a silly way to retrieve latest price
         trades = self.get_trades_history(instrument_id=instrument_id, sort_by=interface.SortBy.DATE,
-                                         sort_desc=True, page_size=1)
+                                         sort_desc=True, page_size=1, lazy=True)
         return head(trades.get('trades'), default={}).get('price')
 
     def get_trades_history(self,
-                         instrument_id=None,
-                         currency_id=None,
-                         date_from=None,
-                         date_to=None,
-                         sort_by=None,
-                         sort_desc=None,
-                         page_size=None,
-                         page_index=None):
+                           instrument_id=None,
+                           currency_id=None,
+                           date_from=None,
+                           date_to=None,
+                           sort_by=None,
+                           sort_desc=None,
+                           page_size=None,
+                           page_index=None,
+                           as_records=False,
+                           lazy=False,
+                           as_arrays=False):
         """Gets trades history for given instrument.
 
         :param instrument_id: Instrument identifier. Use get_trader_instruments()
@@ -204,6 +219,13 @@ class BlockExTradeApi(Auth):
         :type page_size: int
         :param page_index: Index of the page of result set to be returned. Default value is 0. Optional.
         :type page_index: int
+        :param as_records: Return the trades as Trade records instead of dicts. Optional.
+        :type as_records: bool
+        :param lazy: Return LazyRecords, casting each number on first access. Optional.
+        :type lazy: bool
+        :param as_arrays: Return the trades as a dict of NumPy arrays, one per field.
+            Needs numpy. Optional.
+        :type as_arrays: bool
 
         :returns: The dict of Trades, PageSize, PageIndex, PageCount.
         :rtype: list of dicts. Each element has the following data:\n
@@ -214,67 +236,278 @@ class BlockExTradeApi(Auth):
         :raises: requests.RequestException
         """
 
-        data = DictConditional(apiID=self.api_id)
-        data["currencyID"] = currency_id
-        data["instrumentID"] = instrument_id
-        data["dateFrom"] = date_from
-        data["dateTo"] = date_to
-        data["sortDesc"] = sort_desc
-        data["pageSize"] = page_size
-        data["pageIndex"] = page_index
-
-        if sort_by is not None:
-            if not isinstance(sort_by, interface.SortBy):
-                raise ValueError('sort_by must be of type SortBy')
-            data['sortBy'] = sort_by.value
-
-        headers = {"Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"}
-        response = self.post_path(interface.ApiPath.GET_TRADES_HISTORY.value, data=urlencode(data), headers=headers)
+        data = trades_history_filter(self.api_id, instrument_id, currency_id, date_from, date_to,
+                                     sort_by, sort_desc, page_size, page_index)
+        response = self.post_path(interface.ApiPath.GET_TRADES_HISTORY.value, data=urlencode(data),
+                                  headers=FORM_HEADERS)
 
         if response.status_code != interface.SUCCESS:
             message_raiser('Failed to get trades history. {error_message}',
                            error_message=get_error_message(response))
 
-        trades = response.json()
-        for trade in trades.get('trades', {}):
-            convert_trade_numbers(trade)
+        if as_records:
+            return decode_as(response.content, Trade, 'trades')
+        if as_arrays:
+            from .columns import TRADE_COLUMNS, decode_columns
+            return decode_columns(response.content, TRADE_COLUMNS, 'trades')
+        if lazy:
+            return decode_lazy(response.content)
+        trades = decode_records(response.content)
         return trades
 
+    def iter_trades_history(self,
+                            instrument_id=None,
+                            currency_id=None,
+                            date_from=None,
+                            date_to=None,
+                            sort_by=None,
+                            sort_desc=None,
+                            page_size=interface.TRADES_HISTORY_PAGE_SIZE,
+                            prefetch=True):
+        """Iterates over the whole trades history, page by page.
+
+        At most two pages are held at a time: while the trades of page N are
+        yielded, page N+1 is already being fetched in a background thread.
+        The filters are those of get_trades_history().
+
+        :param page_size: Trades per request. Optional.
+        :type page_size: int
+        :param prefetch: Fetch the next page while the current one is consumed.
+            Defaults to True. Optional.
+        :type prefetch: bool
+        :returns: Generator of trades (dicts, see get_trades_history()).
+        :raises: requests.RequestException
+
+        """
+
+        def fetch(page_index):
+            return self.get_trades_history(instrument_id, currency_id, date_from, date_to,
+                                           sort_by, sort_desc, page_size, page_index)
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        page_index = 0
+        future = executor.submit(fetch, page_index)
+        try:
+            while future is not None:
+                body = future.result()
+                page_index = next_page_index(body, page_index, page_size)
+                future = None
+                if page_index is not None and prefetch:
+                    future = executor.submit(fetch, page_index)
+
+                for trade in body.get('trades') or []:
+                    yield trade
+
+                if page_index is not None and not prefetch:
+                    future = executor.submit(fetch, page_index)
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def fetch_trades_history_parallel(self,
+                                      instrument_id=None,
+                                      currency_id=None,
+                                      date_from=None,
+                                      date_to=None,
+                                      sort_by=None,
+                                      sort_desc=None,
+                                      page_size=interface.TRADES_HISTORY_PAGE_SIZE,
+                                      workers=None):
+        """Downloads the whole trades history, fetching pages concurrently.
+
+        The first page tells the page count, the other pages are then fetched
+        by up to workers threads over the connection pool, each request going
+        through the rate limiter. The filters are those of get_trades_history().
+        When the response has neither pageCount nor totalCount, pages are
+        fetched one after the other instead.
+
+        :param page_size: Trades per request. Optional.
+        :type page_size: int
+        :param workers: Maximum number of requests in flight.
+            Defaults to the connection pool size. Optional.
+        :type workers: int
+        :returns: All trades in the requested sort order. Trades seen on two pages,
+            as happens when new trades shift the pages during the download, are
+            returned once.
+        :rtype: list of dicts
+        :raises: requests.RequestException
+
+        """
+
+        def fetch(page_index):
+            return self.get_trades_history(instrument_id, currency_id, date_from, date_to,
+                                           sort_by, sort_desc, page_size, page_index)
+
+        first_page = fetch(0)
+        page_count = trades_history_page_count(first_page, page_size)
+        pages = [first_page.get('trades') or []]
+
+        if page_count is None:
+            page_index = next_page_index(first_page, 0, page_size)
+            while page_index is not None:
+                body = fetch(page_index)
+                pages.append(body.get('trades') or [])
+                page_index = next_page_index(body, page_index, page_size)
+        else:
+            for result in run_concurrently(fetch, range(1, page_count), workers or self.pool_maxsize):
+                if result.error is not None:
+                    raise result.error
+                pages.append(result.value.get('trades') or [])
+
+        return merge_trade_pages(pages, sort_by, sort_desc)
+
     def get_highest_bid_order(self, instrument_id):
         """Gets highest bid price for given instrument.
 
+        The best of up to MARKET_ORDERS_MAX_COUNT PLACED orders with quantity
+        left; a TruncatedOrdersWarning tells when the instrument has more.
+
         :param instrument_id: Instrument identifier. Use get_trader_instruments()
             to retrieve list of available instruments and their IDs. Optional.
         :type instrument_id: int
 
         """
 
-        #TODO: we'll be in trouble once we have more than 1000 orders at once
-        orders = self.get_market_orders(instrument_id, max_count=1000,
+        orders = self.get_market_orders(instrument_id, max_count=interface.MARKET_ORDERS_MAX_COUNT,
                                         status=[interface.OrderStatus.PLACED],
-                                        offer_type=interface.OfferType.BID)
+                                        offer_type=interface.OfferType.BID, lazy=True)
+        warn_if_truncated(orders, interface.MARKET_ORDERS_MAX_COUNT, instrument_id)
 
-        highest_order = max(orders, key=itemgetter('price')) if orders else {}
-        return highest_order
+        highest_order = best_order(orders, interface.OfferType.BID)
+        return highest_order.as_dict() if highest_order is not None else {}
 
     def get_lowest_ask_order(self, instrument_id):
         """Gets lowest ask price for given instrument.
 
+        The best of up to MARKET_ORDERS_MAX_COUNT PLACED orders with quantity
+        left; a TruncatedOrdersWarning tells when the instrument has more.
+
         :param instrument_id: Instrument identifier. Use get_trader_instruments()
             to retrieve list of available instruments and their IDs. Optional.
         :type instrument_id: int
 
         """
 
-        #TODO: we'll be in trouble once we have more than 1000 orders at once
-        orders = self.get_market_orders(instrument_id, max_count=1000,
+        orders = self.get_market_orders(instrument_id, max_count=interface.MARKET_ORDERS_MAX_COUNT,
                                         status=[interface.OrderStatus.PLACED],
-                                        offer_type=interface.OfferType.ASK)
+                                        offer_type=interface.OfferType.ASK, lazy=True)
+        warn_if_truncated(orders, interface.MARKET_ORDERS_MAX_COUNT, instrument_id)
+
+        lowest_order = best_order(orders, interface.OfferType.ASK)
+        return lowest_order.as_dict() if lowest_order is not None else {}
+
+    def get_order_book(self, instrument_id, max_count=interface.MARKET_ORDERS_MAX_COUNT):
+        """Builds an OrderBook of an instrument from a market orders snapshot.
+
+        Bids and asks are fetched concurrently in one request each, so each side
+        holds up to max_count orders; the book's truncated flag tells when a side
+        hit that limit. Query the returned book instead of calling
+        get_highest_bid_order() / get_lowest_ask_order() repeatedly.
+
+        :param instrument_id: Instrument identifier.
+        :type instrument_id: int
+        :param max_count: Maximum number of orders per side. Optional.
+        :type max_count: int
+        :rtype: OrderBook
+        :raises: requests.RequestException
 
-        lowest_order = min(orders, key=itemgetter('price')) if orders else {}
-        return lowest_order
+        """
+
+        def fetch(offer_type):
+            return self.get_market_orders(instrument_id, offer_type=offer_type, status=BOOK_ORDER_STATUSES,
+                                          max_count=max_count)
+
+        book = OrderBook(instrument_id)
+        for result in run_concurrently(fetch, [interface.OfferType.BID, interface.OfferType.ASK], 2):
+            if result.error is not None:
+                raise result.error
+            for order in result.value:
+                book.add(order)
+            book.truncated = book.truncated or len(result.value) >= max_count
+        return book
+
+    def get_top_of_book(self, instrument_ids, max_count=interface.MARKET_ORDERS_MAX_COUNT, max_concurrency=None):
+        """Gets the highest bid and lowest ask order of several instruments at once.
+
+        Each instrument costs one getMarketOrders request holding both sides,
+        and all of them run concurrently. When a response hits max_count one
+        side may have been cut off, so that instrument is asked again with one
+        request per side, and a TruncatedOrdersWarning is issued if a side
+        still hits it. Orders in PLACED and PARTEXECUTED status are considered.
+
+        :param instrument_ids: Instrument identifiers.
+        :type instrument_ids: list of ints
+        :param max_count: Maximum number of orders per request. Optional.
+        :type max_count: int
+        :param max_concurrency: Maximum number of requests in flight.
+            Defaults to the connection pool size. Optional.
+        :type max_concurrency: int
+        :returns: Keyed by instrument ID, in the order given, dicts with the
+            'bid' and 'ask' orders, {} for an empty side.
+        :rtype: OrderedDict
+        :raises: requests.RequestException
+
+        """
+
+        instrument_ids = list(instrument_ids)
+        max_concurrency = max_concurrency or self.pool_maxsize
+
+        def fetch(item):
+            instrument_id, offer_type = item
+            return self.get_market_orders(instrument_id, offer_type=offer_type, status=BOOK_ORDER_STATUSES,
+                                          max_count=max_count, lazy=True)
+
+        tops = {}
+        truncated = []
+        items = [(instrument_id, None) for instrument_id in instrument_ids]
+        for instrument_id, result in zip(instrument_ids, run_concurrently(fetch, items, max_concurrency)):
+            if result.error is not None:
+                raise result.error
+            if len(result.value) >= max_count:
+                truncated.append(instrument_id)
+            else:
+                tops[instrument_id] = top_of_book(result.value)
+
+        items = [(instrument_id, offer_type) for instrument_id in truncated
+                 for offer_type in (interface.OfferType.BID, interface.OfferType.ASK)]
+        for (instrument_id, offer_type), result in zip(items, run_concurrently(fetch, items, max_concurrency)):
+            if result.error is not None:
+                raise result.error
+            warn_if_truncated(result.value, max_count, instrument_id)
+            side = 'bid' if offer_type == interface.OfferType.BID else 'ask'
+            tops.setdefault(instrument_id, {})[side] = top_of_book(result.value)[side]
+
+        return OrderedDict((instrument_id, tops[instrument_id]) for instrument_id in instrument_ids)
+
+    def get_depth(self, instrument_id, depth=None, max_count=interface.MARKET_ORDERS_MAX_COUNT):
+        """Aggregates the market orders of an instrument into price levels.
+
+        Both sides come in one request as NumPy columns. Pass the DepthBook of an
+        earlier call to update it with only the orders that changed since.
+        Needs numpy.
 
-    def create_order(self, offer_type, order_type, instrument_id, price, quantity):
+        :param instrument_id: Instrument identifier.
+        :type instrument_id: int
+        :param depth: DepthBook to update instead of building a new one. Optional.
+        :type depth: DepthBook
+        :param max_count: Maximum number of orders. Optional.
+        :type max_count: int
+        :rtype: DepthBook
+        :raises: requests.RequestException
+
+        """
+
+        from .depth import DepthBook
+
+        orders = self.get_market_orders(instrument_id, status=BOOK_ORDER_STATUSES, max_count=max_count,
+                                        as_arrays=True)
+        if depth is None:
+            return DepthBook(orders)
+        depth.update(orders)
+        return depth
+
+    def create_order(self, offer_type, order_type, instrument_id, price, quantity, reconcile=True):
         """Places an order.
 
         :param offer_type: Offer type.
@@ -288,24 +521,73 @@ class BlockExTradeApi(Auth):
         :type price: float
         :param quantity: Quantity
         :type quantity: float
+        :param reconcile: Refetch all open orders after placing the order (the default).
+            Set to False for the fast path: the new order ID is taken from the create
+            response and only that ID is added to the tracked open orders. When the
+            response has no ID, it is looked up among the open orders of this instrument
+            and type, but only if the tracked open orders were reconciled and no order
+            of unknown ID was placed since. Run reconcile_open_orders() periodically
+            when using the fast path. Optional.
+        :type reconcile: bool
+        :returns: The ID of the new order, or None when it could not be determined
+            (e.g. the order was executed immediately).
+        :rtype: int
         :raises: requests.RequestException
 
         """
 
-        if not isinstance(order_type, interface.OrderType):
-            raise ValueError('order_type must be of type OrderType')
+        data = create_order_data(offer_type, order_type, instrument_id, price, quantity)
+        order_id = self._send_create_order(data)
+
+        if reconcile:
+            self.reconcile_open_orders()
+            return order_id
+
+        if order_id is None and self._open_orders_complete:
+            orders = self.get_orders(instrument_id=instrument_id, order_type=order_type, offer_type=offer_type,
+                                     status=OPEN_ORDER_STATUSES, load_executions=False,
+                                     max_count=interface.OPEN_ORDERS_MAX_COUNT)
+            order_id = newest_unknown_order_id(orders, self._open_orders)
+
+        if order_id is None:
+            self._open_orders_complete = False
+        else:
+            self._open_orders.add(order_id)
+        return order_id
+
+    def create_orders(self, orders, max_concurrency=None, reconcile=True):
+        """Places a batch of orders concurrently.
+
+        Every order is validated before anything is sent, so an invalid
+        OrderType/OfferType raises ValueError without placing any order.
+
+        :param orders: Orders to place, each a dict of create_order() arguments:
+            offer_type, order_type, instrument_id, price and quantity.
+        :type orders: list of dicts
+        :param max_concurrency: Maximum number of requests in flight.
+            Defaults to the connection pool size. Optional.
+        :type max_concurrency: int
+        :param reconcile: Refetch all open orders once, after the whole batch (the default).
+            Set to False to only add the new order IDs to the tracked open orders. Optional.
+        :type reconcile: bool
+        :returns: One BatchResult(value, error) per order, in input order. value is the
+            new order ID (or None when it could not be determined), error is the
+            exception raised for that order.
+        :rtype: list of BatchResult
+        :raises: ValueError, requests.RequestException
 
-        if not isinstance(offer_type, interface.OfferType):
-            raise ValueError('offer_type must be of type OfferType')
+        """
+
+        payloads = [create_order_data(**order) for order in orders]
+        results = run_concurrently(self._send_create_order, payloads, max_concurrency or self.pool_maxsize)
 
-        data = {
-            'offerType': offer_type.value,
-            'orderType': order_type.value,
-            'instrumentID': instrument_id,
-            'price': price,
-            'quantity': quantity
-        }
+        if reconcile:
+            self.reconcile_open_orders()
+        else:
+            track_created_orders(self, results)
+        return results
 
+    def _send_create_order(self, data):
         query_string = urlencode(data)
         response = self.make_authorized_request(self.post_path, interface.ApiPath.CREATE_ORDER.value + query_string)
 
@@ -313,14 +595,26 @@ class BlockExTradeApi(Auth):
             message_raiser('Failed to create an order. {error_message}',
                            error_message=get_error_message(response))
 
-        orders = self.get_orders(status=[interface.OrderStatus.PENDING,
-                                         interface.OrderStatus.PLACED,
-                                         interface.OrderStatus.PARTEXECUTED],
-                                 load_executions=False)
+        return order_id_from_response(response)
+
+    def reconcile_open_orders(self):
+        """Refetches all open orders of the trader and replaces the tracked open order IDs.
+
+        create_order() does this after every order unless called with reconcile=False,
+        in which case this should be scheduled separately.
+
+        :returns: The IDs of the open orders.
+        :rtype: set
+        :raises: requests.RequestException
+
+        """
+
+        orders = self.get_orders(status=OPEN_ORDER_STATUSES, load_executions=False,
+                                 max_count=interface.OPEN_ORDERS_MAX_COUNT)
 
-        # Order by date return last order ID
-        order_set = set(order['orderID'] for order in orders)
-        self._open_orders = order_set
+        self._open_orders = set(order['orderID'] for order in orders)
+        self._open_orders_complete = len(orders) < interface.OPEN_ORDERS_MAX_COUNT
+        return self._open_orders
 
     def cancel_order(self, order_id):
         """Cancels a specific order.
@@ -341,6 +635,23 @@ class BlockExTradeApi(Auth):
 
         self._open_orders.discard(order_id)
 
+    def cancel_orders(self, order_ids, max_concurrency=None):
+        """Cancels a set of orders concurrently.
+
+        :param order_ids: Order identifiers
+        :type order_ids: list of int
+        :param max_concurrency: Maximum number of requests in flight.
+            Defaults to the connection pool size. Optional.
+        :type max_concurrency: int
+        :returns: BatchResult(value, error) for every order ID. error is the
+            exception raised when cancelling that order, value is always None.
+        :rtype: OrderedDict
+
+        """
+
+        order_ids = list(order_ids)
+        results = run_concurrently(self.cancel_order, order_ids, max_concurrency or self.pool_maxsize)
+        return OrderedDict(zip(order_ids, results))
 
     def cancel_all_orders(self, instrument_id):
         """Cancels all the orders of the trader for a specific instrument.
@@ -361,11 +672,13 @@ class BlockExTradeApi(Auth):
             message_raiser('Failed to cancel all orders. {error_message}',
                            error_message=get_error_message(response))
 
-    def get_trader_instruments(self):
+    def get_trader_instruments(self, as_records=False):
         """Gets the available instruments for the trader.
 
+        :param as_records: Return Instrument records instead of dicts. Optional.
+        :type as_records: bool
         :returns: The list of instruments.
-        :rtype: list of dicts. Each element has the following data:\n
+        :rtype: list of dicts or Instrument. Each element has the following data:\n
             id (int)\n
             description (string)\n
             name (string)\n
@@ -383,19 +696,21 @@ class BlockExTradeApi(Auth):
 
         response = self.make_authorized_request(self.get_path, interface.ApiPath.GET_TRADER_INSTRUMENTS.value)
         if response.status_code == interface.SUCCESS:
-            instruments = response.json()
-            for instrument in instruments:
-                convert_instrument_numbers(instrument)
+            if as_records:
+                return decode_as(response.content, Instrument)
+            instruments = decode_records(response.content)
             return instruments
 
         message_raiser('Failed to get the trader instruments. {error_message}',
                        error_message=get_error_message(response))
 
-    def get_partner_instruments(self):
+    def get_partner_instruments(self, as_records=False):
         """Gets the available instruments for the partner.
 
+        :param as_records: Return Instrument records instead of dicts. Optional.
+        :type as_records: bool
         :returns: The list of instruments.
-        :rtype: list of dicts. Each element has the following data:\n
+        :rtype: list of dicts or Instrument. Each element has the following data:\n
             id (int)\n
             description (string)\n
             name (string)\n
@@ -418,14 +733,16 @@ class BlockExTradeApi(Auth):
             message_raiser('Failed to get the partner instruments. {error_message}',
                            error_message=get_error_message(response))
 
-        instruments = response.json()
-        for instrument in instruments:
-            convert_instrument_numbers(instrument)
+        if as_records:
+            return decode_as(response.content, Instrument)
+        instruments = decode_records(response.content)
         return instruments
 
-    def get_trader_info(self):
+    def get_trader_info(self, as_records=False):
         """Get information about the trader.
 
+        :param as_records: Return currenciesTotals as CurrencyTotal records. Optional.
+        :type as_records: bool
         :returns: The list of instruments.
         :rtype: list of dicts. Each element has the following data:\n
             traderID (int)\n
@@ -459,25 +776,254 @@ class BlockExTradeApi(Auth):
 
         response = self.make_authorized_request(self.get_path, interface.ApiPath.GET_TRADER_INFO.value)
         if response.status_code == interface.SUCCESS:
-            info = response.json()
-            for currency in info.get('currenciesTotals', {}):
-                convert_trader_info_numbers(currency)
+            if as_records:
+                return decode_as(response.content, CurrencyTotal, 'currenciesTotals')
+            info = decode_records(response.content)
             return info
 
         message_raiser('Failed to get the trader information. {error_message}',
                        error_message=get_error_message(response))
 
 
+def _add_order_filters(data, order_type, offer_type, status):
+    if order_type is not None:
+        if not isinstance(order_type, interface.OrderType):
+            raise ValueError('order_type must be of type OrderType')
+        data['orderType'] = order_type.value
+    if offer_type is not None:
+        if not isinstance(offer_type, interface.OfferType):
+            raise ValueError('offer_type must be of type OfferType')
+        data['offerType'] = offer_type.value
+    if status is not None:
+        status_values = []
+        for item in status:
+            assert isinstance(item, interface.OrderStatus)
+            status_values.append(item.value)
+        data['status'] = ','.join(status_values)
+    return data
+
+
+def orders_filter(instrument_id=None, order_type=None, offer_type=None, status=None,
+                  load_executions=None, max_count=None):
+    """
+    Validate get_orders() filters and build the request data
+
+    :return: DictConditional
+    """
+
+    data = DictConditional()
+    data['instrumentID'] = instrument_id
+    data['loadExecutions'] = load_executions
+    data['maxCount'] = max_count
+    return _add_order_filters(data, order_type, offer_type, status)
+
+
+def market_orders_filter(api_id, instrument_id, order_type=None, offer_type=None, status=None, max_count=None):
+    """
+    Validate get_market_orders() filters and build the request data
+
+    :return: DictConditional
+    """
+
+    data = DictConditional(apiID=api_id, instrumentID=instrument_id)
+    data['maxCount'] = max_count
+    return _add_order_filters(data, order_type, offer_type, status)
+
+
+def trades_history_filter(api_id, instrument_id=None, currency_id=None, date_from=None, date_to=None,
+                          sort_by=None, sort_desc=None, page_size=None, page_index=None):
+    """
+    Validate get_trades_history() filters and build the request data
+
+    :return: DictConditional
+    """
+
+    data = DictConditional(apiID=api_id)
+    data["currencyID"] = currency_id
+    data["instrumentID"] = instrument_id
+    data["dateFrom"] = date_from
+    data["dateTo"] = date_to
+    data["sortDesc"] = sort_desc
+    data["pageSize"] = page_size
+    data["pageIndex"] = page_index
+
+    if sort_by is not None:
+        if not isinstance(sort_by, interface.SortBy):
+            raise ValueError('sort_by must be of type SortBy')
+        data['sortBy'] = sort_by.value
+    return data
+
+
+def trades_history_page_count(body, page_size):
+    """
+    Number of trades history pages, from pageCount or totalCount of a response
+
+    :param body: decoded get_trades_history() response
+    :return: int, or None when the response tells neither
+    """
+
+    page_count = body.get('pageCount')
+    if page_count is None and body.get('totalCount') is not None:
+        page_count = -(-body['totalCount'] // page_size)
+    return page_count
+
+
+def next_page_index(body, page_index, page_size):
+    """
+    Index of the trades history page after page_index, from the page count of
+    the response, or from a full page when it does not tell the count
+
+    :param body: decoded get_trades_history() response
+    :return: int, or None after the last page
+    """
+
+    page_count = trades_history_page_count(body, page_size)
+    if page_count is not None:
+        return page_index + 1 if page_index + 1 < page_count else None
+    return page_index + 1 if len(body.get('trades') or []) >= page_size else None
+
+
+def merge_trade_pages(pages, sort_by=None, sort_desc=None):
+    """
+    Concatenate trades history pages, dropping repeated trade IDs and
+    restoring the sort order across page boundaries
+
+    :param pages: lists of trades, in page order
+    :param sort_by: SortBy the pages were requested with
+    :return: list of trades
+    """
+
+    seen = set()
+    trades = []
+    for page in pages:
+        for trade in page:
+            if trade['tradeID'] not in seen:
+                seen.add(trade['tradeID'])
+                trades.append(trade)
+
+    if sort_by in TRADE_SORT_FIELDS:
+        trades.sort(key=itemgetter(TRADE_SORT_FIELDS[sort_by]), reverse=bool(sort_desc))
+    return trades
+
+
+def top_of_book(orders):
+    """
+    Pick the highest bid and lowest ask of a market orders response holding
+    both sides
+
+    :param orders: order dicts or LazyRecords
+    :return: dict with the 'bid' and 'ask' orders as dicts, {} for an empty side
+    """
+
+    best = {interface.OfferType.BID: None, interface.OfferType.ASK: None}
+    for order in orders:
+        offer_type = offer_type_of(order)
+        current = best[offer_type]
+        if current is None or (order['price'] > current['price'] if offer_type == interface.OfferType.BID
+                               else order['price'] < current['price']):
+            best[offer_type] = order
+
+    def as_dict(order):
+        if order is None:
+            return {}
+        return order.as_dict() if hasattr(order, 'as_dict') else order
+
+    return {'bid': as_dict(best[interface.OfferType.BID]), 'ask': as_dict(best[interface.OfferType.ASK])}
+
+
+def create_order_data(offer_type, order_type, instrument_id, price, quantity):
+    """
+    Validate create_order() arguments and build the request data
+
+    :return: dict
+    """
+
+    if not isinstance(order_type, interface.OrderType):
+        raise ValueError('order_type must be of type OrderType')
+
+    if not isinstance(offer_type, interface.OfferType):
+        raise ValueError('offer_type must be of type OfferType')
+
+    return {
+        'offerType': offer_type.value,
+        'orderType': order_type.value,
+        'instrumentID': instrument_id,
+        'price': price,
+        'quantity': quantity
+    }
+
+
+def order_id_from_response(response):
+    """
+    Extract the new order ID from a create order response, if the body carries one
+
+    :param response: create order response
+    :return: int or None
+    """
+
+    if not response.content:
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+
+    if isinstance(body, dict):
+        body = body.get('orderID', body.get('id'))
+    # true/false and fractional numbers are not order IDs, even though int() takes them
+    if isinstance(body, bool):
+        return None
+    if isinstance(body, int):
+        return body
+    if isinstance(body, float):
+        return int(body) if body.is_integer() else None
+    if hasattr(body, 'isdigit') and body.isdigit():
+        return int(body)
+    return None
+
+
+def track_created_orders(api, results):
+    """
+    Add the new order IDs of a create_orders() batch to the tracked open orders.
+    An order placed without a known ID leaves the tracked set incomplete.
+
+    :param api: BlockExTradeApi or AsyncBlockExTradeApi
+    :param results: list of BatchResult
+    """
+
+    for result in results:
+        if result.value is not None:
+            api._open_orders.add(result.value)
+        elif result.error is None:
+            api._open_orders_complete = False
+
+
+def newest_unknown_order_id(orders, known_order_ids):
+    """
+    Pick the most recent order ID (IDs are increasing) not in known_order_ids.
+    Only meaningful when known_order_ids holds every other open order, otherwise
+    an older order may be taken for the new one.
+
+    :param orders: list of orders
+    :param known_order_ids: set of order IDs
+    :return: int or None
+    """
+
+    order_ids = [order['orderID'] for order in orders if order['orderID'] not in known_order_ids]
+    return max(order_ids) if order_ids else None
+
+
 def convert_instrument_numbers(instrument):
     """
-    Cast minOrderAmount value to Decimal
+    Cast minOrderAmount value to Decimal. API methods decode responses with
+    decoding.decode_records() instead; the convert_* helpers are kept for
+    already parsed dicts.
 
     :param instrument: dict
     :return: dict
     """
 
-    context = decimal.getcontext()
-    instrument['minOrderAmount'] = context.create_decimal(instrument['minOrderAmount'])
+    instrument['minOrderAmount'] = to_decimal(instrument['minOrderAmount'])
 
 
 def convert_order_numbers(order):
@@ -489,11 +1035,10 @@ def convert_order_numbers(order):
 
     """
 
-    context = decimal.getcontext()
     order['orderID'] = int(order['orderID'])
-    order['initialQuantity'] = context.create_decimal(order['initialQuantity'])
-    order['price'] = context.create_decimal(order['price'])
-    order['quantity'] = context.create_decimal(order['quantity'])
+    order['initialQuantity'] = to_decimal(order['initialQuantity'])
+    order['price'] = to_decimal(order['price'])
+    order['quantity'] = to_decimal(order['quantity'])
 
 
 def convert_trade_numbers(trade):
@@ -505,11 +1050,10 @@ def convert_trade_numbers(trade):
 
     """
 
-    context = decimal.getcontext()
     trade['tradeID'] = int(trade['tradeID'])
-    trade['price'] = context.create_decimal(trade['price'])
-    trade['totalPrice'] = context.create_decimal(trade['totalPrice'])
-    trade['quantity'] = context.create_decimal(trade['quantity'])
+    trade['price'] = to_decimal(trade['price'])
+    trade['totalPrice'] = to_decimal(trade['totalPrice'])
+    trade['quantity'] = to_decimal(trade['quantity'])
 
 
 def convert_trader_info_numbers(currency):
@@ -521,8 +1065,7 @@ def convert_trader_info_numbers(currency):
 
     """
 
-    context = decimal.getcontext()
-    currency['realBalance'] = context.create_decimal(currency['realBalance'])
-    currency['availableBalance'] = context.create_decimal(currency['availableBalance'])
-    currency['avgBuyPrice'] = context.create_decimal(currency['avgBuyPrice'])
-    currency['totalPortfolioValue'] = context.create_decimal(currency['totalPortfolioValue'])
+    currency['realBalance'] = to_decimal(currency['realBalance'])
+    currency['availableBalance'] = to_decimal(currency['availableBalance'])
+    currency['avgBuyPrice'] = to_decimal(currency['avgBuyPrice'])
+    currency['totalPortfolioValue'] = to_decimal(currency['totalPortfolioValue'])
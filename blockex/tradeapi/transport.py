@@ -0,0 +1,182 @@
+"""HTTP transports for the BlockEx Trade API client
+
+A transport sends one request and returns a response object with
+``status_code``, ``headers``, ``content`` and ``json()``. :class:`ApiClient`
+talks to the API only through its transport, chosen at construction.
+"""
+import sys
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from blockex.tradeapi import interface
+
+from .decoding import loads
+
+if sys.version_info >= (3, 0):
+    from urllib.parse import urlencode  # pragma: no cover
+else:
+    from urllib import urlencode  # pragma: no cover
+
+
+class ApiResponse(object):
+    """Minimal response object for clients not backed by :mod:`requests`.
+
+    Mirrors the parts of :class:`requests.Response` the SDK relies on.
+    """
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        """Decodes the response body as JSON."""
+        return loads(self.content)
+
+
+class Transport(object):
+    """Transport interface"""
+
+    def request(self, method, url, **kwargs):
+        """Sends a request.
+
+        :param method: Lower case HTTP method, e.g. 'get'.
+        :type method: str
+        :param url: Absolute URL.
+        :type url: str
+        :param kwargs: headers (dict) and data (dict or urlencoded str). Optional.
+        :returns: The response.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Releases pooled connections."""
+
+
+class RequestsTransport(Transport):
+    """Transport over a pooled :class:`requests.Session`. The default."""
+
+    def __init__(self, pool_connections=interface.DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=interface.DEFAULT_POOL_MAXSIZE,
+                 pool_block=False,
+                 keep_alive=True):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def request(self, method, url, *args, **kwargs):
+        return getattr(self.session, method)(url, *args, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def _encode_body(headers, data):
+    """Returns (headers, body) with data urlencoded the way requests does it."""
+    if data is None:
+        return headers, None
+    if isinstance(data, dict):
+        headers = dict(headers or {})
+        headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+        data = urlencode(data)
+    return headers, data.encode('utf-8')
+
+
+class Urllib3Transport(Transport):
+    """Transport straight on a :class:`urllib3.PoolManager`, skipping the requests layer."""
+
+    def __init__(self, pool_connections=interface.DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=interface.DEFAULT_POOL_MAXSIZE,
+                 pool_block=False,
+                 keep_alive=True):
+        import urllib3
+
+        headers = None if keep_alive else {'Connection': 'close'}
+        self.pool = urllib3.PoolManager(num_pools=pool_connections, maxsize=pool_maxsize,
+                                        block=pool_block, headers=headers, retries=False)
+
+    def request(self, method, url, headers=None, data=None):
+        headers, body = _encode_body(headers, data)
+        response = self.pool.request(method.upper(), url, headers=headers, body=body)
+        return ApiResponse(response.status, response.headers, response.data)
+
+    def close(self):
+        self.pool.clear()
+
+
+class HttpxTransport(Transport):
+    """Transport on an :class:`httpx.Client`, optionally negotiating HTTP/2.
+
+    HTTP/2 needs the ``h2`` package and an https API URL.
+    """
+
+    def __init__(self, pool_connections=interface.DEFAULT_POOL_CONNECTIONS,  # pylint: disable=unused-argument
+                 pool_maxsize=interface.DEFAULT_POOL_MAXSIZE,
+                 pool_block=False,  # pylint: disable=unused-argument
+                 keep_alive=True,
+                 http2=False):
+        import httpx
+
+        limits = httpx.Limits(max_connections=pool_maxsize,
+                              max_keepalive_connections=pool_maxsize if keep_alive else 0)
+        self.client = httpx.Client(limits=limits, http2=http2)
+
+    def request(self, method, url, headers=None, data=None):
+        headers, body = _encode_body(headers, data)
+        response = self.client.request(method.upper(), url, headers=headers, content=body)
+        return ApiResponse(response.status_code, response.headers, response.content)
+
+    def close(self):
+        self.client.close()
+
+
+class FakeTransport(Transport):
+    """In-memory transport for tests and benchmarks.
+
+    :param handler: Called as handler(method, url, kwargs) for every request,
+        returns an (status_code, body bytes) tuple.
+    :type handler: callable
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        status_code, content = self.handler(method, url, kwargs)
+        return ApiResponse(status_code, {}, content)
+
+
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'urllib3': Urllib3Transport,
+    'httpx': HttpxTransport,
+}
+
+
+def make_transport(transport=None, **pool_options):
+    """
+    Build a transport from its name ('requests', 'urllib3', 'httpx' or 'http2'),
+    or return a Transport instance unchanged
+
+    :param pool_options: pool_connections, pool_maxsize, pool_block, keep_alive
+    :return: Transport
+    """
+
+    if isinstance(transport, Transport):
+        return transport
+    if transport == 'http2':
+        return HttpxTransport(http2=True, **pool_options)
+    try:
+        transport_class = TRANSPORTS[transport or 'requests']
+    except KeyError:
+        raise ValueError('transport must be one of {names} or a Transport'.format(
+            names=', '.join(sorted(TRANSPORTS) + ['http2'])))
+    return transport_class(**pool_options)
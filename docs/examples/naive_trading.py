@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+import asyncio
 import os
 import sys
 from decimal import Decimal
@@ -9,7 +10,7 @@ from blockex.tradeapi.tradeapi import BlockExTradeApi
 if sys.version_info < (3, 5, 3):
     sys.exit('Sorry, Python < 3.5.3 is not supported for this example.')
 else:
-    from signalr_aio import Connection
+    from blockex.tradeapi.streaming import MarketDataStream
 
 API_URL = os.environ.get('BLOCKEX_TEST_TRADEAPI_URL')
 API_ID = os.environ.get('BLOCKEX_TEST_TRADEAPI_ID')
@@ -22,9 +23,10 @@ ASK_ORDER_PRICE = Decimal(1)
 ASK_ORDER_QUANTITY = Decimal(0.1)
 
 
-# Create hub message handler
-async def on_message(msg):
-    print(msg)
+# Consume the market orders pushed by the hub
+async def print_market_orders(subscription):
+    async for event in subscription:
+        print(event.instrument_id, event.orders)
 
 
 def _cancell_all_orders(trade_api, instrument_id, offertype):
@@ -84,12 +86,8 @@ def main():
     trade_api = BlockExTradeApi(USERNAME, PASSWORD, API_URL, API_ID)
     _ = trade_api.login() # That's just a example we don't need access_token
 
-    # Setup SignalR connecton
-    connection = Connection(f"{API_URL}/signalr", session=None)
-    hub = connection.register_hub('TradingHub')
-
-    # Set event handlers
-    hub.client.on('MarketOrdersRefreshed', on_message)
+    # Setup the market data stream
+    stream = MarketDataStream(API_URL)
 
     trader_instruments = trade_api.get_trader_instruments()
 
@@ -102,8 +100,11 @@ def main():
     lowest_ask_order(trade_api, instrument_id)
     highest_bid_order(trade_api, instrument_id)
 
-    # Run the event loop
-    connection.start()
+    # Connect to the hub and consume the instrument's market orders
+    loop = asyncio.get_event_loop()
+    subscription = stream.subscribe(instrument_id)
+    stream.start(loop)
+    loop.run_until_complete(print_market_orders(subscription))
 
 if __name__ == "__main__":
     main()
@@ -8,8 +8,12 @@ version = "0.1.0"
 dependency_links = []
 install_requires = ['enum34', 'requests']
 
+if sys.version_info < (3, 2):
+    install_requires.append('futures')
+
 if sys.version_info >= (3, 5, 3):
     install_requires.append('signalr-client-aio')
+    install_requires.append('aiohttp')
 
 setup(
     name='blockex.trade-sdk',
@@ -24,6 +28,8 @@ setup(
     dependency_links=dependency_links,
     extras_require={
         'test': ['pytest', 'pytest-mock', 'arrow'],
+        'httpx': ['httpx[http2]'],
+        'numpy': ['numpy'],
     },
     packages=[d[0].replace("/", ".") for d in os.walk("blockex.tradeapi") if not d[0].endswith("__pycache__")],
     project_urls={
@@ -1,7 +1,13 @@
+from decimal import Decimal
+
 import pytest
 import requests
 
 from blockex.tradeapi import interface, tradeapi
+from blockex.tradeapi.orderbook import OrderBook
+
+# get_latest_price() of FakeApi fails for this instrument
+FIXTURE_UNKNOWN_INSTRUMENT_ID = 99
 
 
 @pytest.fixture
@@ -31,13 +37,102 @@ def trade_api(request, mocker, global_variable):
     request.cls.response = requests.Response()
     request.cls.response.status_code = interface.SUCCESS
 
-    request.cls.post_mock = mocker.Mock(return_value=request.cls.response)
-    requests.post = request.cls.post_mock
-    request.cls.get_mock = mocker.Mock(return_value=request.cls.response)
-    requests.get = request.cls.get_mock
+    request.cls.post_mock = mocker.patch.object(requests.Session, 'post',
+                                                mocker.Mock(return_value=request.cls.response))
+    request.cls.get_mock = mocker.patch.object(requests.Session, 'get',
+                                               mocker.Mock(return_value=request.cls.response))
 
 
 @pytest.fixture()
 def mocker(request, mocker):
     request.cls.mocker = mocker
     return mocker
+
+
+@pytest.fixture()
+def run():
+    """Runs a coroutine to completion on a new event loop."""
+    asyncio = pytest.importorskip('asyncio')
+
+    def run_coroutine(coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    return run_coroutine
+
+
+@pytest.fixture()
+def order():
+    """Factory of market order dicts as the API and the hub send them."""
+    def make_order(order_id, offer_type, price, quantity='1', status=20):
+        return {'orderID': order_id, 'offerType': offer_type, 'price': price, 'quantity': quantity,
+                'status': status, 'instrumentID': 1}
+
+    return make_order
+
+
+class FakeApi(object):
+    """Stands in for BlockExTradeApi (and AsyncBlockExTradeApi.get_order_book),
+    serving canned trades, prices and order book snapshots"""
+
+    pool_maxsize = 4
+
+    def __init__(self, trades=(), stream=None, snapshots=(), during_snapshot=()):
+        self.trades = list(trades)
+        self.stream = stream
+        self.snapshots = list(snapshots)
+        self.during_snapshot = list(during_snapshot)
+        self.calls = []
+
+    def iter_trades_history(self, **kwargs):
+        self.calls.append(kwargs)
+        date_from = kwargs.get('date_from')
+        return iter([trade for trade in self.trades if date_from is None or trade['tradeDate'] >= date_from])
+
+    def get_latest_price(self, instrument_id):
+        self.calls.append(instrument_id)
+        if instrument_id == FIXTURE_UNKNOWN_INSTRUMENT_ID:
+            raise ValueError('unknown instrument')
+        return Decimal(instrument_id)
+
+    def get_order_book(self, instrument_id, max_count):
+        """Returns a future of the next snapshot, resolved once the
+        during_snapshot updates went through the stream, i.e. pushed while the
+        snapshot is in flight."""
+        import asyncio
+
+        self.calls.append(instrument_id)
+        updates = asyncio.gather(*[self.stream.dispatch([message]) for message in self.during_snapshot])
+        self.during_snapshot = []
+        book = OrderBook(instrument_id, [dict(item, price=Decimal(item['price']), quantity=Decimal(item['quantity']))
+                                         for item in self.snapshots.pop(0)])
+
+        snapshot = asyncio.get_event_loop().create_future()
+
+        def resolve(done):
+            if done.exception() is not None:
+                snapshot.set_exception(done.exception())
+            else:
+                snapshot.set_result(book)
+
+        updates.add_done_callback(resolve)
+        return snapshot
+
+
+@pytest.fixture()
+def fake_api():
+    return FakeApi
+
+
+@pytest.fixture()
+def trade():
+    """Factory of decoded trades of instrument 5, one second apart."""
+    def make_trade(trade_id, second, price='1.50'):
+        return {'tradeID': trade_id, 'price': Decimal(price), 'totalPrice': Decimal('3'), 'quantity': Decimal('2'),
+                'tradeDate': '2017-05-14T09:16:{0:02d}'.format(second), 'currencyID': 1,
+                'quoteCurrencyID': 2, 'instrumentID': 5, 'offerType': 1}
+
+    return make_trade
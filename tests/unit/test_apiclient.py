@@ -0,0 +1,41 @@
+import requests
+
+from blockex.tradeapi.apiclient import ApiClient
+
+
+class TestApiClientPool:
+
+    def test_default_pool(self):
+        client = ApiClient(api_url='https://test.api.url/')
+        adapter = client.session.get_adapter('https://test.api.url/')
+
+        assert adapter._pool_maxsize == 10
+        assert client.session.headers['Connection'] == 'keep-alive'
+
+    def test_custom_pool(self):
+        client = ApiClient(api_url='https://test.api.url/', pool_connections=2,
+                           pool_maxsize=32, pool_block=True, keep_alive=False)
+        adapter = client.session.get_adapter('https://test.api.url/')
+
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 32
+        assert adapter._pool_block is True
+        assert client.session.headers['Connection'] == 'close'
+
+    def test_session_is_reused(self, mocker):
+        get_mock = mocker.patch.object(requests.Session, 'get', mocker.Mock())
+        client = ApiClient(api_url='https://test.api.url/')
+
+        client.get_path('first')
+        client.get_path('second')
+
+        assert get_mock.call_count == 2
+        get_mock.assert_called_with('https://test.api.url/second')
+
+    def test_context_manager_closes_session(self, mocker):
+        close_mock = mocker.patch.object(requests.Session, 'close', mocker.Mock())
+
+        with ApiClient(api_url='https://test.api.url/') as client:
+            assert isinstance(client, ApiClient)
+
+        close_mock.assert_called_once_with()
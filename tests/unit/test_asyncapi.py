@@ -0,0 +1,128 @@
+import asyncio
+import json
+from urllib.parse import parse_qsl
+
+import pytest
+from requests import RequestException
+
+from blockex.tradeapi import interface
+from blockex.tradeapi.transport import ApiResponse
+
+asyncapi = pytest.importorskip('blockex.tradeapi.asyncapi')
+
+FIXTURE_API_URL = 'https://test.api.url/'
+FIXTURE_INSTRUMENT_ID = 1
+
+
+@pytest.fixture()
+def async_api(request, mocker):
+    request.cls.responses = {}
+    request.cls.calls = []
+
+    async def fake_request(method, url_path, **kwargs):
+        request.cls.calls.append((method, url_path, kwargs))
+        status_code, body = request.cls.responses.get(url_path.split('?')[0], (interface.SUCCESS, []))
+        return ApiResponse(status_code, {}, json.dumps(body).encode())
+
+    request.cls.api = asyncapi.AsyncBlockExTradeApi('CorrectUsername', 'CorrectPassword',
+                                                    api_url=FIXTURE_API_URL, api_id='CorrectApiID')
+    request.cls.api._send = fake_request
+    request.cls.responses['oauth/token'] = (interface.SUCCESS,
+                                            {'access_token': 'SomeAccessToken', 'expires_in': 86399})
+
+
+@pytest.mark.usefixtures('async_api')
+class TestAsyncTradeApi:
+
+    def test_get_market_orders(self, run):
+        self.responses['api/orders/getMarketOrders'] = (interface.SUCCESS, [
+            {'orderID': '31635', 'price': '5.00', 'initialQuantity': '270.00', 'quantity': '0.00',
+             'offerType': 1, 'type': 1, 'status': 20, 'instrumentID': 1, 'trades': None}])
+
+        orders = run(self.api.get_market_orders(FIXTURE_INSTRUMENT_ID, offer_type=interface.OfferType.BID))
+
+        assert orders[0]['orderID'] == 31635
+        assert str(orders[0]['price']) == '5.00'
+        assert self.calls == [('GET', 'api/orders/getMarketOrders?apiID=CorrectApiID&instrumentID=1&offerType=Bid',
+                               {})]
+
+    def test_get_orders_is_authorized(self, run):
+        run(self.api.get_orders(status=[interface.OrderStatus.PLACED]))
+
+        assert [call[1] for call in self.calls] == ['oauth/token', 'api/orders/get?status=20']
+        assert self.calls[1][2] == {'headers': {'Authorization': 'Bearer SomeAccessToken'}}
+
+    def test_iter_trades_history(self, run):
+        async def fake_request(method, url_path, **kwargs):
+            page_index = int(dict(parse_qsl(kwargs.get('data', ''))).get('pageIndex', 0))
+            self.calls.append(page_index)
+            body = {'trades': [{'tradeID': page_index}], 'pageIndex': page_index, 'pageCount': 3}
+            return ApiResponse(interface.SUCCESS, {}, json.dumps(body).encode())
+
+        async def collect():
+            trade_ids = []
+            async for trade in self.api.iter_trades_history(page_size=1):
+                trade_ids.append(trade['tradeID'])
+            return trade_ids
+
+        self.api._send = fake_request
+
+        assert run(collect()) == [0, 1, 2]
+        assert self.calls == [0, 1, 2]
+
+    def test_fetch_trades_history_parallel(self, run):
+        async def fake_request(method, url_path, **kwargs):
+            page_index = int(dict(parse_qsl(kwargs.get('data', ''))).get('pageIndex', 0))
+            body = {'trades': [{'tradeID': page_index}, {'tradeID': page_index + 1}], 'pageCount': 4}
+            return ApiResponse(interface.SUCCESS, {}, json.dumps(body).encode())
+
+        self.api._send = fake_request
+
+        trades = run(self.api.fetch_trades_history_parallel(page_size=2, workers=2))
+
+        assert [trade['tradeID'] for trade in trades] == [0, 1, 2, 3, 4]
+
+    def test_get_top_of_book(self, run):
+        async def fake_request(method, url_path, **kwargs):
+            instrument_id = int(dict(parse_qsl(url_path.split('?')[1]))['instrumentID'])
+            body = [{'orderID': instrument_id * 10 + i, 'offerType': 1 + i % 2, 'price': str(instrument_id + i)}
+                    for i in range(4)]
+            return ApiResponse(interface.SUCCESS, {}, json.dumps(body).encode())
+
+        self.api._send = fake_request
+
+        tops = run(self.api.get_top_of_book([2, 1]))
+
+        assert list(tops) == [2, 1]
+        assert tops[1]['bid']['orderID'] == 12
+        assert tops[1]['ask']['orderID'] == 11
+
+    def test_filters_are_validated(self, run):
+        with pytest.raises(ValueError):
+            run(self.api.get_market_orders(FIXTURE_INSTRUMENT_ID, offer_type='Bid'))
+        with pytest.raises(ValueError):
+            run(self.api.create_order('Bid', interface.OrderType.LIMIT, FIXTURE_INSTRUMENT_ID, 1, 1))
+
+        assert self.calls == []
+
+    def test_unsuccessful_cancel_order(self, run):
+        self.responses['api/orders/cancel'] = (interface.BAD_REQUEST, {'message': 'Unknown trader'})
+
+        with pytest.raises(RequestException):
+            run(self.api.cancel_order(32598))
+
+    def test_concurrent_requests(self, run):
+        async def burst():
+            return await asyncio.gather(*[self.api.get_market_orders(instrument_id)
+                                          for instrument_id in range(20)])
+
+        assert len(run(burst())) == 20
+        assert len(self.calls) == 20
+
+    def test_concurrent_callers_share_one_login(self, run):
+        async def burst():
+            await asyncio.gather(*[self.api.get_orders() for _ in range(20)])
+
+        run(burst())
+
+        assert [call[1] for call in self.calls].count('oauth/token') == 1
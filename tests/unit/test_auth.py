@@ -1,7 +1,12 @@
+import datetime
+import threading
+import time
+
 import pytest
 
 import requests
 from blockex.tradeapi import interface, tradeapi
+from blockex.tradeapi.helper import monotonic
 
 
 @pytest.mark.usefixtures('mocker')
@@ -58,8 +63,7 @@ class TestTradeApiLogin:
         assert self.trade_api.access_token is None
 
     def test_logout_when_not_logged_in(self):
-        post_mock = self.mocker.Mock()
-        requests.post = post_mock
+        post_mock = self.mocker.patch.object(requests.Session, 'post', self.mocker.Mock())
 
         assert self.trade_api.access_token is None
         self.trade_api.logout()
@@ -112,3 +116,147 @@ class TestTradeApiLogin:
     def test_make_authorized_post_request_when_token_expired(self):
         self.authorized_request_when_logged_in(self.trade_api.post_path, self.post_mock)
         self.get_access_token_mock.assert_called_once()
+
+    def concurrent_authorized_requests(self, callers=16):
+        barrier = threading.Barrier(callers)
+
+        def slow_access_token():
+            time.sleep(0.05)
+            return {'access_token': pytest.FIXTURE_ACCESS_TOKEN, 'expires_in': 86399}
+
+        self.get_access_token_mock.side_effect = slow_access_token
+
+        def call():
+            barrier.wait()
+            self.trade_api.make_authorized_request(self.trade_api.get_path, 'ResourceURL')
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert self.get_mock.call_count == callers
+        self.get_mock.assert_called_with(self.trade_api.api_url + 'ResourceURL',
+                                         headers={'Authorization': 'Bearer SomeAccessToken'})
+
+    def test_concurrent_callers_share_one_login(self):
+        self.concurrent_authorized_requests()
+        self.get_access_token_mock.assert_called_once()
+
+    def test_concurrent_callers_share_one_refresh_when_token_expired(self):
+        self.trade_api._token_state = ('ExpiredAccessToken', {'Authorization': 'Bearer ExpiredAccessToken'},
+                                       monotonic() - 1)
+
+        self.concurrent_authorized_requests()
+        self.get_access_token_mock.assert_called_once()
+
+    def test_authorization_header_is_built_once_per_token(self):
+        self.trade_api.make_authorized_request(self.trade_api.get_path, 'First')
+        self.trade_api.make_authorized_request(self.trade_api.get_path, 'Second')
+
+        first_headers = self.get_mock.call_args_list[0][1]['headers']
+        second_headers = self.get_mock.call_args_list[1][1]['headers']
+        assert first_headers is second_headers
+        assert first_headers == {'Authorization': 'Bearer SomeAccessToken'}
+
+    def test_assigned_access_token_is_used(self):
+        self.trade_api.access_token = 'AssignedAccessToken'
+
+        self.trade_api.make_authorized_request(self.trade_api.get_path, 'ResourceURL')
+
+        self.get_access_token_mock.assert_not_called()
+        self.get_mock.assert_called_once_with(self.trade_api.api_url + 'ResourceURL',
+                                              headers={'Authorization': 'Bearer AssignedAccessToken'})
+
+    def test_assigned_expiry_is_honoured(self):
+        self.trade_api.access_token = 'AssignedAccessToken'
+        self.trade_api.access_token_expires = datetime.datetime.now() - datetime.timedelta(seconds=1)
+
+        self.trade_api.make_authorized_request(self.trade_api.get_path, 'ResourceURL')
+
+        self.get_access_token_mock.assert_called_once()
+        assert self.trade_api.access_token == pytest.FIXTURE_ACCESS_TOKEN
+
+    def test_logout_with_assigned_access_token(self):
+        self.trade_api.access_token = 'AssignedAccessToken'
+
+        self.trade_api.logout()
+
+        self.post_mock.assert_called_once_with('https://test.api.url/oauth/logout',
+                                               headers={'Authorization': 'Bearer AssignedAccessToken'})
+        assert self.trade_api.access_token is None
+
+
+@pytest.mark.usefixtures('mocker')
+@pytest.mark.usefixtures('trade_api')
+class TestTokenRefresher:
+
+    def test_refresher_renews_before_expiry(self):
+        self.get_access_token_mock.return_value = {'access_token': pytest.FIXTURE_ACCESS_TOKEN,
+                                                   'expires_in': 2}
+
+        self.trade_api.start_token_refresher(margin=1.7)
+        try:
+            time.sleep(0.05)
+            self.get_access_token_mock.assert_called_once()
+
+            self.trade_api.make_authorized_request(self.trade_api.get_path, 'ResourceURL')
+            self.get_access_token_mock.assert_called_once()
+
+            time.sleep(0.4)
+            assert self.get_access_token_mock.call_count == 2
+        finally:
+            self.trade_api.stop_token_refresher()
+
+    def test_refresher_retries_failed_login(self, monkeypatch):
+        monkeypatch.setattr(interface, 'TOKEN_REFRESH_RETRY_INTERVAL', 0.05)
+        self.get_access_token_mock.side_effect = [requests.RequestException('Login failed.'),
+                                                  {'access_token': pytest.FIXTURE_ACCESS_TOKEN,
+                                                   'expires_in': 86399}]
+
+        self.trade_api.start_token_refresher()
+        try:
+            time.sleep(0.15)
+        finally:
+            self.trade_api.stop_token_refresher()
+
+        assert self.get_access_token_mock.call_count == 2
+        assert self.trade_api.access_token == pytest.FIXTURE_ACCESS_TOKEN
+
+    def test_refresher_records_errors_and_stops_on_rejected_login(self, monkeypatch):
+        monkeypatch.setattr(interface, 'TOKEN_REFRESH_RETRY_INTERVAL', 0.01)
+        rejected = requests.Response()
+        rejected.status_code = interface.BAD_REQUEST
+        self.get_access_token_mock.side_effect = requests.RequestException('Login failed.', response=rejected)
+
+        self.trade_api.start_token_refresher()
+        time.sleep(0.1)
+
+        self.get_access_token_mock.assert_called_once()
+        assert self.trade_api.last_refresh_error is self.get_access_token_mock.side_effect
+        assert self.trade_api._token_refresher is None
+
+    def test_refresher_keeps_retrying_server_errors(self, monkeypatch):
+        monkeypatch.setattr(interface, 'TOKEN_REFRESH_RETRY_INTERVAL', 0.01)
+        failed = requests.Response()
+        failed.status_code = 500
+        self.get_access_token_mock.side_effect = requests.RequestException('Login failed.', response=failed)
+
+        self.trade_api.start_token_refresher()
+        try:
+            time.sleep(0.1)
+        finally:
+            self.trade_api.stop_token_refresher()
+
+        assert self.get_access_token_mock.call_count > 2
+        assert self.trade_api.last_refresh_error is not None
+
+    def test_logout_stops_refresher(self):
+        self.trade_api.start_token_refresher()
+        time.sleep(0.05)
+
+        self.trade_api.logout()
+
+        assert self.trade_api._token_refresher is None
+        assert self.trade_api.access_token is None
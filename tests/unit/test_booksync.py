@@ -0,0 +1,77 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+streaming = pytest.importorskip('blockex.tradeapi.streaming')
+booksync = pytest.importorskip('blockex.tradeapi.booksync')
+
+
+class TestOrderBookSync:
+    def test_buffers_updates_during_snapshot(self, fake_api, run, order):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            api = fake_api(stream=stream, snapshots=[[order(1, 1, '10'), order(2, 2, '12')]],
+                           during_snapshot=[[order(3, 1, '11')], [order(1, 1, '10', status=60)]])
+            sync = booksync.OrderBookSync(api, stream, 1)
+            task = asyncio.ensure_future(sync.run())
+            await asyncio.sleep(0.01)
+            await stream.dispatch([[order(2, 2, '12', '0.5', status=50)]])
+            await asyncio.sleep(0.01)
+            sync.close()
+            await asyncio.wait_for(task, 1)
+            return sync
+
+        sync = run(scenario())
+
+        assert 1 not in sync.book
+        assert sync.book.best_bid().price == Decimal('11')
+        assert sync.book.best_ask().quantity == Decimal('0.5')
+        assert sync.stats() == {'applied': 3, 'skipped': 0, 'gaps': 0, 'resyncs': 1}
+
+    def test_skips_updates_older_than_snapshot(self, fake_api, run, order):
+        stream = streaming.MarketDataStream()
+        api = fake_api(stream=stream, snapshots=[[order(1, 1, '10')]])
+        sync = booksync.OrderBookSync(api, stream, 1)
+        run(sync.resync())
+
+        assert sync.apply(streaming.MarketOrdersEvent(1, [order(1, 1, '10', status=40)], 0))
+        assert 1 in sync.book
+        assert sync.skipped == 1
+
+    def test_crossed_book_resyncs(self, fake_api, run, order):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            api = fake_api(stream=stream, snapshots=[[order(1, 1, '10'), order(2, 2, '12')], [order(2, 2, '12')]])
+            sync = booksync.OrderBookSync(api, stream, 1)
+            task = asyncio.ensure_future(sync.run())
+            await asyncio.sleep(0.01)
+            await stream.dispatch([[order(3, 1, '13')]])
+            await asyncio.sleep(0.01)
+            sync.close()
+            await asyncio.wait_for(task, 1)
+            return sync
+
+        sync = run(scenario())
+
+        assert sync.gaps == 1
+        assert sync.resyncs == 2
+        assert sync.book.best_bid() is None
+
+    def test_dropped_update_resyncs(self, fake_api, run, order):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            api = fake_api(stream=stream, snapshots=[[], [order(5, 1, '9')]],
+                           during_snapshot=[[order(1, 1, '10')], [order(2, 1, '10')], [order(3, 1, '10')]])
+            sync = booksync.OrderBookSync(api, stream, 1, queue_size=2)
+            task = asyncio.ensure_future(sync.run())
+            await asyncio.sleep(0.01)
+            sync.close()
+            await asyncio.wait_for(task, 1)
+            return sync
+
+        sync = run(scenario())
+
+        assert sync.gaps == 1
+        assert sync.resyncs == 2
+        assert list(sync.book.depth(5)['bids']) == [(Decimal('9'), Decimal('1'))]
@@ -0,0 +1,99 @@
+import warnings
+from datetime import datetime, timedelta, tzinfo
+from decimal import Decimal
+
+import pytest
+
+from blockex.tradeapi import sync
+
+np = pytest.importorskip('numpy')
+cache = pytest.importorskip('blockex.tradeapi.cache')
+
+
+class Offset(tzinfo):
+    def __init__(self, hours):
+        self.offset = timedelta(hours=hours)
+
+    def utcoffset(self, dt):
+        return self.offset
+
+    def dst(self, dt):
+        return timedelta(0)
+
+
+@pytest.fixture()
+def store(tmpdir):
+    return cache.ColumnarTradeStore(str(tmpdir.join('cache')))
+
+
+class TestColumnarTradeStore:
+    def test_append_and_read(self, store, trade):
+        assert store.last_trade(5) is None
+        assert list(store.read(5)) == []
+
+        store.append(5, [trade(1, 0), trade(2, 1)])
+        store.append(5, [trade(3, 2, price='1.25')])
+
+        trades = list(store.read(5))
+        assert [t['tradeID'] for t in trades] == [1, 2, 3]
+        assert trades[2]['price'] == Decimal('1.25')
+        assert store.last_trade(5)['tradeDate'] == '2017-05-14T09:16:02.000000Z'
+
+    def test_query_is_memory_mapped(self, store, trade):
+        store.append(5, [trade(trade_id, trade_id) for trade_id in range(10)])
+
+        result = store.query(5, date_from='2017-05-14T09:16:03', date_to='2017-05-14T09:16:06')
+
+        assert result['tradeID'].tolist() == [3, 4, 5]
+        assert isinstance(result['price'], np.memmap)
+        assert result['price'].sum() == 4.5
+
+    @pytest.mark.parametrize('date_from, date_to', [
+        (datetime(2017, 5, 14, 11, 16, 3, tzinfo=Offset(2)), datetime(2017, 5, 14, 9, 16, 6, tzinfo=Offset(0))),
+        ('2017-05-14T11:16:03+02:00', '2017-05-14T09:16:06Z'),
+        (datetime(2017, 5, 14, 9, 16, 3), '2017-05-14T09:16:06+00:00'),
+    ])
+    def test_query_time_zones(self, store, trade, date_from, date_to):
+        store.append(5, [trade(trade_id, trade_id) for trade_id in range(10)])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            result = store.query(5, date_from=date_from, date_to=date_to)
+            store.invalidate(5, date_from=date_to)
+
+        assert result['tradeID'].tolist() == [3, 4, 5]
+        assert [t['tradeID'] for t in store.read(5)] == [0, 1, 2, 3, 4, 5]
+
+    def test_partial_append_is_ignored(self, store, trade):
+        store.append(5, [trade(1, 0)])
+        with open(store.path(5, 'price'), 'ab') as stream:
+            stream.write(b'\0' * 8)
+
+        assert store.query(5)['price'].tolist() == [1.5]
+        store.append(5, [trade(2, 1)])
+        assert store.query(5)['price'].tolist() == [1.5, 1.5]
+
+    def test_invalidate(self, store, trade):
+        store.append(5, [trade(trade_id, trade_id) for trade_id in range(5)])
+
+        store.invalidate(5, date_from='2017-05-14T09:16:03')
+        assert [t['tradeID'] for t in store.read(5)] == [0, 1, 2]
+
+        store.invalidate(5)
+        assert store.last_trade(5) is None
+
+    def test_compact(self, store, trade):
+        store.append(5, [trade(1, 0), trade(2, 2)])
+        store.append(5, [trade(2, 2, price='9'), trade(3, 1)])
+
+        assert store.compact(5) == 1
+        trades = list(store.read(5))
+        assert [t['tradeID'] for t in trades] == [1, 3, 2]
+        assert trades[2]['price'] == Decimal(9)
+
+    def test_sync_into_cache(self, store, fake_api, trade):
+        api = fake_api([trade(1, 0), trade(2, 1)])
+
+        assert sync.TradeHistorySync(api, store).sync(5) == 2
+        assert sync.TradeHistorySync(api, store).sync(5) == 0
+        assert store.query(5)['tradeID'].tolist() == [1, 2]
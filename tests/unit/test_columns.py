@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+columns = pytest.importorskip('blockex.tradeapi.columns')
+
+ORDERS = [{'orderID': '31635', 'price': '5.00', 'initialQuantity': 270, 'quantity': 0.1,
+           'dateCreated': '2017-05-14T09:19:53.335+02:00', 'offerType': 1, 'type': 'Market', 'status': 50,
+           'instrumentID': 1, 'trades': None},
+          {'orderID': 31636, 'price': None, 'initialQuantity': '2.5', 'quantity': '1.25',
+           'dateCreated': None, 'offerType': 'Ask', 'type': 1, 'status': None, 'instrumentID': 1}]
+
+
+class TestColumns:
+    def test_order_columns(self):
+        result = columns.decode_columns(json.dumps(ORDERS), columns.ORDER_COLUMNS)
+
+        assert result['orderID'].dtype == np.int64
+        assert result['orderID'].tolist() == [31635, 31636]
+        assert result['price'][0] == 5.0
+        assert np.isnan(result['price'][1])
+        assert result['quantity'].tolist() == [0.1, 1.25]
+        assert result['offerType'].tolist() == [1, 2]
+        assert result['type'].tolist() == [2, 1]
+        assert result['status'].dtype == np.int8
+        assert result['status'].tolist() == [50, 0]
+        assert str(result['dateCreated'][0]) == '2017-05-14T07:19:53.335000'
+        assert np.isnat(result['dateCreated'][1])
+        assert 'trades' not in result
+
+    def test_fixed_point(self):
+        result = columns.to_columns(ORDERS, columns.ORDER_COLUMNS, scale=8)
+
+        assert result['price'].dtype == np.int64
+        assert result['price'].tolist() == [500000000, 0]
+        assert result['quantity'].tolist() == [10000000, 125000000]
+
+    def test_trades_body(self):
+        content = json.dumps({'trades': [{'tradeID': 1, 'price': 5, 'tradeDate': '2017-05-14T09:16:20Z'}],
+                              'pageSize': 1})
+
+        body = columns.decode_columns(content, columns.TRADE_COLUMNS, 'trades')
+
+        assert body['pageSize'] == 1
+        assert body['trades']['tradeID'].tolist() == [1]
+        assert str(body['trades']['tradeDate'][0]) == '2017-05-14T09:16:20.000000'
+
+    def test_utc_dates(self):
+        dates = columns._dates(['2017-10-09T09:32:24.735659+00:00', None])
+
+        assert str(dates[0]) == '2017-10-09T09:32:24.735659'
+        assert np.isnat(dates[1])
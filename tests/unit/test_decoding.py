@@ -0,0 +1,106 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from blockex.tradeapi import decoding
+
+ORDERS = [{'orderID': 101, 'price': 0.1, 'initialQuantity': '2.5', 'quantity': 1.1, 'orderType': 'Limit'},
+          {'orderID': '102', 'price': 1e-05, 'initialQuantity': 3, 'quantity': None, 'orderType': 'Limit'}]
+
+
+def test_to_decimal_keeps_float_repr():
+    assert decoding.to_decimal(0.1) == Decimal('0.1')
+    assert decoding.to_decimal('2.50') == Decimal('2.50')
+    assert decoding.to_decimal(3) == Decimal(3)
+
+
+class TestDecodeRecords:
+    def test_orders(self):
+        orders = decoding.decode_records(json.dumps(ORDERS).encode('utf-8'))
+
+        assert orders[0]['orderID'] == 101
+        assert orders[1]['orderID'] == 102
+        assert orders[0]['price'] == Decimal('0.1')
+        assert orders[1]['price'] == Decimal('0.00001')
+        assert orders[0]['initialQuantity'] == Decimal('2.5')
+        assert orders[0]['quantity'] == Decimal('1.1')
+        assert orders[1]['quantity'] is None
+        assert orders[0]['orderType'] == 'Limit'
+
+    def test_nested(self):
+        content = json.dumps({'trades': [{'tradeID': '7', 'price': 0.3, 'totalPrice': 0.6, 'quantity': 2}],
+                              'total': 1})
+
+        trades = decoding.decode_records(content)
+
+        assert trades['trades'][0] == {'tradeID': 7, 'price': Decimal('0.3'),
+                                       'totalPrice': Decimal('0.6'), 'quantity': Decimal(2)}
+        assert trades['total'] == 1
+
+    @pytest.mark.parametrize('exact', [True, False])
+    def test_loads(self, exact):
+        assert decoding.loads(b'{"a": [1, 0.1]}', exact) == {'a': [1, 0.1]}
+        assert type(decoding.loads(b'{"a": [1, 0.1]}', exact)['a'][1]) is float
+        assert decoding.loads(b'{"price": 0.1}', exact)['price'] == (Decimal('0.1') if exact else 0.1)
+
+    @pytest.mark.parametrize('decode', [decoding.decode_records, lambda content: decoding.loads(content, True)])
+    def test_floats_in_lists_stay_floats(self, decode):
+        body = decode(b'[0.5, [1.5, {"price": 0.1, "a": [[2.5]]}]]')
+
+        assert body == [0.5, [1.5, {'price': Decimal('0.1'), 'a': [[2.5]]}]]
+        assert type(decode(b'[0.5, [1.5]]')[1][0]) is float
+        assert type(decode(b'{"a": [[2.5], 3.5]}')['a'][0][0]) is float
+        assert type(decode(b'0.5')) is float
+
+    def test_equal_numbers_share_one_decimal(self):
+        orders = decoding.decode_records(b'[{"price": "1.50"}, {"price": "1.50", "quantity": "1.50"}]')
+
+        assert orders[0]['price'] is orders[1]['price'] is orders[1]['quantity']
+
+    def test_records_of_different_shapes(self):
+        content = json.dumps([{'orderID': 1, 'price': '2.0'},
+                              {'orderID': 2, 'quantity': '3.0', 'trades': [{'tradeID': '4', 'price': 5}]}])
+
+        orders = decoding.decode_records(content)
+
+        assert orders == [{'orderID': 1, 'price': Decimal('2.0')},
+                          {'orderID': 2, 'quantity': Decimal('3.0'),
+                           'trades': [{'tradeID': 4, 'price': Decimal(5)}]}]
+
+    def test_float_precision_is_kept(self):
+        content = b'[{"price": 12345678901.123456789, "quantity": 0.1000000000000000055511151231257827}]'
+
+        order = decoding.decode_records(content)[0]
+
+        assert order['price'] == Decimal('12345678901.123456789')
+        assert order['quantity'] == Decimal('0.1000000000000000055511151231257827')
+        assert decoding.decode_lazy(content)[0]['price'] == Decimal('12345678901.123456789')
+
+
+class TestLazyRecord:
+    def test_fields_are_converted_on_access(self):
+        order = decoding.decode_lazy(json.dumps(ORDERS))[0]
+
+        assert order._converted is None
+        assert order['price'] == Decimal('0.1')
+        assert order._converted == {'price': Decimal('0.1')}
+        assert order['price'] is order['price']
+        assert order['orderType'] == 'Limit'
+        assert order.get('missing') is None
+
+    def test_mapping_equals_decode_records(self):
+        content = json.dumps(ORDERS)
+
+        lazy = decoding.decode_lazy(content)
+
+        assert lazy == decoding.decode_records(content)
+        assert [order.as_dict() for order in lazy] == decoding.decode_records(content)
+
+    def test_nested(self):
+        content = json.dumps({'trades': [{'tradeID': '7', 'price': 0.3}], 'total': 1})
+
+        body = decoding.decode_lazy(content)
+
+        assert body['trades'][0]['tradeID'] == 7
+        assert body.as_dict() == decoding.decode_records(content)
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from blockex.tradeapi import interface
+from blockex.tradeapi.depth import DepthBook
+
+
+def order(order_id, offer_type, price, quantity=1.0):
+    return {'orderID': order_id, 'offerType': offer_type, 'price': price, 'quantity': quantity}
+
+
+ORDERS = [order(1, 1, 10.0), order(2, 1, 11.0, 2.0), order(3, 1, 10.0, 0.5),
+          order(4, 2, 12.0), order(5, 'Ask', 12.0, 3.0), order(6, 2, 14.0)]
+
+
+class TestDepthBook:
+    def test_levels(self):
+        depth = DepthBook(ORDERS)
+
+        prices, quantities = depth.levels(interface.OfferType.BID)
+        assert prices.tolist() == [11.0, 10.0]
+        assert quantities.tolist() == [2.0, 1.5]
+        prices, quantities = depth.cumulative(interface.OfferType.ASK)
+        assert prices.tolist() == [12.0, 14.0]
+        assert quantities.tolist() == [4.0, 5.0]
+
+    def test_fill_cost(self):
+        depth = DepthBook(ORDERS)
+
+        assert depth.fill_cost(interface.OfferType.ASK, 4.5) == (pytest.approx(55.0 / 4.5), 4.5, 55.0)
+        assert depth.fill_cost(interface.OfferType.ASK, 2.0) == (12.0, 2.0, 24.0)
+        assert depth.fill_cost(interface.OfferType.BID, 10.0) == (pytest.approx(37.0 / 3.5), 3.5, 37.0)
+        assert DepthBook().fill_cost(interface.OfferType.BID, 1.0) == (None, 0.0, 0.0)
+
+    def test_fill_cost_of_decimal_quantity(self):
+        depth = DepthBook(ORDERS)
+
+        assert depth.fill_cost(interface.OfferType.ASK, Decimal('2.5')) == (12.0, 2.5, 30.0)
+        assert depth.fill_cost(interface.OfferType.BID, Decimal('10')) == (pytest.approx(37.0 / 3.5), 3.5, 37.0)
+
+    def test_update_applies_changes(self):
+        depth = DepthBook(ORDERS)
+
+        changed = depth.update([order(1, 1, 10.0), order(2, 1, 11.0, 1.0), order(4, 2, 12.0),
+                                order(5, 2, 13.0, 3.0), order(6, 2, 14.0), order(7, 1, 9.0)])
+
+        assert changed == 4
+        assert depth.levels(interface.OfferType.BID)[0].tolist() == [11.0, 10.0, 9.0]
+        assert depth.levels(interface.OfferType.BID)[1].tolist() == [1.0, 1.0, 1.0]
+        assert depth.levels(interface.OfferType.ASK)[0].tolist() == [12.0, 13.0, 14.0]
+        assert depth.update([]) == 6
+        assert len(depth.levels(interface.OfferType.ASK)[0]) == 0
+
+    def test_update_matches_rebuild(self):
+        random = np.random.RandomState(0)
+        depth = DepthBook()
+        for _ in range(20):
+            ids = np.unique(random.randint(0, 60, 40))
+            columns = {'orderID': ids,
+                       'price': random.randint(90, 110, len(ids)).astype(float),
+                       'quantity': random.randint(1, 5, len(ids)).astype(float),
+                       'offerType': random.randint(1, 3, len(ids)).astype(np.int8)}
+            depth.update(columns)
+            rebuilt = DepthBook(columns)
+            for offer_type in (interface.OfferType.BID, interface.OfferType.ASK):
+                assert depth.levels(offer_type)[0].tolist() == rebuilt.levels(offer_type)[0].tolist()
+                assert np.allclose(depth.levels(offer_type)[1], rebuilt.levels(offer_type)[1])
+
+    def test_invalid_offer_type(self):
+        with pytest.raises(ValueError):
+            DepthBook().levels('Bid')
@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pytest
+
+from blockex.tradeapi import interface
+from blockex.tradeapi.hedging import Hedger, LatencyTracker, is_hedgeable
+from blockex.tradeapi.tradeapi import BlockExTradeApi
+from blockex.tradeapi.transport import FakeTransport
+
+FIXTURE_INSTRUMENT_ID = 1
+
+
+class TestIsHedgeable:
+    def test_reads_only(self):
+        assert is_hedgeable('api/orders/getMarketOrders?apiID=1&instrumentID=1')
+        assert is_hedgeable('api/orders/getTradesHistory?')
+        assert is_hedgeable('api/orders/partnerinstruments?apiID=1')
+        assert not is_hedgeable('api/orders/create?price=1')
+        assert not is_hedgeable('api/orders/cancel?orderID=1')
+        assert not is_hedgeable('api/orders/get?status=20')
+
+
+class TestLatencyTracker:
+    def test_percentile(self):
+        tracker = LatencyTracker(window=100)
+        assert tracker.percentile(95) is None
+
+        for latency in range(1, 101):
+            tracker.record(latency / 1000.0)
+
+        assert tracker.percentile(50) == pytest.approx(0.051)
+        assert tracker.percentile(95) == pytest.approx(0.096)
+
+
+class TestHedger:
+
+    @pytest.fixture(autouse=True)
+    def hedger(self):
+        self.hedger = Hedger(min_delay=0.02, max_delay=0.02)
+        yield
+        self.hedger.close()
+
+    def test_fast_call_is_not_hedged(self):
+        assert self.hedger.call(lambda: 'primary') == 'primary'
+        assert self.hedger.stats()['hedges_fired'] == 0
+
+    def test_slow_call_is_hedged(self):
+        calls = []
+        lock = threading.Lock()
+
+        def request():
+            with lock:
+                calls.append(None)
+                attempt = len(calls)
+            if attempt == 1:
+                time.sleep(0.3)
+                return 'primary'
+            return 'hedge'
+
+        assert self.hedger.call(request) == 'hedge'
+        stats = self.hedger.stats()
+        assert stats['requests'] == 1
+        assert stats['hedges_fired'] == 1
+        assert stats['hedges_won'] == 1
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        calls = []
+
+        def request():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.1)
+                return 'primary'
+            raise ValueError('hedge failed')
+
+        assert self.hedger.call(request) == 'primary'
+        assert self.hedger.stats()['hedges_won'] == 0
+
+    def test_queued_request_is_not_hedged(self):
+        hedger = Hedger(min_delay=0.1, max_delay=0.1, max_workers=1)
+        release = threading.Event()
+        results = []
+
+        def call(func):
+            thread = threading.Thread(target=lambda: results.append(hedger.call(func)))
+            thread.start()
+            return thread
+
+        # the only worker is busy until released, so the fast request waits in the queue
+        threads = [call(lambda: release.wait() and 'blocker')]
+        time.sleep(0.01)
+        threads.append(call(lambda: 'queued'))
+        time.sleep(0.3)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(results) == ['blocker', 'queued']
+        # only the blocker was hedged
+        assert hedger.stats()['hedges_fired'] == 1
+        hedger.close()
+
+    def test_pool_sized_from_client(self):
+        hedger = Hedger()
+        BlockExTradeApi('CorrectUsername', 'CorrectPassword', transport=FakeTransport(None), pool_maxsize=3,
+                        hedger=hedger)
+        assert hedger.max_workers == 3
+
+        hedger = Hedger(max_workers=5)
+        BlockExTradeApi('CorrectUsername', 'CorrectPassword', transport=FakeTransport(None), pool_maxsize=3,
+                        hedger=hedger)
+        assert hedger.max_workers == 5
+
+    def test_delay_follows_latency_percentile(self):
+        hedger = Hedger(percentile=50, min_delay=0.001, max_delay=1)
+        for latency in (0.01, 0.02, 0.03):
+            hedger.latencies.record(latency)
+
+        assert hedger.delay() == 0.02
+        hedger.close()
+
+
+class TestTradeApiHedging:
+
+    def make_trade_api(self, delays):
+        calls = []
+
+        def handler(method, url, kwargs):
+            calls.append(url)
+            if url.endswith('oauth/token'):
+                return interface.SUCCESS, b'{"access_token": "SomeAccessToken", "expires_in": 86399}'
+            time.sleep(delays[min(len(calls), len(delays)) - 1])
+            return interface.SUCCESS, b'[]'
+
+        hedger = Hedger(min_delay=0.02, max_delay=0.02)
+        trade_api = BlockExTradeApi('CorrectUsername', 'CorrectPassword', api_url='https://test.api.url/',
+                                    api_id='CorrectApiID', transport=FakeTransport(handler), hedger=hedger)
+        return trade_api, calls
+
+    def test_market_orders_are_hedged(self):
+        trade_api, calls = self.make_trade_api([0.3, 0])
+
+        start = time.time()
+        assert trade_api.get_market_orders(FIXTURE_INSTRUMENT_ID) == []
+
+        assert time.time() - start < 0.2
+        assert trade_api.hedger.stats()['hedges_won'] == 1
+        trade_api.close()
+
+    def test_orders_are_never_hedged(self):
+        trade_api, calls = self.make_trade_api([0, 0.1, 0.1])
+        trade_api.get_access_token = lambda: {'access_token': 'SomeAccessToken', 'expires_in': 86399}
+
+        trade_api.cancel_order(32598)
+
+        assert calls == ['https://test.api.url/api/orders/cancel?orderID=32598']
+        assert trade_api.hedger.stats()['requests'] == 0
+        trade_api.close()
@@ -1,6 +1,9 @@
+import threading
+import time
+
 import pytest
 
-from blockex.tradeapi.helper import DictConditional, head
+from blockex.tradeapi.helper import DictConditional, head, run_concurrently
 
 
 class TestDictConditional:
@@ -28,3 +31,34 @@ class TestGetFirst:
 
         assert head((), default=[]) == []
         assert head((1, 2, 3)) == 1
+
+
+class TestRunConcurrently:
+    def test_results_in_input_order(self):
+        def invert(item):
+            time.sleep(0.01 * (5 - item))
+            return 1.0 / item
+
+        results = run_concurrently(invert, [1, 2, 0, 4], max_concurrency=4)
+
+        assert [result.value for result in results] == [1.0, 0.5, None, 0.25]
+        assert isinstance(results[2].error, ZeroDivisionError)
+        assert results[0].error is None
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def track(item):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+            return item
+
+        results = run_concurrently(track, range(12), max_concurrency=3)
+
+        assert [result.value for result in results] == list(range(12))
+        assert state['peak'] == 3
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+import pytest
+
+from blockex.tradeapi import interface, orderbook
+
+
+def order(order_id, offer_type, price, quantity='1'):
+    return {'orderID': order_id, 'offerType': offer_type, 'price': Decimal(price), 'quantity': Decimal(quantity)}
+
+
+@pytest.fixture()
+def book():
+    return orderbook.OrderBook(1, [order(1, 1, '10'), order(2, 1, '11', '2'), order(3, 1, '9'),
+                                   order(4, 2, '12'), order(5, 'Ask', '12', '3'), order(6, 2, '14')])
+
+
+class TestOrderBook:
+    def test_top_of_book(self, book):
+        assert book.best_bid().price == Decimal('11')
+        assert book.best_bid().quantity == Decimal('2')
+        assert book.best_ask().price == Decimal('12')
+        assert book.best_ask().quantity == Decimal('4')
+        assert book.spread() == Decimal('1')
+
+    def test_depth(self, book):
+        assert book.depth(2) == {'bids': [(Decimal('11'), Decimal('2')), (Decimal('10'), Decimal('1'))],
+                                 'asks': [(Decimal('12'), Decimal('4')), (Decimal('14'), Decimal('1'))]}
+        assert [level.price for level in book.levels(interface.OfferType.BID)] == \
+            [Decimal('11'), Decimal('10'), Decimal('9')]
+        assert book.depth(0) == {'bids': [], 'asks': []}
+
+    def test_remove_and_update(self, book):
+        assert book.remove(2)
+        assert not book.remove(2)
+        assert book.best_bid().price == Decimal('10')
+
+        assert book.update_quantity(5, Decimal('1'))
+        assert book.best_ask().quantity == Decimal('2')
+        assert book.update_quantity(4, 0)
+        assert 4 not in book
+        assert book.best_ask().orders == {5: Decimal('1')}
+
+    def test_add_replaces_order(self, book):
+        book.add(order(1, 1, '13', '5'))
+
+        assert len(book) == 6
+        assert book.best_bid().orders == {1: Decimal('5')}
+        assert [level.price for level in book.levels(interface.OfferType.BID)] == \
+            [Decimal('13'), Decimal('11'), Decimal('9')]
+
+    def test_empty_book(self):
+        book = orderbook.OrderBook(1)
+
+        assert book.best_bid() is None
+        assert book.spread() is None
+
+    def test_offer_type_of(self):
+        assert orderbook.offer_type_of({'offerType': interface.OfferType.ASK}) == interface.OfferType.ASK
+        assert orderbook.offer_type_of({'offerType': 1}) == interface.OfferType.BID
+
+    def test_is_resting(self):
+        assert orderbook.is_resting({'status': 20, 'quantity': Decimal('1')})
+        assert orderbook.is_resting({'status': '50', 'quantity': Decimal('1')})
+        assert orderbook.is_resting({'status': interface.OrderStatus.PLACED, 'quantity': Decimal('1')})
+        assert orderbook.is_resting({'quantity': Decimal('1')})
+        assert not orderbook.is_resting({'status': 20, 'quantity': Decimal('0')})
+        assert not orderbook.is_resting({'status': 60, 'quantity': Decimal('1')})
+
+    def test_best_order(self):
+        orders = [order(1, 1, '10'), order(2, 1, '11'), order(3, 1, '11', '5'), order(4, 2, '12'),
+                  order(5, 1, '12', '0'), dict(order(6, 1, '13'), status=40), order(7, 2, '11')]
+
+        assert orderbook.best_order(orders, interface.OfferType.BID) is orders[1]
+        assert orderbook.best_order(orders, interface.OfferType.ASK) is orders[6]
+        assert orderbook.best_order(orders[:3], interface.OfferType.ASK) is None
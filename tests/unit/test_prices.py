@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+import pytest
+
+from blockex.tradeapi import prices
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(prices, 'monotonic', lambda: now[0])
+    return now
+
+
+class TestLatestPriceService:
+    def test_get_caches_within_max_age(self, clock, fake_api):
+        api = fake_api()
+        service = prices.LatestPriceService(api, max_age=1)
+
+        assert service.get(1) == Decimal(1)
+        clock[0] += 0.5
+        assert service.get(1) == Decimal(1)
+        assert api.calls == [1]
+
+        clock[0] += 1
+        assert service.get(1) == Decimal(1)
+        assert api.calls == [1, 1]
+        assert service.stats() == {'hits': 1, 'misses': 2}
+
+    def test_updates_keep_the_cache_fresh(self, clock, fake_api):
+        api = fake_api()
+        service = prices.LatestPriceService(api, max_age=1)
+
+        service.on_trade({'instrumentID': 1, 'price': Decimal('5.5')})
+        assert service.get(1) == Decimal('5.5')
+        assert api.calls == []
+
+    def test_get_many_fetches_only_stale_prices(self, clock, fake_api):
+        api = fake_api()
+        service = prices.LatestPriceService(api)
+        service.update(1, Decimal('5.5'))
+
+        assert service.get_many([1, 2, 3]) == {1: Decimal('5.5'), 2: Decimal(2), 3: Decimal(3)}
+        assert sorted(api.calls) == [2, 3]
+
+    def test_get_many_raises_fetch_errors(self, clock, fake_api):
+        with pytest.raises(ValueError):
+            prices.LatestPriceService(fake_api()).get_many([1, 99])
+
+    def test_invalidate(self, clock, fake_api):
+        api = fake_api()
+        service = prices.LatestPriceService(api)
+        service.update(1, Decimal('5.5'))
+
+        service.invalidate(1)
+
+        assert service.get(1) == Decimal(1)
+
+    def test_fetch_keeps_price_pushed_during_request(self, clock, fake_api):
+        api = fake_api()
+        service = prices.LatestPriceService(api, max_age=1)
+
+        def get_latest_price(instrument_id):
+            clock[0] += 0.1
+            service.update(instrument_id, Decimal('5.5'))
+            clock[0] += 0.1
+            return Decimal(1)
+
+        api.get_latest_price = get_latest_price
+
+        assert service.get(1) == Decimal('5.5')
+        assert service.get_many([1]) == {1: Decimal('5.5')}
+        assert service.stats() == {'hits': 1, 'misses': 1}
+
+    def test_fetch_replaces_older_price(self, clock, fake_api):
+        service = prices.LatestPriceService(fake_api(), max_age=1)
+        service.update(1, Decimal('5.5'))
+        clock[0] += 2
+
+        assert service.get(1) == Decimal(1)
+        assert service.get(1) == Decimal(1)
@@ -0,0 +1,141 @@
+import email.utils
+import time
+
+import pytest
+import requests
+
+from blockex.tradeapi import interface
+from blockex.tradeapi.apiclient import ApiClient
+from blockex.tradeapi.ratelimit import RateLimiter, TokenBucket, backoff_delay, parse_retry_after
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = b'[]'
+    return response
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after('3') == 3
+        assert parse_retry_after(None) is None
+        assert parse_retry_after('soon') is None
+
+    def test_http_date(self):
+        value = email.utils.formatdate(time.time() + 10, usegmt=True)
+        assert 8 < parse_retry_after(value) <= 10
+
+
+class TestBackoffDelay:
+    def test_jittered_exponential(self):
+        for attempt in range(4):
+            assert 0 <= backoff_delay(attempt, base=0.1) <= 0.1 * 2 ** attempt
+        assert backoff_delay(20, base=0.1, cap=1) <= 1
+
+
+class TestTokenBucket:
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+        assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+        stats = bucket.stats()
+        assert stats['requests'] == 4
+        assert stats['waited'] == 2
+        assert stats['wait_seconds'] == pytest.approx(0.3, abs=0.02)
+
+    def test_throttling_slows_down_and_recovers(self):
+        bucket = TokenBucket(rate=10)
+
+        bucket.on_throttled(retry_after=1)
+        assert bucket.rate == 5
+        assert bucket.reserve() == pytest.approx(1, abs=0.01)
+
+        for _ in range(20):
+            bucket.on_success()
+        assert bucket.rate == 10
+
+
+class TestRateLimiter:
+    def test_buckets_per_path(self):
+        limiter = RateLimiter(rate=5, path_rates={interface.ApiPath.GET_MARKET_ORDERS: (2, 1),
+                                                  interface.ApiPath.GET_ORDERS: 20})
+
+        assert limiter.bucket('api/orders/getMarketOrders?instrumentID=1').max_rate == 2
+        assert limiter.bucket('api/orders/get?status=20').max_rate == 20
+        assert limiter.bucket('api/orders/create?price=1') is limiter.default_bucket
+
+    def test_invalid_path(self):
+        with pytest.raises(ValueError):
+            RateLimiter(path_rates={'api/orders/get?': 1})
+
+
+class TestApiClientRetries:
+
+    @pytest.fixture(autouse=True)
+    def sleep_mock(self, mocker):
+        self.sleep_mock = mocker.patch.object(time, 'sleep')
+
+    def test_get_is_retried_after_throttling(self, mocker):
+        get_mock = mocker.patch.object(requests.Session, 'get', mocker.Mock(side_effect=[
+            make_response(interface.TOO_MANY_REQUESTS, {'Retry-After': '2'}),
+            make_response(interface.SERVICE_UNAVAILABLE),
+            make_response(interface.SUCCESS)]))
+        limiter = RateLimiter(rate=100)
+        client = ApiClient(api_url='https://test.api.url/', rate_limiter=limiter)
+
+        response = client.get_path('api/orders/getMarketOrders?instrumentID=1')
+
+        assert response.status_code == interface.SUCCESS
+        assert get_mock.call_count == 3
+        assert self.sleep_mock.call_args_list[0][0][0] >= 2
+        assert limiter.stats()['default']['throttled'] == 2
+        assert limiter.stats()['default']['requests'] == 3
+
+    def test_retries_are_bounded(self, mocker):
+        get_mock = mocker.patch.object(requests.Session, 'get', mocker.Mock(
+            return_value=make_response(interface.TOO_MANY_REQUESTS)))
+        client = ApiClient(api_url='https://test.api.url/', retry_attempts=2)
+
+        response = client.get_path('api/orders/traderinstruments')
+
+        assert response.status_code == interface.TOO_MANY_REQUESTS
+        assert get_mock.call_count == 3
+
+    def test_no_retries_by_default(self, mocker):
+        get_mock = mocker.patch.object(requests.Session, 'get', mocker.Mock(
+            return_value=make_response(interface.TOO_MANY_REQUESTS, {'Retry-After': '2'})))
+        client = ApiClient(api_url='https://test.api.url/')
+
+        response = client.get_path('api/orders/traderinstruments')
+
+        assert response.status_code == interface.TOO_MANY_REQUESTS
+        get_mock.assert_called_once()
+        self.sleep_mock.assert_not_called()
+
+    @pytest.mark.parametrize('retry_attempts, rate_limiter, expected', [
+        (None, None, 0),
+        (None, RateLimiter(), interface.DEFAULT_RETRY_ATTEMPTS),
+        (3, None, 3),
+        (0, RateLimiter(), 0),
+    ])
+    def test_retry_attempts_default(self, retry_attempts, rate_limiter, expected):
+        client = ApiClient(api_url='https://test.api.url/', rate_limiter=rate_limiter, retry_attempts=retry_attempts)
+
+        assert client.retry_attempts == expected
+
+    def test_post_is_not_retried(self, mocker):
+        post_mock = mocker.patch.object(requests.Session, 'post', mocker.Mock(
+            return_value=make_response(interface.TOO_MANY_REQUESTS)))
+        client = ApiClient(api_url='https://test.api.url/', rate_limiter=RateLimiter())
+
+        response = client.post_path('api/orders/create?price=1')
+
+        assert response.status_code == interface.TOO_MANY_REQUESTS
+        post_mock.assert_called_once()
+        self.sleep_mock.assert_not_called()
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+import pytest
+
+from blockex.tradeapi import interface, records
+
+ORDER = {'orderID': '31635', 'price': '5.00', 'initialQuantity': 270, 'quantity': 0.1,
+         'dateCreated': '2017-05-14T09:19:53.335+00:00', 'offerType': 2, 'type': 3, 'status': 50,
+         'instrumentID': 1, 'trades': [{'tradeID': 7, 'price': '5.00', 'offerType': 'Ask'}],
+         'unknownField': 'dropped'}
+
+
+class TestRecord:
+    def test_order_from_dict(self):
+        order = records.Order.from_dict(ORDER)
+
+        assert order.order_id == 31635
+        assert order.price == Decimal('5.00')
+        assert order.initial_quantity == Decimal(270)
+        assert order.quantity == Decimal('0.1')
+        assert order.offer_type == interface.OfferType.ASK
+        assert order.order_type == interface.OrderType.STOP
+        assert order.status == interface.OrderStatus.PARTEXECUTED
+        assert order.trades[0].trade_id == 7
+        assert order.trades[0].offer_type == interface.OfferType.ASK
+
+    def test_unknown_codes_and_missing_fields(self):
+        order = records.Order.from_dict({'orderID': 1, 'status': 99})
+
+        assert order.status == 99
+        assert order.price is None
+        assert order.trades is None
+
+    def test_slots(self):
+        order = records.Order.from_dict(ORDER)
+
+        assert not hasattr(order, '__dict__')
+        with pytest.raises(AttributeError):
+            order.unknown_field = 1
+
+    def test_item_access_and_as_dict(self):
+        order = records.Order.from_dict(ORDER)
+
+        assert order['price'] == order.price
+        assert order.as_dict()['type'] == interface.OrderType.STOP
+        assert 'unknownField' not in order.as_dict()
+        with pytest.raises(KeyError):
+            order['unknownField']
+
+    def test_equality(self):
+        assert records.Order.from_dict(ORDER) == records.Order.from_dict(ORDER)
+        assert records.Order.from_dict(ORDER) != records.Order.from_dict(dict(ORDER, price='6'))
+
+
+def test_decode_as():
+    content = b'{"trades": [{"tradeID": 1, "totalPrice": 5.5}], "pageSize": 1}'
+
+    body = records.decode_as(content, records.Trade, 'trades')
+
+    assert body['pageSize'] == 1
+    assert body['trades'] == [records.Trade.from_dict({'tradeID': 1, 'totalPrice': '5.5'})]
+    assert records.decode_as(b'[{"id": 3, "minOrderAmount": 0.01}]', records.Instrument)[0].min_order_amount \
+        == Decimal('0.01')
+
+
+def test_decode_as_shares_equal_decimals():
+    content = b'[{"orderID": 1, "price": "1.50", "quantity": "1.50"}, {"orderID": 2, "price": "1.50", "quantity": 1.5}]'
+
+    first, second = records.decode_as(content, records.Order)
+
+    assert first.price is first.quantity is second.price
+    # equal numbers written differently keep their own exponent
+    assert str(second.quantity) == '1.5'
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import sys
+import types
+from decimal import Decimal
+
+import pytest
+
+from blockex.tradeapi import interface
+from blockex.tradeapi.records import Order
+
+streaming = pytest.importorskip('blockex.tradeapi.streaming')
+
+
+def orders(instrument_id, *prices):
+    return [{'orderID': str(instrument_id * 100 + index), 'price': price, 'quantity': '1.00', 'offerType': 1,
+             'instrumentID': instrument_id} for index, price in enumerate(prices)]
+
+
+class TestDecodeMarketOrders:
+    def test_hub_arguments(self):
+        decoded = streaming.decode_market_orders([orders(1, '5.00') + orders(2, '6.00', '7.00')])
+
+        assert sorted(decoded) == [1, 2]
+        assert decoded[1] == [{'orderID': 100, 'price': Decimal('5.00'), 'quantity': Decimal('1.00'),
+                               'offerType': 1, 'instrumentID': 1}]
+        assert len(decoded[2]) == 2
+
+    def test_json_text_and_objects(self):
+        message = [json.dumps(orders(1, '5.00')), {'instrumentID': 2, 'orders': []}]
+
+        decoded = streaming.decode_market_orders(message, as_records=True)
+
+        assert decoded[1][0] == Order.from_dict(orders(1, '5.00')[0])
+        assert decoded[2] == []
+
+
+class TestMarketDataStream:
+    def test_routes_per_instrument(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            first, every = stream.subscribe(1), stream.subscribe(None)
+
+            assert await stream.dispatch([orders(1, '5.00') + orders(2, '6.00')]) == 3
+            event = await first.get()
+            assert event.instrument_id == 1
+            assert event.orders[0]['price'] == Decimal('5.00')
+            assert sorted([(await every.get()).instrument_id, (await every.get()).instrument_id]) == [1, 2]
+            return stream.stats()
+
+        stats = run(scenario())
+        assert stats['messages'] == 1
+        assert stats['subscriptions'][0] == (1, {'received': 1, 'delivered': 1, 'dropped': 0, 'queued': 0})
+
+    def test_undecodable_message_is_counted(self, run):
+        stream = streaming.MarketDataStream()
+
+        assert run(stream.dispatch(['not json'])) == 0
+        assert stream.errors == 1
+
+    def test_drop_policies(self, run):
+        async def scenario(backpressure):
+            stream = streaming.MarketDataStream(queue_size=2, backpressure=backpressure)
+            subscription = stream.subscribe(1)
+            for price in ('1', '2', '3'):
+                await stream.dispatch([orders(1, price)])
+            prices = [(await subscription.get()).orders[0]['price'] for _ in range(2)]
+            return prices, subscription.dropped
+
+        assert run(scenario(interface.Backpressure.DROP_OLDEST)) == ([Decimal('2'), Decimal('3')], 1)
+        assert run(scenario(interface.Backpressure.DROP_NEWEST)) == ([Decimal('1'), Decimal('2')], 1)
+
+    def test_block_waits_for_consumer(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream(queue_size=1)
+            subscription = stream.subscribe(1)
+            await stream.dispatch([orders(1, '1')])
+            blocked = asyncio.ensure_future(stream.dispatch([orders(1, '2')]))
+            await asyncio.sleep(0.01)
+            assert not blocked.done()
+
+            await subscription.get()
+            await asyncio.wait_for(blocked, 1)
+            return subscription.dropped
+
+        assert run(scenario()) == 0
+
+    def test_unsubscribe_wakes_blocked_dispatch(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream(queue_size=1)
+            subscription = stream.subscribe(1)
+            other = stream.subscribe(None, queue_size=5)
+            await stream.dispatch([orders(1, '1')])
+            blocked = asyncio.ensure_future(stream.dispatch([orders(1, '2')]))
+            await asyncio.sleep(0.01)
+            assert not blocked.done()
+
+            stream.unsubscribe(subscription)
+            await asyncio.wait_for(blocked, 1)
+            return subscription.stats(), other.stats()['queued']
+
+        assert run(scenario()) == ({'received': 2, 'delivered': 0, 'dropped': 0, 'queued': 1}, 2)
+
+    def test_wildcard_receives_unknown_instrument_once(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            subscription = stream.subscribe(None)
+            queued = await stream.dispatch([[{'orderID': '1', 'price': '1.00', 'quantity': '1', 'offerType': 1}]])
+            return queued, subscription.stats()['queued']
+
+        assert run(scenario()) == (1, 1)
+
+    def test_close_ends_iteration(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            subscription = stream.subscribe(1)
+            await stream.dispatch([orders(1, '1')])
+            received = []
+            async for event in subscription:
+                received.append(event.instrument_id)
+                stream.close()
+            return received, await stream.dispatch([orders(1, '1')])
+
+        assert run(scenario()) == ([1], 0)
+
+    def test_backpressure_is_validated(self):
+        with pytest.raises(ValueError):
+            streaming.MarketDataStream(backpressure='block')
+
+
+class TestConflatingSubscription:
+    def test_merges_waiting_updates(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            subscription = stream.subscribe(None, conflate=True)
+            await stream.dispatch([orders(1, '1', '2')])
+            await stream.dispatch([orders(2, '5')])
+            await stream.dispatch([[dict(orders(1, '3')[0], orderID='101')]])
+            return [await subscription.get(), await subscription.get()], subscription.stats()
+
+        (first, second), stats = run(scenario())
+
+        assert first.instrument_id == 1
+        assert [(order['orderID'], order['price']) for order in first.orders] == \
+            [(100, Decimal('1')), (101, Decimal('3'))]
+        assert second.instrument_id == 2
+        assert stats == {'received': 3, 'delivered': 2, 'coalesced': 1, 'queued': 0}
+
+    def test_idle_consumer_is_woken(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            subscription = stream.subscribe(1, conflate=True)
+            waiting = asyncio.ensure_future(subscription.get())
+            await asyncio.sleep(0.01)
+            await stream.dispatch([orders(1, '1')])
+            return await asyncio.wait_for(waiting, 1)
+
+        assert run(scenario()).instrument_id == 1
+
+    def test_max_rate(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            subscription = stream.subscribe(1, conflate=True, max_rate=20)
+            await stream.dispatch([orders(1, '1')])
+            await subscription.get()
+            loop = asyncio.get_event_loop()
+            start = loop.time()
+            for price in ('2', '3', '4'):
+                await stream.dispatch([orders(1, price)])
+            event = await subscription.get()
+            return loop.time() - start, event, subscription.coalesced
+
+        elapsed, event, coalesced = run(scenario())
+
+        assert elapsed >= 0.04
+        assert event.orders[0]['price'] == Decimal('4')
+        assert coalesced == 2
+
+    def test_close_wakes_consumer(self, run):
+        async def scenario():
+            stream = streaming.MarketDataStream()
+            subscription = stream.subscribe(1, conflate=True)
+            waiting = asyncio.ensure_future(subscription.get())
+            await asyncio.sleep(0.01)
+            stream.close()
+            return await asyncio.wait_for(waiting, 1)
+
+        assert run(scenario()) is None
+
+
+class FakeConnection(object):
+    """Stand-in for signalr_aio.Connection, running on the loop current at construction."""
+
+    def __init__(self, url, session=None):
+        self.url = url
+        self.loop = asyncio.get_event_loop()
+        self.handlers = {}
+        self.stopped = asyncio.Event()
+        FakeConnection.last = self
+
+    def register_hub(self, name):
+        assert name == interface.TRADING_HUB
+        return types.SimpleNamespace(client=types.SimpleNamespace(on=self.handlers.__setitem__))
+
+    def start(self):
+        async def serve():
+            await self.handlers[interface.MARKET_ORDERS_REFRESHED]([orders(1, '5.00')])
+            await self.stopped.wait()
+
+        self.loop.run_until_complete(serve())
+
+    def close(self):
+        self.stopped.set()
+
+
+class FailingConnection(FakeConnection):
+    def start(self):
+        raise ConnectionError('hub unreachable')
+
+
+class TestMarketDataStreamConnection:
+    def test_start_from_running_loop(self, monkeypatch, run):
+        monkeypatch.setitem(sys.modules, 'signalr_aio', types.SimpleNamespace(Connection=FakeConnection))
+
+        async def scenario():
+            stream = streaming.MarketDataStream('https://test.api.url/')
+            subscription = stream.subscribe(1)
+            stream.start()
+            event = await asyncio.wait_for(subscription.get(), 1)
+            thread = stream._thread
+            stream.close()
+            return event, asyncio.get_event_loop(), thread
+
+        event, consumer_loop, thread = run(scenario())
+
+        assert event.orders[0]['price'] == Decimal('5.00')
+        assert FakeConnection.last.url == 'https://test.api.url/signalr'
+        assert FakeConnection.last.loop is not consumer_loop
+        assert FakeConnection.last.loop.is_closed()
+        assert not thread.is_alive()
+
+    def test_connection_error_ends_subscriptions(self, monkeypatch, run):
+        monkeypatch.setitem(sys.modules, 'signalr_aio', types.SimpleNamespace(Connection=FailingConnection))
+
+        async def scenario():
+            stream = streaming.MarketDataStream('https://test.api.url/')
+            subscription = stream.subscribe(1)
+            stream.start()
+            received = []
+
+            async def consume():
+                async for event in subscription:
+                    received.append(event)
+
+            await asyncio.wait_for(consume(), 1)
+            return stream, received
+
+        stream, received = run(scenario())
+
+        assert received == []
+        assert isinstance(stream.error, ConnectionError)
+        with pytest.raises(ConnectionError):
+            stream.close()
+        assert stream.error is None
@@ -0,0 +1,52 @@
+from blockex.tradeapi import interface, sync
+
+
+class TestTradeHistorySync:
+    def test_first_sync_fetches_everything(self, fake_api, trade):
+        api = fake_api([trade(1, 0), trade(2, 1)])
+        store = sync.MemoryTradeStore()
+
+        assert sync.TradeHistorySync(api, store).sync(5) == 2
+        assert [t['tradeID'] for t in store.read(5)] == [1, 2]
+        assert api.calls[0]['date_from'] is None
+        assert api.calls[0]['sort_by'] == interface.SortBy.DATE
+        assert api.calls[0]['sort_desc'] is False
+
+    def test_resync_fetches_from_high_water_mark(self, fake_api, trade):
+        api = fake_api([trade(1, 0), trade(2, 1), trade(3, 1)])
+        store = sync.MemoryTradeStore()
+        store.append(5, [trade(1, 0), trade(2, 1)])
+
+        assert sync.TradeHistorySync(api, store).sync(5) == 1
+        assert api.calls[0]['date_from'] == '2017-05-14T09:16:01'
+        assert [t['tradeID'] for t in store.read(5)] == [1, 2, 3]
+
+    def test_appends_in_batches(self, fake_api, trade):
+        api = fake_api([trade(trade_id, trade_id) for trade_id in range(5)])
+        store = sync.MemoryTradeStore()
+        appends = []
+        store.append = lambda instrument_id, trades: appends.append(len(trades))
+
+        assert sync.TradeHistorySync(api, store, page_size=2).sync_all([5]) == {5: 5}
+        assert appends == [2, 2, 1]
+
+
+class TestJsonLinesTradeStore:
+    def test_round_trip(self, tmpdir, trade):
+        store = sync.JsonLinesTradeStore(str(tmpdir.join('trades')))
+
+        assert store.last_trade(5) is None
+        assert list(store.read(5)) == []
+
+        store.append(5, [trade(1, 0)])
+        store.append(5, [trade(2, 1), trade(3, 2)])
+
+        assert store.last_trade(5) == trade(3, 2)
+        assert list(store.read(5)) == [trade(1, 0), trade(2, 1), trade(3, 2)]
+
+    def test_last_line_spans_chunks(self, tmpdir):
+        path = tmpdir.join('lines')
+        path.write(b'first\n' + b'x' * 50 + b'\nlast\n', mode='wb')
+
+        assert sync._last_line(str(path), chunk_size=4) == b'last'
+        assert sync._last_line(str(path), chunk_size=1000) == b'last'
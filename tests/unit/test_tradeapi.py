@@ -1,16 +1,28 @@
 import sys
+import json
+from decimal import Decimal
 
 import pytest
+import requests
 from requests import RequestException
-from blockex.tradeapi import interface, tradeapi
+from blockex.tradeapi import interface, orderbook, tradeapi
 
 if sys.version_info >= (3, 0):
-    from urllib.parse import urlencode  # pragma: no cover
+    from urllib.parse import parse_qsl, urlencode  # pragma: no cover
 else:
     from urllib import urlencode  # pragma: no cover
+    from urlparse import parse_qsl  # pragma: no cover
 
 FIXTURE_INSTRUMENT_ID = 1
 
+OPEN_ORDERS = """
+    [{"orderID": "32592", "price": "13.40", "initialQuantity": "32.50", "quantity": "32.50",
+      "dateCreated": "2017-10-09T09:32:24.735659+00:00", "offerType": 1, "type": 1, "status": 20,
+      "instrumentID": 1, "trades": null},
+     {"orderID": "32593", "price": "15.20", "initialQuantity": "3.70", "quantity": "3.70",
+      "dateCreated": "2017-10-09T09:35:10.61228+00:00", "offerType": 1, "type": 1, "status": 20,
+      "instrumentID": 1, "trades": null}]"""
+
 
 @pytest.mark.usefixtures('trade_api')
 class TestTradeApiInit:
@@ -143,6 +155,105 @@ class TestTradeApiGetMarketOrders:
             tradeapi.convert_order_numbers(order)
         assert get_market_orders_response == orders
 
+    def test_successful_get_market_orders_as_records(self):
+        self.response._content = self.market_orders_list.encode()
+        orders = self.trade_api.get_market_orders(FIXTURE_INSTRUMENT_ID, as_records=True)
+
+        assert [order.order_id for order in orders] == [31635, 31636]
+        assert orders[0].price == Decimal('5.00')
+        assert orders[0].offer_type == interface.OfferType.BID
+        assert orders[0].order_type == interface.OrderType.LIMIT
+        assert orders[0].status == interface.OrderStatus.CANCELLED
+        assert orders[0]['initialQuantity'] == Decimal('270.00')
+
+    def test_successful_get_market_orders_as_arrays(self):
+        pytest.importorskip('numpy')
+        self.response._content = self.market_orders_list.encode()
+        orders = self.trade_api.get_market_orders(FIXTURE_INSTRUMENT_ID, as_arrays=True)
+
+        assert orders['orderID'].tolist() == [31635, 31636]
+        assert orders['price'].tolist() == [5.0, 1.0]
+
+    def test_get_highest_bid_order(self):
+        resting = self.market_orders_list.replace('"status": 40', '"status": 20')
+        self.response._content = resting.replace('"quantity": "0.00"', '"quantity": "1.00"').encode()
+        highest_order = self.trade_api.get_highest_bid_order(FIXTURE_INSTRUMENT_ID)
+
+        assert type(highest_order) is dict
+        assert highest_order['orderID'] == 31635
+        assert highest_order['price'] == Decimal('5.00')
+        assert highest_order['initialQuantity'] == Decimal('270.00')
+
+    def test_get_highest_bid_order_skips_orders_not_resting(self):
+        self.response._content = self.market_orders_list.encode()
+
+        assert self.trade_api.get_highest_bid_order(FIXTURE_INSTRUMENT_ID) == {}
+
+    def test_get_highest_bid_order_warns_when_truncated(self, monkeypatch):
+        monkeypatch.setattr(interface, 'MARKET_ORDERS_MAX_COUNT', 2)
+        self.response._content = self.market_orders_list.encode()
+
+        with pytest.warns(orderbook.TruncatedOrdersWarning):
+            self.trade_api.get_highest_bid_order(FIXTURE_INSTRUMENT_ID)
+
+    def test_get_lowest_ask_order_without_orders(self):
+        self.response._content = b'[]'
+
+        assert self.trade_api.get_lowest_ask_order(FIXTURE_INSTRUMENT_ID) == {}
+
+    def test_get_order_book(self):
+        self.response._content = self.market_orders_list.encode()
+        book = self.trade_api.get_order_book(FIXTURE_INSTRUMENT_ID, max_count=2)
+
+        # Both requests answer with the two bids of the fixture
+        assert len(book) == 2
+        assert book.best_bid().price == Decimal('5.00')
+        assert book.best_ask() is None
+        assert book.truncated
+        queries = sorted(call[0][0] for call in self.get_mock.call_args_list)
+        assert [dict(parse_qsl(query.split('?')[1]))['offerType'] for query in queries] == ['Ask', 'Bid']
+
+    def test_get_depth(self):
+        self.response._content = json.dumps([
+            {'orderID': 1, 'price': '5.00', 'quantity': '2.00', 'offerType': 1, 'status': 20},
+            {'orderID': 2, 'price': '5.00', 'quantity': '1.00', 'offerType': 1, 'status': 50},
+            {'orderID': 3, 'price': '6.00', 'quantity': '1.00', 'offerType': 2, 'status': 20}]).encode()
+        depth = self.trade_api.get_depth(FIXTURE_INSTRUMENT_ID)
+
+        assert depth.levels(interface.OfferType.BID)[1].tolist() == [3.0]
+        assert depth.fill_cost(interface.OfferType.ASK, 1) == (6.0, 1.0, 6.0)
+        assert self.trade_api.get_depth(FIXTURE_INSTRUMENT_ID, depth) is depth
+        query = dict(parse_qsl(self.get_mock.call_args[0][0].split('?')[1]))
+        assert 'offerType' not in query
+        assert query['status'] == '20,50'
+
+    def test_get_top_of_book(self):
+        def market_orders(url):
+            query = dict(parse_qsl(url.split('?')[1]))
+            orders = {'1': [(1, 1, '5'), (2, 1, '6'), (4, 2, '7')],
+                      '2': [(5, 1, '3')],
+                      # A full response, asked again per side
+                      '3': [(6, 1, '1'), (7, 1, '2'), (3, 1, '3'), (10, 1, '0')]}[query['instrumentID']]
+            if 'offerType' in query:
+                orders = [(9, 2, '4')] if query['offerType'] == 'Ask' else [(8, 1, '2')]
+            response = requests.Response()
+            response.status_code = interface.SUCCESS
+            response._content = json.dumps([{'orderID': order_id, 'offerType': offer_type, 'price': price}
+                                            for order_id, offer_type, price in orders]).encode()
+            return response
+
+        self.get_mock.side_effect = market_orders
+
+        tops = self.trade_api.get_top_of_book([3, 1, 2], max_count=4)
+
+        assert list(tops) == [3, 1, 2]
+        assert tops[1]['bid'] == {'orderID': 2, 'offerType': 1, 'price': Decimal('6')}
+        assert tops[1]['ask']['orderID'] == 4
+        assert tops[2] == {'bid': {'orderID': 5, 'offerType': 1, 'price': Decimal('3')}, 'ask': {}}
+        assert tops[3]['bid']['orderID'] == 8
+        assert tops[3]['ask']['orderID'] == 9
+        assert self.get_mock.call_count == 5
+
     def test_successful_get_market_orders_with_filter(self):
         self.response._content = self.market_orders_list.encode()
         get_market_orders_response = self.trade_api.get_market_orders(
@@ -237,6 +348,14 @@ class TestTradeApiGetTradesHistory:
         orders = self.response.json()
         assert get_trades_history_response == orders
 
+    def test_successful_get_trades_history_as_records(self):
+        self.response._content = self.trades_history_list.encode()
+        trades_history = self.trade_api.get_trades_history(as_records=True)
+
+        assert trades_history['pageIndex'] == 2
+        assert [trade.trade_id for trade in trades_history['trades']] == [1, 2]
+        assert trades_history['trades'][1].total_price == Decimal('6.00')
+
     def test_successful_get_trades_history_with_filter(self):
         self.response._content = self.trades_history_list.encode()
         get_trades_history_response = self.trade_api.get_trades_history(
@@ -257,6 +376,68 @@ class TestTradeApiGetTradesHistory:
         orders = self.response.json()
         assert get_trades_history_response == orders
 
+    def test_iter_trades_history(self):
+        def page(url, data, headers):
+            page_index = int(dict(parse_qsl(data)).get('pageIndex', 0))
+            response = requests.Response()
+            response.status_code = interface.SUCCESS
+            response._content = json.dumps({
+                'trades': [{'tradeID': page_index * 2 + offset, 'price': '1.0'} for offset in range(2)],
+                'pageSize': 2, 'pageIndex': page_index, 'pageCount': 3}).encode()
+            return response
+
+        self.post_mock.side_effect = page
+
+        trades = list(self.trade_api.iter_trades_history(instrument_id=FIXTURE_INSTRUMENT_ID, page_size=2))
+
+        assert [trade['tradeID'] for trade in trades] == [0, 1, 2, 3, 4, 5]
+        assert trades[0]['price'] == Decimal('1.0')
+        assert [dict(parse_qsl(call[1]['data']))['pageIndex'] for call in self.post_mock.call_args_list] == \
+            ['0', '1', '2']
+
+    def test_iter_trades_history_without_page_count(self):
+        self.response._content = b'{"trades": [{"tradeID": 1}]}'
+
+        trades = list(self.trade_api.iter_trades_history(page_size=2, prefetch=False))
+
+        assert [trade['tradeID'] for trade in trades] == [1]
+        assert self.post_mock.call_count == 1
+
+    def test_fetch_trades_history_parallel(self):
+        def page(url, data, headers):
+            page_index = int(dict(parse_qsl(data)).get('pageIndex', 0))
+            # A new trade shifted the pages: trade 3 is on pages 1 and 2
+            trade_ids = {0: [6, 5], 1: [4, 3], 2: [3, 2], 3: [1]}[page_index]
+            response = requests.Response()
+            response.status_code = interface.SUCCESS
+            response._content = json.dumps({
+                'trades': [{'tradeID': trade_id, 'tradeDate': '2017-05-14T09:16:2{0}'.format(trade_id)}
+                           for trade_id in trade_ids],
+                'pageSize': 2, 'pageIndex': page_index, 'totalCount': 7}).encode()
+            return response
+
+        self.post_mock.side_effect = page
+
+        trades = self.trade_api.fetch_trades_history_parallel(sort_by=interface.SortBy.DATE, sort_desc=True,
+                                                              page_size=2, workers=3)
+
+        assert [trade['tradeID'] for trade in trades] == [6, 5, 4, 3, 2, 1]
+        assert self.post_mock.call_count == 4
+
+    def test_fetch_trades_history_parallel_raises_page_errors(self):
+        def page(url, data, headers):
+            response = requests.Response()
+            response.status_code = interface.SUCCESS
+            if 'pageIndex=1' in data:
+                response.status_code = interface.BAD_REQUEST
+            response._content = b'{"trades": [], "pageCount": 2, "message": "Bad page"}'
+            return response
+
+        self.post_mock.side_effect = page
+
+        with pytest.raises(RequestException):
+            self.trade_api.fetch_trades_history_parallel()
+
     def test_unsuccessful_get_trades_history(self):
         self.response._content = self.trades_history_list.encode()
         self.response.status_code = interface.BAD_REQUEST
@@ -302,6 +483,169 @@ class TestTradeApiCreateOrder:
             'https://test.api.url/api/orders/create?' + query_string,
             headers={'Authorization': 'Bearer SomeAccessToken'})
 
+    def create_response(self, content):
+        response = requests.Response()
+        response.status_code = interface.SUCCESS
+        response._content = content.encode()
+        return response
+
+    def test_successful_create_order_reconciles_open_orders(self):
+        self.post_mock.return_value = self.create_response('{"orderID": 32600}')
+        self.response._content = OPEN_ORDERS.encode()
+
+        order_id = self.trade_api.create_order(interface.OfferType.BID, interface.OrderType.LIMIT,
+                                               FIXTURE_INSTRUMENT_ID, 15.2, 3.7)
+
+        assert order_id == 32600
+        query_string = urlencode({'loadExecutions': False, 'maxCount': interface.OPEN_ORDERS_MAX_COUNT,
+                                  'status': '10,20,50'})
+        self.get_mock.assert_called_once_with('https://test.api.url/api/orders/get?' + query_string,
+                                              headers={'Authorization': 'Bearer SomeAccessToken'})
+        assert self.trade_api._open_orders == {32592, 32593}
+        assert self.trade_api._open_orders_complete
+
+    def test_create_order_fast_path_uses_create_response(self):
+        self.trade_api._open_orders = {32592}
+        self.post_mock.return_value = self.create_response('32600')
+
+        order_id = self.trade_api.create_order(interface.OfferType.BID, interface.OrderType.LIMIT,
+                                               FIXTURE_INSTRUMENT_ID, 15.2, 3.7, reconcile=False)
+
+        assert order_id == 32600
+        self.get_mock.assert_not_called()
+        assert self.trade_api._open_orders == {32592, 32600}
+
+    def test_create_order_fast_path_targeted_lookup(self):
+        self.trade_api._open_orders = {32592}
+        self.trade_api._open_orders_complete = True
+        self.post_mock.return_value = self.create_response('')
+        self.response._content = OPEN_ORDERS.encode()
+
+        order_id = self.trade_api.create_order(interface.OfferType.BID, interface.OrderType.LIMIT,
+                                               FIXTURE_INSTRUMENT_ID, 15.2, 3.7, reconcile=False)
+
+        assert order_id == 32593
+        query_string = urlencode({'instrumentID': FIXTURE_INSTRUMENT_ID, 'loadExecutions': False,
+                                  'maxCount': interface.OPEN_ORDERS_MAX_COUNT, 'orderType': 'Limit',
+                                  'offerType': 'Bid', 'status': '10,20,50'})
+        self.get_mock.assert_called_once_with('https://test.api.url/api/orders/get?' + query_string,
+                                              headers={'Authorization': 'Bearer SomeAccessToken'})
+        assert self.trade_api._open_orders == {32592, 32593}
+        assert self.trade_api._open_orders_complete
+
+    def test_create_order_fast_path_skips_lookup_when_not_reconciled(self):
+        self.trade_api._open_orders = {32592}
+        self.post_mock.return_value = self.create_response('')
+        self.response._content = OPEN_ORDERS.encode()
+
+        order_id = self.trade_api.create_order(interface.OfferType.BID, interface.OrderType.LIMIT,
+                                               FIXTURE_INSTRUMENT_ID, 15.2, 3.7, reconcile=False)
+
+        assert order_id is None
+        self.get_mock.assert_not_called()
+        assert self.trade_api._open_orders == {32592}
+
+    def test_create_order_fast_path_order_executed_immediately(self):
+        self.trade_api._open_orders = {32592, 32593}
+        self.trade_api._open_orders_complete = True
+        self.post_mock.return_value = self.create_response('')
+        self.response._content = OPEN_ORDERS.encode()
+
+        order_id = self.trade_api.create_order(interface.OfferType.BID, interface.OrderType.LIMIT,
+                                               FIXTURE_INSTRUMENT_ID, 15.2, 3.7, reconcile=False)
+
+        assert order_id is None
+        assert self.trade_api._open_orders == {32592, 32593}
+        # the order may still be open under an unknown ID, so the next lookup is not trusted
+        assert not self.trade_api._open_orders_complete
+
+    def test_reconcile_open_orders_truncated(self, monkeypatch):
+        monkeypatch.setattr(interface, 'OPEN_ORDERS_MAX_COUNT', 2)
+        self.response._content = OPEN_ORDERS.encode()
+
+        assert self.trade_api.reconcile_open_orders() == {32592, 32593}
+        assert not self.trade_api._open_orders_complete
+
+    @pytest.mark.parametrize('body', ['true', 'false', '1.5', '"abc"', '"-1"', '{"orderID": true}', 'null'])
+    def test_create_order_fast_path_rejects_malformed_order_id(self, body):
+        self.trade_api._open_orders = {32592}
+        self.trade_api._open_orders_complete = True
+        self.post_mock.return_value = self.create_response(body)
+        self.response._content = OPEN_ORDERS.encode()
+
+        order_id = self.trade_api.create_order(interface.OfferType.BID, interface.OrderType.LIMIT,
+                                               FIXTURE_INSTRUMENT_ID, 15.2, 3.7, reconcile=False)
+
+        assert order_id == 32593
+        assert self.get_mock.call_count == 1
+
+    @pytest.mark.parametrize('body, order_id', [('32600', 32600), ('"32600"', 32600), ('32600.0', 32600),
+                                                ('{"id": "32600"}', 32600)])
+    def test_order_id_from_response(self, body, order_id):
+        assert tradeapi.order_id_from_response(self.create_response(body)) == order_id
+
+
+@pytest.mark.usefixtures('trade_api')
+class TestTradeApiCreateOrders:
+
+    @pytest.fixture(autouse=True)
+    def order_specs(self):
+        self.specs = [{'offer_type': interface.OfferType.BID, 'order_type': interface.OrderType.LIMIT,
+                       'instrument_id': FIXTURE_INSTRUMENT_ID, 'price': 10 + level, 'quantity': 1}
+                      for level in range(5)]
+
+    def create_responses(self, url, headers):
+        response = requests.Response()
+        price = int(dict(parse_qsl(url.split('?')[1]))['price'])
+        if price == 12:
+            response.status_code = interface.BAD_REQUEST
+            response._content = '{"message": "Insufficient funds"}'.encode()
+        else:
+            response.status_code = interface.SUCCESS
+            response._content = str(32600 + price).encode()
+        return response
+
+    def test_create_orders_returns_results_in_input_order(self):
+        self.post_mock.side_effect = self.create_responses
+        self.response._content = OPEN_ORDERS.encode()
+
+        results = self.trade_api.create_orders(self.specs, max_concurrency=3)
+
+        assert [result.value for result in results] == [32610, 32611, None, 32613, 32614]
+        assert isinstance(results[2].error, RequestException)
+        assert self.post_mock.call_count == 5
+        # one reconciliation for the whole batch
+        self.get_mock.assert_called_once()
+        assert self.trade_api._open_orders == {32592, 32593}
+
+    def test_create_orders_without_reconcile(self):
+        self.post_mock.side_effect = self.create_responses
+
+        self.trade_api.create_orders(self.specs, reconcile=False)
+
+        self.get_mock.assert_not_called()
+        assert self.trade_api._open_orders == {32610, 32611, 32613, 32614}
+
+    def test_create_orders_without_reconcile_unknown_order_id(self):
+        self.trade_api._open_orders_complete = True
+        self.post_mock.return_value = requests.Response()
+        self.post_mock.return_value.status_code = interface.SUCCESS
+        self.post_mock.return_value._content = b''
+
+        results = self.trade_api.create_orders(self.specs[:1], reconcile=False)
+
+        assert results[0].value is None
+        assert results[0].error is None
+        assert not self.trade_api._open_orders_complete
+
+    def test_create_orders_validates_before_sending(self):
+        self.specs[3]['offer_type'] = 'Bid'
+
+        with pytest.raises(ValueError):
+            self.trade_api.create_orders(self.specs)
+
+        self.post_mock.assert_not_called()
+
 
 @pytest.mark.usefixtures('trade_api')
 class TestTradeApiCancelOrder:
@@ -324,6 +668,28 @@ class TestTradeApiCancelOrder:
             'https://test.api.url/api/orders/cancel?orderID=32598',
             headers={'Authorization': 'Bearer SomeAccessToken'})
 
+    def test_cancel_orders(self):
+        def cancel_responses(url, headers):
+            response = requests.Response()
+            if url.endswith('32599'):
+                response.status_code = interface.BAD_REQUEST
+                response._content = '{"message": "Order not found"}'.encode()
+            else:
+                response.status_code = interface.SUCCESS
+            return response
+
+        self.post_mock.side_effect = cancel_responses
+        self.trade_api._open_orders = {32598, 32599, 32600, 32601}
+
+        results = self.trade_api.cancel_orders([32598, 32599, 32600], max_concurrency=3)
+
+        assert list(results) == [32598, 32599, 32600]
+        assert results[32598].error is None
+        assert isinstance(results[32599].error, RequestException)
+        assert results[32600].error is None
+        assert self.post_mock.call_count == 3
+        assert self.trade_api._open_orders == {32599, 32601}
+
 
 @pytest.mark.usefixtures('trade_api')
 class TestTradeApiCancelAllOrders:
@@ -409,7 +775,7 @@ class TestTradeApiGetPartnerInstruments:
             "baseCurrencyID": 46,
             "quoteCurrencyID": 2,
             "minOrderAmount": "9.000000000000",
-            "commissionFeePercent": 0.025000000000}}]""".format(instrument_id = FIXTURE_INSTRUMENT_ID)
+            "commissionFeePercent": 0.025000000000}}]""".format(instrument_id=FIXTURE_INSTRUMENT_ID)
 
         self.response._content = instruments_list.encode()
         partner_instruments_response = self.trade_api.get_partner_instruments()
@@ -465,3 +831,19 @@ class TestTradeApiInfo:
 
         info = self.response.json()
         assert trader_info_res == info
+
+
+def test_next_page_index():
+    assert tradeapi.next_page_index({'pageCount': 3}, 1, 10) == 2
+    assert tradeapi.next_page_index({'pageCount': 3}, 2, 10) is None
+    assert tradeapi.next_page_index({'totalCount': 25}, 1, 10) == 2
+    assert tradeapi.next_page_index({'totalCount': 20}, 1, 10) is None
+    assert tradeapi.next_page_index({'trades': [{}] * 10}, 0, 10) == 1
+    assert tradeapi.next_page_index({'trades': [{}] * 9}, 0, 10) is None
+
+
+def test_merge_trade_pages():
+    pages = [[{'tradeID': 1, 'price': 3}, {'tradeID': 2, 'price': 1}], [{'tradeID': 2, 'price': 1}]]
+
+    assert [trade['tradeID'] for trade in tradeapi.merge_trade_pages(pages)] == [1, 2]
+    assert [trade['tradeID'] for trade in tradeapi.merge_trade_pages(pages, interface.SortBy.PRICE)] == [2, 1]
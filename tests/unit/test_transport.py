@@ -0,0 +1,59 @@
+import pytest
+
+from blockex.tradeapi import interface, transport
+from blockex.tradeapi.tradeapi import BlockExTradeApi
+
+
+class TestMakeTransport:
+    def test_default_is_requests(self):
+        assert isinstance(transport.make_transport(), transport.RequestsTransport)
+
+    def test_by_name(self):
+        assert isinstance(transport.make_transport('urllib3', pool_maxsize=4), transport.Urllib3Transport)
+
+    def test_httpx(self):
+        pytest.importorskip('httpx')
+        assert isinstance(transport.make_transport('httpx'), transport.HttpxTransport)
+
+    def test_instance_is_kept(self):
+        fake = transport.FakeTransport(lambda method, url, kwargs: (interface.SUCCESS, b'[]'))
+        assert transport.make_transport(fake) is fake
+
+    def test_unknown_name(self):
+        with pytest.raises(ValueError):
+            transport.make_transport('curl')
+
+
+class TestEncodeBody:
+    def test_dict_is_form_encoded(self):
+        headers, body = transport._encode_body(None, {'grant_type': 'password', 'username': 'a b'})
+
+        assert headers == {'Content-Type': 'application/x-www-form-urlencoded'}
+        assert body == b'grant_type=password&username=a+b'
+
+    def test_string_is_kept(self):
+        headers = {'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8'}
+
+        assert transport._encode_body(headers, 'apiID=1') == (headers, b'apiID=1')
+        assert transport._encode_body(None, None) == (None, None)
+
+
+class TestFakeTransport:
+    def test_trade_api_over_fake_transport(self):
+        def handler(method, url, kwargs):
+            if url.endswith('oauth/token'):
+                return interface.SUCCESS, b'{"access_token": "SomeAccessToken", "expires_in": 86399}'
+            return interface.SUCCESS, b'[{"id": 1, "name": "BTC/EUR", "minOrderAmount": "0.02"}]'
+
+        fake = transport.FakeTransport(handler)
+        trade_api = BlockExTradeApi('CorrectUsername', 'CorrectPassword', api_url='https://test.api.url/',
+                                    api_id='CorrectApiID', transport=fake)
+
+        instruments = trade_api.get_trader_instruments()
+
+        assert str(instruments[0]['minOrderAmount']) == '0.02'
+        assert trade_api.session is None
+        assert [request[:2] for request in fake.requests] == [
+            ('post', 'https://test.api.url/oauth/token'),
+            ('get', 'https://test.api.url/api/orders/traderinstruments')]
+        assert fake.requests[1][2] == {'headers': {'Authorization': 'Bearer SomeAccessToken'}}